@@ -0,0 +1,53 @@
+import argparse
+import logging
+import sys
+
+import logzero
+
+from . import suite  # noqa: F401  registers the benchmarks
+from .harness import cases, compare, load, run, save
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks',
+        description='Benchmark the xrvoyage hot paths and compare the results across versions',
+    )
+    parser.add_argument('cases', nargs='*', help='run only cases whose name starts with one of these, e.g. ingress')
+    parser.add_argument('-o', '--output', help='write the results as JSON to this file')
+    parser.add_argument('--baseline', help='results JSON of an earlier run to compare against')
+    parser.add_argument('--max-throughput-drop', type=float, default=0.10, help='allowed relative drop in events/sec')
+    parser.add_argument('--max-p99-rise', type=float, default=0.25, help='allowed relative rise in p99 latency')
+    parser.add_argument('--quick', action='store_true', help='few iterations, to check the suite runs')
+    parser.add_argument('--list', action='store_true', help='list the cases and exit')
+    args = parser.parse_args()
+
+    if args.list:
+        for case in cases(args.cases):
+            print(case.key)
+        return 0
+
+    # Per event logging would dominate every measurement
+    logzero.loglevel(logging.WARNING)
+    report = run(args.cases, quick=args.quick, progress=print)
+    if args.output:
+        save(report, args.output)
+        print(f'Results written to {args.output}')
+
+    if args.baseline:
+        baseline = load(args.baseline)
+        regressions = compare(baseline, report, args.max_throughput_drop, args.max_p99_rise)
+        print(f'Compared with {baseline.xrvoyage_version} ({baseline.created_utc})')
+        for regression in regressions:
+            print(
+                f'REGRESSION {regression.key} {regression.metric}: '
+                f'{regression.baseline:,.3f} -> {regression.current:,.3f} ({regression.change:+.1%})'
+            )
+        if regressions:
+            return 1
+        print('No regressions')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
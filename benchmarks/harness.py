@@ -0,0 +1,277 @@
+import asyncio
+import contextlib
+import datetime
+import gc
+import json
+import math
+import platform
+import statistics
+import time
+from typing import Awaitable, Callable, Dict, Iterator, List
+
+import pydantic
+
+from xrvoyage.common.codec import get_codec
+from xrvoyage.common.config import get_app_config
+from xrvoyage.common.static import get_version
+from xrvoyage.handlers.auth import TokenStrategy
+from xrvoyage.testing import StandInServer
+
+SCHEMA_VERSION = 1
+
+
+class BenchmarkResult(pydantic.BaseModel):
+    """
+    The outcome of one benchmark case.
+
+    events_per_sec is the headline throughput. Latencies are per operation, in
+    milliseconds; what an operation is (a frame, a batch, a request, a call)
+    depends on the benchmark and is given by unit.
+    """
+    unit: str
+    operations: int
+    events: int
+    seconds: float
+    events_per_sec: float
+    p50_ms: float
+    p90_ms: float
+    p99_ms: float
+    max_ms: float
+    mean_ms: float
+    extra: Dict[str, float] = {}
+
+
+class BenchmarkReport(pydantic.BaseModel):
+    schema_version: int = SCHEMA_VERSION
+    xrvoyage_version: str
+    python: str
+    implementation: str
+    platform: str
+    codec: str
+    created_utc: str
+    quick: bool
+    results: Dict[str, BenchmarkResult] = {}
+
+
+class BenchmarkCase(pydantic.BaseModel):
+    name: str
+    params: Dict[str, int | float | str] = {}
+    func: Callable[..., Awaitable[BenchmarkResult]]
+
+    @property
+    def key(self) -> str:
+        if not self.params:
+            return self.name
+        return self.name + '[' + ','.join(f'{key}={value}' for key, value in self.params.items()) + ']'
+
+
+_CASES: List[BenchmarkCase] = []
+
+
+def benchmark(name: str, *param_sets: Dict[str, int | float | str]):
+    """
+    Register an async benchmark, once per parameter set. The function is called
+    with the parameters as keyword arguments plus quick, and returns a
+    BenchmarkResult.
+    """
+    def decorator(func):
+        for params in param_sets or ({},):
+            _CASES.append(BenchmarkCase(name=name, params=params, func=func))
+        return func
+    return decorator
+
+
+def cases(selected: List[str] | None = None) -> List[BenchmarkCase]:
+    """
+    The registered cases, optionally only those whose key starts with one of selected.
+    """
+    if not selected:
+        return list(_CASES)
+    return [case for case in _CASES if any(case.key.startswith(prefix) for prefix in selected)]
+
+
+def percentile(sorted_values: List[float], share: float) -> float:
+    """
+    Nearest-rank percentile of already sorted values.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(share * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def summarize(
+    unit: str,
+    latencies: List[float],
+    seconds: float,
+    events: int | None = None,
+    **extra: float
+) -> BenchmarkResult:
+    """
+    Build a result from per-operation latencies in seconds and the wall time of the run.
+
+    Args:
+        unit (str): What one operation is, e.g. 'frame'.
+        latencies (List[float]): Seconds taken by every operation.
+        seconds (float): Wall time of the whole run.
+        events (int, optional): Events processed, defaults to one per operation.
+        **extra (float): Benchmark specific figures kept alongside.
+    """
+    ordered = sorted(latencies)
+    events = len(ordered) if events is None else events
+    return BenchmarkResult(
+        unit=unit,
+        operations=len(ordered),
+        events=events,
+        seconds=seconds,
+        events_per_sec=events / seconds if seconds else 0.0,
+        p50_ms=percentile(ordered, 0.50) * 1000,
+        p90_ms=percentile(ordered, 0.90) * 1000,
+        p99_ms=percentile(ordered, 0.99) * 1000,
+        max_ms=(ordered[-1] if ordered else 0.0) * 1000,
+        mean_ms=(statistics.fmean(ordered) if ordered else 0.0) * 1000,
+        extra=extra,
+    )
+
+
+def time_calls(func: Callable[[], object], iterations: int, warmup: int = 0) -> tuple:
+    """
+    Call func repeatedly, timing every call.
+
+    Returns:
+        tuple: The latency of every call in seconds and the total wall time.
+    """
+    for _ in range(warmup):
+        func()
+    latencies = []
+    perf_counter = time.perf_counter
+    started = perf_counter()
+    for _ in range(iterations):
+        call_started = perf_counter()
+        func()
+        latencies.append(perf_counter() - call_started)
+    return latencies, perf_counter() - started
+
+
+class StaticTokenStrategy(TokenStrategy):
+    """
+    Hands out a fixed token, for benchmarks that should not include logins.
+    """
+
+    def __init__(self, token: str) -> None:
+        self._token = token
+
+    def get_token(self):
+        return self._token
+
+    async def get_token_async(self) -> str:
+        return self._token
+
+
+@contextlib.contextmanager
+def pointed_at(server: StandInServer) -> Iterator[None]:
+    """
+    Point the client settings at a running stand-in, logging in with an access
+    key pair, and restore them afterwards.
+    """
+    settings = get_app_config()
+    overrides = {
+        **server.env(),
+        'XRVOYAGE_ACCESS_KEY_ID': 'bench-access-key',
+        'XRVOYAGE_SECRET_ACCESS_KEY': 'bench-secret-key',
+        'XRVOYAGE_SESSION_TOKEN': None,
+        'XRVOYAGE_TOKEN_CACHE_PATH': None,
+    }
+    saved = {name: getattr(settings, name) for name in overrides}
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(settings, name, value)
+
+
+def run(selected: List[str] | None = None, quick: bool = False, progress: Callable[[str], None] | None = None) -> BenchmarkReport:
+    """
+    Run the registered benchmarks, each on a fresh event loop.
+
+    Args:
+        selected (List[str], optional): Key prefixes of the cases to run, all by default.
+        quick (bool): Run a fraction of the iterations, to check the suite itself works.
+        progress (Callable, optional): Called with a line per finished case.
+    """
+    report = BenchmarkReport(
+        xrvoyage_version=get_version(),
+        python=platform.python_version(),
+        implementation=platform.python_implementation(),
+        platform=platform.platform(),
+        codec=get_codec().name,
+        created_utc=datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        quick=quick,
+    )
+    for case in cases(selected):
+        gc.collect()
+        result = asyncio.run(case.func(quick=quick, **case.params))
+        report.results[case.key] = result
+        if progress is not None:
+            progress(
+                f'{case.key:<45} {result.events_per_sec:>12,.0f} events/s'
+                f'  p50 {result.p50_ms * 1000:10.1f}us  p99 {result.p99_ms * 1000:10.1f}us'
+            )
+    return report
+
+
+def save(report: BenchmarkReport, path: str) -> None:
+    with open(path, 'w') as f:
+        f.write(report.model_dump_json(indent=2))
+
+
+def load(path: str) -> BenchmarkReport:
+    with open(path) as f:
+        return BenchmarkReport.model_validate(json.load(f))
+
+
+class Regression(pydantic.BaseModel):
+    key: str
+    metric: str
+    baseline: float
+    current: float
+    change: float
+
+
+def compare(
+    baseline: BenchmarkReport,
+    current: BenchmarkReport,
+    max_throughput_drop: float = 0.10,
+    max_p99_rise: float = 0.25
+) -> List[Regression]:
+    """
+    Cases present in both reports whose throughput fell, or whose p99 latency
+    rose, by more than the allowed share.
+
+    Args:
+        baseline (BenchmarkReport): The reference run, e.g. the installed release.
+        current (BenchmarkReport): The run under test.
+        max_throughput_drop (float): Allowed relative drop in events_per_sec.
+        max_p99_rise (float): Allowed relative rise in p99_ms.
+    """
+    regressions = []
+    for key, before in baseline.results.items():
+        after = current.results.get(key)
+        if after is None:
+            continue
+        if before.events_per_sec:
+            change = after.events_per_sec / before.events_per_sec - 1
+            if change < -max_throughput_drop:
+                regressions.append(Regression(
+                    key=key, metric='events_per_sec', baseline=before.events_per_sec,
+                    current=after.events_per_sec, change=change,
+                ))
+        if before.p99_ms:
+            change = after.p99_ms / before.p99_ms - 1
+            if change > max_p99_rise:
+                regressions.append(Regression(
+                    key=key, metric='p99_ms', baseline=before.p99_ms, current=after.p99_ms, change=change,
+                ))
+    return regressions
@@ -0,0 +1,188 @@
+import asyncio
+import json
+import time
+from typing import List
+
+from xrvoyage.common.codec import get_codec
+from xrvoyage.common.config import get_app_config
+from xrvoyage.entities.webhooks_xrweb import Webhooks_XRWebHandler
+from xrvoyage.handlers.auth import _AccessAndSecretKeyTokenStrategy, _TemporaryTokenStrategy
+from xrvoyage.handlers.decorators import DecoratorsHandlers
+from xrvoyage.handlers.dispatch import DispatchConfig
+from xrvoyage.handlers.http import AsyncHttpHandler, _encode_json
+from xrvoyage.handlers.wss import WssHandler
+from xrvoyage.models.events import XRWebhookEvent, XRWebhookEventBatch
+from xrvoyage.testing import StandInConfig, StandInServer
+from xrvoyage.xr_api_client import XrApiClient
+
+from .harness import BenchmarkResult, StaticTokenStrategy, benchmark, pointed_at, summarize, time_calls
+
+PROJECT_GUID = 'A895570833F0429A98940C079555AE51'
+SHIP_GUID = 'BENCHSHIP0001'
+HANDLED_TYPE = 'xr.rt.status.ship.geo'
+# Routed to no handler, so frames carrying it are decoded but their events are skipped
+UNHANDLED_TYPE = 'xr.rt.status.ship.speed'
+
+
+@benchmark('decode_route', {'events_per_frame': 1}, {'events_per_frame': 10})
+async def decode_route(events_per_frame: int, quick: bool = False) -> BenchmarkResult:
+    """
+    One websocket frame through WssHandler._process_frame: the prefilter, JSON
+    decode, routing and enqueueing for the dispatch workers. Half the events
+    have a registered handler, half do not.
+    """
+    frames_count = 200 if quick else 20000
+    generator = StandInServer(StandInConfig(
+        event_types=[HANDLED_TYPE, UNHANDLED_TYPE], events_per_frame=events_per_frame, payload_bytes=256
+    ))
+    frames = [json.dumps(generator.make_frame(SHIP_GUID)) for _ in range(frames_count)]
+
+    decorators = DecoratorsHandlers(None, PROJECT_GUID)
+
+    @decorators.eventIngress(HANDLED_TYPE)
+    async def on_geo(event: dict) -> None:
+        pass
+
+    # An unbounded queue, so the timed loop measures the reader side only
+    wss = WssHandler(StaticTokenStrategy('unused'), decorators, DispatchConfig(queue_size=0))
+    wss.dispatcher.start()
+    process_frame = wss._process_frame
+    for frame in frames[:min(100, frames_count)]:
+        await process_frame(frame, SHIP_GUID)
+
+    latencies: List[float] = []
+    perf_counter = time.perf_counter
+    started = perf_counter()
+    for frame in frames:
+        frame_started = perf_counter()
+        await process_frame(frame, SHIP_GUID)
+        latencies.append(perf_counter() - frame_started)
+    seconds = perf_counter() - started
+    await wss.dispatcher.stop()
+    return summarize('frame', latencies, seconds, events=frames_count * events_per_frame)
+
+
+@benchmark('batch_serialize', {'events': 1}, {'events': 10}, {'events': 100})
+async def batch_serialize(events: int, quick: bool = False) -> BenchmarkResult:
+    """
+    What eventEgress does before posting: build the events and the
+    XRWebhookEventBatch around them, then serialize it to the request body.
+    """
+    batches = 50 if quick else max(200000 // events, 500)
+    codec = get_codec()
+    args = [{'xrvoyage_game': {'answer': n, 'score': n * 10, 'player': f'player-{n}'}} for n in range(events)]
+
+    def build_and_serialize() -> None:
+        batch = XRWebhookEventBatch(**{'xr.data': [
+            XRWebhookEvent(project_guid=PROJECT_GUID, type='xr.data.vr-quiz-data', args=event_args)
+            for event_args in args
+        ]})
+        _encode_json(codec, batch)
+
+    latencies, seconds = time_calls(build_and_serialize, batches, warmup=min(batches, 100))
+    return summarize('batch', latencies, seconds, events=batches * events)
+
+
+@benchmark('egress', {'concurrency': 1}, {'concurrency': 8})
+async def egress(concurrency: int, quick: bool = False) -> BenchmarkResult:
+    """
+    An eventEgress decorated coroutine end to end: event and batch
+    construction, serialization, the POST to a local stand-in and the response.
+    """
+    calls = 40 if quick else 3000
+    server = StandInServer(StandInConfig(event_rate=0))
+    with server.running_in_thread(), pointed_at(server):
+        token_strategy = StaticTokenStrategy(server.issue_token())
+        async_http = AsyncHttpHandler(token_strategy)
+        decorators = DecoratorsHandlers(Webhooks_XRWebHandler(token_strategy, async_http_handler=async_http), PROJECT_GUID)
+
+        @decorators.eventEgress('xr.data.vr-quiz-data')
+        async def send_answer(instance, n: int) -> dict:
+            return {'args': {'xrvoyage_game': {'answer': n}}}
+
+        for n in range(min(calls, 20)):
+            await send_answer(None, n)
+
+        latencies: List[float] = []
+        pending = iter(range(calls))
+
+        async def caller() -> None:
+            for n in pending:
+                call_started = time.perf_counter()
+                await send_answer(None, n)
+                latencies.append(time.perf_counter() - call_started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*[caller() for _ in range(concurrency)])
+        seconds = time.perf_counter() - started
+        await async_http.close()
+    return summarize('request', latencies, seconds)
+
+
+@benchmark('get_token', {'strategy': 'access_key'}, {'strategy': 'session_token'})
+async def get_token(strategy: str, quick: bool = False) -> BenchmarkResult:
+    """
+    TokenStrategy.get_token while the token is valid, which every request and
+    every connection attempt pays. Latencies are per call, averaged over blocks.
+    The access key strategy's first call, the login, is reported as login_ms.
+    """
+    calls, block = (10000, 100) if quick else (1000000, 1000)
+    server = StandInServer(StandInConfig(event_rate=0))
+    with server.running_in_thread(), pointed_at(server):
+        extra = {}
+        if strategy == 'session_token':
+            get_app_config().XRVOYAGE_SESSION_TOKEN = server.issue_token()
+            token_strategy = _TemporaryTokenStrategy()
+        else:
+            token_strategy = _AccessAndSecretKeyTokenStrategy()
+        login_started = time.perf_counter()
+        token_strategy.get_token()
+        extra['login_ms'] = (time.perf_counter() - login_started) * 1000
+
+        get = token_strategy.get_token
+
+        def call_block() -> None:
+            for _ in range(block):
+                get()
+
+        block_latencies, seconds = time_calls(call_block, calls // block, warmup=1)
+    return summarize('call', [latency / block for latency in block_latencies], seconds, events=calls, **extra)
+
+
+@benchmark('ingress', {'handlers': 1}, {'handlers': 4}, {'handlers': 16})
+async def ingress(handlers: int, quick: bool = False) -> BenchmarkResult:
+    """
+    Sustained ingress through XrApiClient: a local stand-in sends frames of 10
+    events as fast as it can, and every event goes to each of the registered
+    handlers. Latency is from the stand-in building the frame to a handler
+    running, so it includes the websocket, decode, routing and dispatch queueing.
+    """
+    frames, events_per_frame = (50, 10) if quick else (5000, 10)
+    expected = frames * events_per_frame * handlers
+    server = StandInServer(StandInConfig(event_rate=0, event_types=[HANDLED_TYPE], events_per_frame=events_per_frame))
+    with server.running_in_thread(), pointed_at(server):
+        client = XrApiClient(SHIP_GUID)
+        latencies: List[float] = []
+        done = asyncio.Event()
+
+        for _ in range(handlers):
+            @client.decorators.eventIngress(HANDLED_TYPE)
+            async def on_geo(event: dict) -> None:
+                latencies.append(time.time() - event['args']['ts'])
+                if len(latencies) == expected:
+                    done.set()
+
+        async def blast() -> None:
+            for _ in range(frames):
+                await server.send(server.make_frame(SHIP_GUID), SHIP_GUID)
+
+        async with client:
+            started = time.perf_counter()
+            sent = asyncio.ensure_future(asyncio.to_thread(server.call, blast(), None))
+            await asyncio.wait_for(done.wait(), timeout=120)
+            seconds = time.perf_counter() - started
+            await sent
+    return summarize(
+        'event', latencies, seconds, events=frames * events_per_frame,
+        handler_calls_per_sec=expected / seconds,
+    )
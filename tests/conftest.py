@@ -0,0 +1,26 @@
+import pytest
+from xrvoyage.common.config import get_app_config
+from xrvoyage.testing import StandInConfig, StandInServer
+
+
+@pytest.fixture
+def standin_config():
+    return StandInConfig(event_rate=0)
+
+
+@pytest.fixture
+def standin(monkeypatch, standin_config):
+    """
+    A stand-in API on its own thread, with the client settings pointed at it
+    and logging in with an access key pair.
+    """
+    server = StandInServer(standin_config)
+    with server.running_in_thread():
+        settings = get_app_config()
+        for name, value in server.env().items():
+            monkeypatch.setattr(settings, name, value)
+        monkeypatch.setattr(settings, 'XRVOYAGE_ACCESS_KEY_ID', 'test-access-key')
+        monkeypatch.setattr(settings, 'XRVOYAGE_SECRET_ACCESS_KEY', 'test-secret-key')
+        monkeypatch.setattr(settings, 'XRVOYAGE_SESSION_TOKEN', None)
+        monkeypatch.setattr(settings, 'XRVOYAGE_TOKEN_CACHE_PATH', None)
+        yield server
@@ -0,0 +1,167 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import jwt
+import pytest
+from xrvoyage.handlers import auth
+from xrvoyage.handlers.token_cache import FileTokenCache
+
+
+def _jwt(lifetime: float) -> str:
+    return jwt.encode({'exp': int(time.time() + lifetime)}, 'test-signing-key-for-fake-tokens-0123456789', algorithm='HS256')
+
+
+class _Response:
+    ok = True
+
+    def __init__(self, access_lifetime: float):
+        self._data = {'access_token': _jwt(access_lifetime), 'refresh_token': _jwt(3600)}
+
+    def json(self):
+        return self._data
+
+
+@pytest.fixture
+def auth_calls(monkeypatch):
+    calls = []
+    lock = threading.Lock()
+
+    def fake_post(url, json):
+        time.sleep(0.05)
+        with lock:
+            calls.append(url.rsplit('/', 1)[-1])
+        # Tokens that are already inside the expiry leeway force a renewal on the next call
+        return _Response(access_lifetime=30 if len(calls) == 1 else 600)
+
+    monkeypatch.setattr(auth.requests, 'post', fake_post)
+    return calls
+
+
+def test_cached_expiry_skips_decoding(auth_calls, monkeypatch):
+    strategy = auth._AccessAndSecretKeyTokenStrategy()
+    strategy.get_token()
+    strategy.get_token()
+    assert auth_calls == ['login', 'refresh']
+
+    monkeypatch.setattr(auth.jwt, 'decode', lambda *a, **k: pytest.fail('token decoded on hot path'))
+    for _ in range(100):
+        strategy.get_token()
+    assert auth_calls == ['login', 'refresh']
+
+
+def test_concurrent_callers_share_one_refresh(auth_calls):
+    strategy = auth._AccessAndSecretKeyTokenStrategy()
+    strategy.get_token()
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        tokens = set(pool.map(lambda _: strategy.get_token(), range(32)))
+
+    assert auth_calls == ['login', 'refresh']
+    assert len(tokens) == 1
+    assert strategy.refreshes == 1
+
+
+@pytest.mark.asyncio
+async def test_background_refresher_renews_ahead_of_expiry(auth_calls):
+    strategy = auth._AccessAndSecretKeyTokenStrategy()
+    refresher = auth.TokenRefresher(
+        strategy, auth.TokenRefreshConfig(lead_seconds=590, max_lead_fraction=1.0, min_interval=0.01)
+    )
+    refresher.start()
+    # First round logs in; its 30s token is already inside the lead time, so it is renewed right away
+    for _ in range(100):
+        if refresher.refreshes >= 2:
+            break
+        await asyncio.sleep(0.01)
+    await refresher.stop()
+
+    assert auth_calls[:2] == ['login', 'refresh']
+    stats = refresher.stats()
+    assert stats['failures'] == 0
+    assert stats['last_latency'] >= 0.05
+    assert strategy._access_token_valid()
+
+
+@pytest.mark.asyncio
+async def test_short_lived_tokens_are_renewed_partway_through_their_lifetime(monkeypatch):
+    calls = []
+
+    def fake_post(url, json):
+        calls.append(url.rsplit('/', 1)[-1])
+        return _Response(access_lifetime=200)
+
+    monkeypatch.setattr(auth.requests, 'post', fake_post)
+    strategy = auth._AccessAndSecretKeyTokenStrategy()
+    refresher = auth.TokenRefresher(strategy, auth.TokenRefreshConfig(min_interval=0.01))
+    refresher.start()
+    await asyncio.sleep(0.3)
+
+    # The 120s lead is longer than the token lives, so half its lifetime is used instead
+    assert calls == ['login']
+    assert refresher._next_delay() == pytest.approx(100, abs=1)
+    await refresher.stop()
+
+
+def test_tokens_first_seen_late_are_renewed_before_the_request_leeway():
+    class _TakenOverToken(auth.TokenStrategy):
+        # E.g. a token from the file cache with 100s of a longer lifetime left
+        def __init__(self):
+            self._expires_at = time.time() + 100
+
+        def get_token(self):
+            return 'token'
+
+        def expires_at(self):
+            return self._expires_at
+
+    refresher = auth.TokenRefresher(_TakenOverToken())
+
+    # Half the 100s seen would renew inside get_token's 60s leeway, so 65s is used
+    assert refresher._next_delay() == pytest.approx(35, abs=1)
+
+
+@pytest.mark.asyncio
+async def test_refresher_skips_strategies_that_cannot_refresh():
+    refresher = auth.TokenRefresher(auth._TemporaryTokenStrategy())
+    refresher.start()
+    assert refresher._task is None
+
+
+def test_file_cache_shares_tokens_between_strategies(auth_calls, tmp_path, monkeypatch):
+    monkeypatch.setattr(auth.get_app_config(), 'XRVOYAGE_ACCESS_KEY_ID', 'AKID')
+    cache_path = tmp_path / 'cache' / 'tokens.json'
+
+    first = auth._AccessAndSecretKeyTokenStrategy(FileTokenCache(str(cache_path)))
+    first.get_token()
+    first.get_token()
+    assert auth_calls == ['login', 'refresh']
+
+    second = auth._AccessAndSecretKeyTokenStrategy(FileTokenCache(str(cache_path)))
+    assert second.get_token() == first.get_token()
+    assert auth_calls == ['login', 'refresh']
+    assert second.logins == 0
+    assert os.stat(cache_path).st_mode & 0o777 == 0o600
+
+
+@pytest.mark.asyncio
+async def test_async_renewal_leaves_the_event_loop_free(auth_calls):
+    strategy = auth._AccessAndSecretKeyTokenStrategy()
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.005)
+
+    ticking = asyncio.create_task(ticker())
+    token = await strategy.get_token_async()
+    ticking.cancel()
+
+    # The 50ms login ran in a thread while the loop kept ticking
+    assert auth_calls == ['login']
+    assert ticks >= 3
+    assert token == strategy._access_token
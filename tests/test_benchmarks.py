@@ -0,0 +1,49 @@
+from benchmarks import suite  # noqa: F401  registers the benchmarks
+from benchmarks.harness import BenchmarkReport, cases, compare, load, percentile, run, save, summarize
+
+
+def test_percentile_uses_nearest_rank():
+    values = [n / 1000 for n in range(1, 101)]
+
+    assert percentile(values, 0.99) == 0.099
+    assert percentile(values, 0.50) == 0.050
+    assert percentile([], 0.99) == 0.0
+
+
+def test_quick_run_round_trips_through_json(tmp_path):
+    report = run(['decode_route', 'batch_serialize[events=10]', 'egress[concurrency=1]'], quick=True)
+
+    assert sorted(report.results) == [
+        'batch_serialize[events=10]',
+        'decode_route[events_per_frame=10]',
+        'decode_route[events_per_frame=1]',
+        'egress[concurrency=1]',
+    ]
+    assert report.results['decode_route[events_per_frame=10]'].events == 2000
+    assert report.results['egress[concurrency=1]'].operations == 40
+    assert all(result.events_per_sec > 0 and result.p99_ms > 0 for result in report.results.values())
+
+    path = tmp_path / 'results.json'
+    save(report, str(path))
+    assert load(str(path)) == report
+
+
+def test_compare_flags_throughput_drops_and_p99_rises():
+    def report(events_per_sec, p99):
+        result = summarize('frame', [p99 / 1000] * 100, 100 / events_per_sec)
+        return BenchmarkReport(
+            xrvoyage_version='0.0.0', python='3.11', implementation='CPython', platform='test',
+            codec='json', created_utc='2026-01-01T00:00:00+00:00', quick=False, results={'case': result},
+        )
+
+    assert compare(report(1000, 1.0), report(950, 1.2)) == []
+
+    regressions = compare(report(1000, 1.0), report(800, 2.0))
+    assert [(r.metric, round(r.change, 2)) for r in regressions] == [('events_per_sec', -0.2), ('p99_ms', 1.0)]
+
+
+def test_every_case_has_a_unique_key():
+    keys = [case.key for case in cases()]
+
+    assert len(keys) == len(set(keys))
+    assert {key.split('[')[0] for key in keys} == {'decode_route', 'batch_serialize', 'egress', 'get_token', 'ingress'}
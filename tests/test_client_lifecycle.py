@@ -0,0 +1,150 @@
+import asyncio
+import json
+import os
+import signal
+import socket
+import time
+
+import jwt
+import pytest
+import pytest_asyncio
+import websockets
+from xrvoyage import XrApiClient
+from xrvoyage.common.config import get_app_config
+from xrvoyage.common.metrics import MetricsConfig, configure_metrics
+from xrvoyage.handlers.recording import RecordingConfig, read_recording
+
+
+@pytest.fixture
+def session_token(monkeypatch):
+    token = jwt.encode({'exp': int(time.time() + 3600)}, 'test-signing-key-for-fake-tokens-0123456789', algorithm='HS256')
+    settings = get_app_config()
+    monkeypatch.setattr(settings, 'XRVOYAGE_SESSION_TOKEN', token)
+    monkeypatch.setattr(settings, 'XRVOYAGE_ACCESS_KEY_ID', None)
+    monkeypatch.setattr(settings, 'XRVOYAGE_SECRET_ACCESS_KEY', None)
+
+
+@pytest_asyncio.fixture
+async def ship_server(monkeypatch):
+    async def server_handler(websocket):
+        await websocket.send(json.dumps({'xr.data': [{'type': 'xr.data.slow', 'args': {}}]}))
+        await websocket.wait_closed()
+
+    async with websockets.serve(server_handler, '127.0.0.1', 0) as server:
+        port = server.sockets[0].getsockname()[1]
+        monkeypatch.setattr(get_app_config(), 'XRVOYAGE_WEBSOCKETS_BASE_URL', f'ws://127.0.0.1:{port}')
+        yield
+
+
+@pytest.mark.asyncio
+async def test_shutdown_drains_in_flight_handlers(session_token, ship_server):
+    xr = XrApiClient('SHIP')
+    started = asyncio.Event()
+    finished = []
+
+    @xr.decorators.eventIngress('xr.data.slow')
+    async def slow_handler(event):
+        started.set()
+        await asyncio.sleep(0.1)
+        finished.append(event['type'])
+
+    connect = asyncio.create_task(xr.connect())
+    await asyncio.wait_for(started.wait(), timeout=5)
+
+    shutdown_at = time.monotonic()
+    xr.shutdown()
+    await asyncio.wait_for(connect, timeout=5)
+
+    assert finished == ['xr.data.slow']
+    # Returns as soon as the handler is done rather than on a polling tick
+    assert time.monotonic() - shutdown_at < 0.5
+    assert not xr.wss.running
+
+
+@pytest.fixture
+def unreachable_ship(monkeypatch):
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    monkeypatch.setattr(get_app_config(), 'XRVOYAGE_WEBSOCKETS_BASE_URL', f'ws://127.0.0.1:{port}')
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('stop', ['shutdown', 'sigint'])
+async def test_shutdown_while_the_first_connection_keeps_failing(session_token, unreachable_ship, stop):
+    xr = XrApiClient('SHIP')
+    connect = asyncio.create_task(xr.connect())
+    while xr.wss.ship_guids == [] or xr.wss._connections['SHIP'].reconnect_attempts < 1:
+        await asyncio.sleep(0.01)
+
+    if stop == 'sigint':
+        os.kill(os.getpid(), signal.SIGINT)
+    else:
+        xr.shutdown()
+    await asyncio.wait_for(connect, timeout=2)
+
+    assert not xr.wss.running
+    assert len(xr._tasks) == 0
+
+
+@pytest.mark.asyncio
+async def test_drain_deadline_cancels_stuck_handlers(session_token, ship_server, tmp_path):
+    path = str(tmp_path / 'session.xrrec')
+    xr = XrApiClient('SHIP', drain_timeout=0.1, recording=RecordingConfig(path=path, flush_interval=60))
+    started = asyncio.Event()
+
+    @xr.decorators.eventIngress('xr.data.slow')
+    async def stuck_handler(event):
+        started.set()
+        await asyncio.sleep(60)
+
+    connect = asyncio.create_task(xr.connect())
+    await asyncio.wait_for(started.wait(), timeout=5)
+    xr.shutdown()
+    await asyncio.wait_for(connect, timeout=5)
+
+    assert xr.last_drain_seconds < 1
+    assert not xr.wss.dispatcher.running
+    # The recording is closed even though the deadline cut the drain short
+    assert [frame.ship_guid for frame in read_recording(path)] == ['SHIP']
+
+
+@pytest.mark.asyncio
+async def test_async_with_leaves_no_tasks_behind(session_token, ship_server, monkeypatch):
+    closed = []
+    async with XrApiClient('SHIP') as xr:
+        monkeypatch.setattr(xr.http._session, 'close', lambda: closed.append('requests'))
+        assert xr.wss.running
+        assert len(xr._tasks) > 0
+        assert xr.startup_seconds is not None
+
+    assert len(xr._tasks) == 0
+    assert not xr.wss.running
+    assert not xr.wss.dispatcher.running
+    assert xr.teardown_seconds is not None
+    assert closed == ['requests']
+    assert xr.async_http._session is None
+
+
+@pytest.mark.asyncio
+async def test_metrics_cover_ingress_and_dispatch(session_token, ship_server):
+    handled = asyncio.Event()
+    try:
+        xr = XrApiClient('SHIP', metrics=MetricsConfig())
+
+        @xr.decorators.eventIngress('xr.data.slow')
+        async def handler(event):
+            handled.set()
+
+        async with xr:
+            await asyncio.wait_for(handled.wait(), timeout=5)
+
+        snapshot = xr.metrics.snapshot()
+        assert snapshot['counters']['xrvoyage_frames_received_total'] == [{'labels': {'ship': 'SHIP'}, 'value': 1.0}]
+        assert snapshot['histograms']['xrvoyage_decode_seconds'][0]['count'] == 1
+        handler_seconds = snapshot['histograms']['xrvoyage_handler_seconds'][0]
+        assert handler_seconds['labels'] == {'event_type': 'xr.data.slow'}
+        assert handler_seconds['count'] == 1
+        assert 'xrvoyage_dispatch_queue_depth' in snapshot['gauges']
+    finally:
+        configure_metrics(MetricsConfig(enabled=False))
@@ -1,12 +1,10 @@
 import json
-import os
+
 import pytest
-from dotenv import load_dotenv
-from xrvoyage.handlers.auth import TokenStrategy
+from xrvoyage.entities.data_webhook import DataWebhookHandler
+from xrvoyage.handlers.auth import get_token_strategy
 from xrvoyage.models.data import DataWebhookEvent
-from xrvoyage.handlers.data_handler import DataHandler
 
-load_dotenv()
 
 @pytest.fixture
 def test_payload():
@@ -25,7 +23,7 @@ def test_payload():
 
 @pytest.fixture
 def webhook_id():
-    return os.getenv('WEBHOOK_ID')
+    return "6AstZDlkNGJV4XCzFHqCzsSEV79ayTcLS2ju87ViCTYKvUe99K3rSRa2eVUQfGyY"
 
 def test_parse_payload(test_payload):
     data = json.loads(test_payload)
@@ -37,26 +35,20 @@ def test_parse_payload(test_payload):
     assert project_guid == "A3689E3BAA2B40389099DC91BCE30DF8"
     assert args["key2"] == "Hello World"
 
-@pytest.mark.dependency(depends=['websocket_test'])
-def test_post_webhook(monkeypatch, test_payload, webhook_id):
-    monkeypatch.setenv('XRVOYAGE_ACCESS_KEY_ID', os.getenv('XRVOYAGE_ACCESS_KEY_ID'))
-    monkeypatch.setenv('XRVOYAGE_SECRET_ACCESS_KEY', os.getenv('XRVOYAGE_SECRET_ACCESS_KEY'))
-
+def test_post_webhook(standin, test_payload, webhook_id):
     data = json.loads(test_payload)
     event_type = data.get('type')
     project_guid = data.get('project_guid')
     args = data.get('args', {})
 
-    token_strategy = TokenStrategy()
-    data_handler = DataHandler(token_strategy)
+    data_handler = DataWebhookHandler(get_token_strategy())
     webhook_event = DataWebhookEvent(type=event_type, project_guid=project_guid, args=args)
 
-    # Mock the post_webook method to avoid making a real HTTP request
-    def mock_post_webook(self, webhook_id, event):
-        assert webhook_id == "6AstZDlkNGJV4XCzFHqCzsSEV79ayTcLS2ju87ViCTYKvUe99K3rSRa2eVUQfGyY"
-        assert event.type == event_type
-        assert event.project_guid == project_guid
-        assert event.args["key2"] == "Hello World"
+    assert data_handler.post_webhook(webhook_id, webhook_event) == {'message': 'success'}
 
-    monkeypatch.setattr(DataHandler, "post_webook", mock_post_webook)
-    data_handler.post_webook(webhook_id, webhook_event)
+    assert standin.logins == 1
+    ((received_id, event),) = standin.data_webhooks
+    assert received_id == webhook_id
+    assert event['type'] == event_type
+    assert event['project_guid'] == project_guid
+    assert event['args']['key2'] == "Hello World"
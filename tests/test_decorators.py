@@ -0,0 +1,61 @@
+import pytest
+from xrvoyage.handlers.decorators import DecoratorsHandlers
+from xrvoyage.models.events import ClientInfo, XRWebhookEvent
+
+EVENT = {
+    'type': 'xr.rt.status.ship.geo',
+    'args': {'lat': 1.5},
+    'client': {'session': 'abc', 'timestamp_utc': '2024-01-01T00:00:00Z'},
+}
+
+
+@pytest.fixture
+def decorators():
+    return DecoratorsHandlers(webhooks_xrweb=None, project_guid='PROJECT')
+
+
+def test_untyped_handler_receives_dict(decorators):
+    received = []
+
+    @decorators.eventIngress('xr.rt.status.ship.geo')
+    def handler(event: dict):
+        received.append(event)
+
+    decorators.router.resolve('xr.rt.status.ship.geo')[0](dict(EVENT))
+    assert received == [EVENT]
+
+
+def test_annotated_handler_receives_trusted_model(decorators):
+    received = []
+
+    @decorators.eventIngress('xr.rt.status.*')
+    def handler(event: XRWebhookEvent):
+        received.append(event)
+
+    decorators.router.resolve('xr.rt.status.ship.geo')[0](dict(EVENT))
+    event = received[0]
+    assert isinstance(event, XRWebhookEvent)
+    assert isinstance(event.client, ClientInfo)
+    assert event.args == {'lat': 1.5}
+
+
+@pytest.mark.asyncio
+async def test_validated_async_handler(decorators):
+    received = []
+
+    @decorators.eventIngress('xr.rt.status.ship.geo', model=XRWebhookEvent, validate=True)
+    async def handler(event):
+        received.append(event)
+
+    await decorators.router.resolve('xr.rt.status.ship.geo')[0]({'type': 'xr.rt.status.ship.geo', 'args': None})
+    assert received[0].type == 'xr.rt.status.ship.geo'
+
+    with pytest.raises(Exception):
+        await decorators.router.resolve('xr.rt.status.ship.geo')[0]({'args': {}})
+
+
+def test_egress_to_an_unknown_channel_is_rejected(decorators):
+    with pytest.raises(ValueError):
+        @decorators.eventEgress('xr.foo.test', channel='xr.foo')
+        async def produce(self):
+            return {'args': {}}
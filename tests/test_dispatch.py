@@ -0,0 +1,84 @@
+import asyncio
+import threading
+
+import pytest
+from xrvoyage.handlers.dispatch import DispatchConfig, EventDispatcher
+
+
+@pytest.mark.asyncio
+async def test_workers_run_async_and_sync_handlers():
+    seen = []
+
+    async def async_handler(event):
+        seen.append(('async', event['n']))
+
+    def sync_handler(event):
+        seen.append(('sync', event['n']))
+
+    dispatcher = EventDispatcher(DispatchConfig(workers=2))
+    dispatcher.start()
+    await dispatcher.put('xr.data.a', async_handler, {'n': 1})
+    await dispatcher.put('xr.data.b', sync_handler, {'n': 2})
+    await dispatcher.stop()
+
+    assert sorted(seen) == [('async', 1), ('sync', 2)]
+    assert dispatcher.stats()['processed'] == 2
+
+
+@pytest.mark.asyncio
+async def test_sync_handlers_run_off_loop_with_thread_pool():
+    threads = []
+
+    def sync_handler(event):
+        threads.append(threading.current_thread().name)
+
+    dispatcher = EventDispatcher(DispatchConfig(sync_executor='thread', sync_pool_size=2))
+    dispatcher.start()
+    await dispatcher.put('xr.data.a', sync_handler, {})
+    await dispatcher.stop()
+
+    assert threads and threads[0].startswith('xrvoyage-dispatch')
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('overflow,expected,counter', [
+    ('drop_newest', [0, 1], 'dropped_newest'),
+    ('drop_oldest', [2, 3], 'dropped_oldest'),
+])
+async def test_overflow_policies(overflow, expected, counter):
+    seen = []
+
+    async def handler(event):
+        seen.append(event['n'])
+
+    dispatcher = EventDispatcher(DispatchConfig(queue_size=2, workers=1, overflow=overflow))
+    dispatcher.start()
+    # Non-blocking puts never yield, so the worker cannot drain in between.
+    for n in range(4):
+        await dispatcher.put('xr.data.a', handler, {'n': n})
+    await dispatcher.stop()
+
+    assert seen == expected
+    assert dispatcher.stats()[counter] == 2
+
+
+@pytest.mark.asyncio
+async def test_block_policy_waits_for_room():
+    release = asyncio.Event()
+
+    async def handler(event):
+        await release.wait()
+
+    dispatcher = EventDispatcher(DispatchConfig(queue_size=1, workers=1, overflow='block'))
+    dispatcher.start()
+    await dispatcher.put('xr.data.a', handler, {})
+    await asyncio.sleep(0)
+    await dispatcher.put('xr.data.a', handler, {})
+    blocked_put = asyncio.create_task(dispatcher.put('xr.data.a', handler, {}))
+    await asyncio.sleep(0.01)
+    assert not blocked_put.done()
+
+    release.set()
+    assert await blocked_put
+    await dispatcher.stop()
+    assert dispatcher.stats()['blocked'] == 1
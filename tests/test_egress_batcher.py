@@ -0,0 +1,93 @@
+import asyncio
+import json
+
+import pytest
+from xrvoyage.common.codec import get_codec
+from xrvoyage.handlers.batcher import EgressBatchConfig, EgressBatcher
+from xrvoyage.handlers.http import _encode_json
+from xrvoyage.models.events import ClientInfo, XRWebhookEvent, XRWebhookEventBatch
+
+
+class _RecordingWebhooks:
+    def __init__(self, fail: bool = False):
+        self.batches = []
+        self.fail = fail
+
+    async def post_event_as_batch_async(self, event_batch):
+        self.batches.append(event_batch)
+        if self.fail:
+            raise RuntimeError('api down')
+        return {'message': 'success'}
+
+
+def _event(n: int, event_type: str = 'xr.data.test') -> XRWebhookEvent:
+    return XRWebhookEvent(type=event_type, args={'n': n})
+
+
+@pytest.mark.asyncio
+async def test_events_within_linger_window_share_one_post():
+    webhooks = _RecordingWebhooks()
+    batcher = EgressBatcher(webhooks, EgressBatchConfig(max_events=100, max_linger_ms=10))
+
+    results = await asyncio.gather(
+        batcher.submit('xr.data', _event(1)),
+        batcher.submit('xr.rt', _event(2, 'xr.rt.status.ship.geo')),
+        batcher.submit('xr.data', _event(3)),
+    )
+
+    assert results == [{'message': 'success'}] * 3
+    assert len(webhooks.batches) == 1
+    batch = json.loads(webhooks.batches[0])
+    assert [e['args']['n'] for e in batch['xr.data']] == [1, 3]
+    assert [e['args']['n'] for e in batch['xr.rt']] == [2]
+
+
+@pytest.mark.asyncio
+async def test_max_events_splits_batches():
+    webhooks = _RecordingWebhooks()
+    batcher = EgressBatcher(webhooks, EgressBatchConfig(max_events=2, max_linger_ms=1000))
+
+    await asyncio.gather(*[batcher.submit('xr.data', _event(n)) for n in range(4)])
+
+    assert [len(json.loads(b)['xr.data']) for b in webhooks.batches] == [2, 2]
+    assert batcher.stats()['events_per_batch'] == 2
+
+
+@pytest.mark.asyncio
+async def test_batch_body_matches_the_serialized_model():
+    webhooks = _RecordingWebhooks()
+    batcher = EgressBatcher(webhooks, EgressBatchConfig(max_linger_ms=1))
+    events = [
+        ('xr.nrt', XRWebhookEvent(type='xr.nrt.log', args={'text': 'caf\u00e9 "quoted"'}, ship_guid='SHIP')),
+        ('xr.data', XRWebhookEvent(type='xr.data.test', client=ClientInfo(session='s', timestamp_utc='t'))),
+        ('xr.nrt', _event(3, 'xr.nrt.log')),
+    ]
+
+    await asyncio.gather(*[batcher.submit(channel, event) for channel, event in events])
+
+    expected = XRWebhookEventBatch(**{
+        'xr.data': [events[1][1]],
+        'xr.nrt': [events[0][1], events[2][1]],
+    })
+    assert webhooks.batches == [_encode_json(get_codec(), expected)]
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_fails_every_caller():
+    batcher = EgressBatcher(_RecordingWebhooks(fail=True), EgressBatchConfig(max_linger_ms=1))
+
+    results = await asyncio.gather(
+        batcher.submit('xr.data', _event(1)),
+        batcher.submit('xr.data', _event(2)),
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert batcher.stats()['batches_failed'] == 1
+
+
+@pytest.mark.asyncio
+async def test_unknown_channel_is_rejected():
+    batcher = EgressBatcher(_RecordingWebhooks())
+    with pytest.raises(ValueError):
+        await batcher.submit('xr.unknown', _event(1))
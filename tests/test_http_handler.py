@@ -0,0 +1,285 @@
+import asyncio
+import gzip
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import aiohttp
+import pytest
+import requests
+from xrvoyage.handlers.auth import TokenStrategy
+from xrvoyage.common.exceptions import ApiError
+from xrvoyage.handlers.http import AsyncHttpHandler, CompressionConfig, HttpHandler, HttpPoolConfig
+from xrvoyage.handlers.retry import RetryPolicy
+from xrvoyage.models.events import XRWebhookEvent, XRWebhookEventBatch
+
+
+class _StaticToken(TokenStrategy):
+    def get_token(self):
+        return 'token'
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """
+    Keep-alive request handler for the local test servers. Subclasses keep what
+    they saw in class attributes, which reset() restores before every test.
+    """
+    protocol_version = 'HTTP/1.1'
+
+    @classmethod
+    def reset(cls) -> None:
+        pass
+
+    def reply(self, status: int, body: bytes, headers: dict | None = None) -> None:
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def serve():
+    """
+    Starts a local HTTP server for a handler class and returns its base URL.
+    """
+    servers = []
+
+    def start(handler: type[_Handler]) -> str:
+        handler.reset()
+        server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f'http://127.0.0.1:{server.server_address[1]}'
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+class _EchoHandler(_Handler):
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        self.rfile.read(length)
+        self.reply(200, json.dumps({'message': 'success'}).encode())
+
+
+def test_pool_reuses_connections(serve):
+    url = serve(_EchoHandler)
+    http = HttpHandler(_StaticToken(), pool=HttpPoolConfig(pool_maxsize=2))
+    for _ in range(5):
+        assert http.post(f'{url}/webhooks/xrweb', json={'xr.data': []}) == {'message': 'success'}
+
+    stats = http.pool_stats()
+    assert stats['requests'] == 5
+    assert stats['connections_opened'] == 1
+    assert stats['connections_reused'] == 4
+    assert stats['reuse_ratio'] == pytest.approx(0.8)
+    http.close()
+
+
+@pytest.mark.asyncio
+async def test_async_handler_runs_concurrent_requests(serve):
+    url = serve(_EchoHandler)
+    http = AsyncHttpHandler(_StaticToken())
+    responses = await asyncio.gather(*[
+        http.post(f'{url}/webhooks/xrweb', json={'xr.data': []}) for _ in range(20)
+    ])
+    assert responses == [{'message': 'success'}] * 20
+
+    stats = http.pool_stats()
+    assert stats['requests'] == 20
+    assert stats['connections_opened'] + stats['connections_reused'] == 20
+    await http.close()
+
+
+class _FlakyHandler(_Handler):
+    failures = 0
+    keys = []
+
+    @classmethod
+    def reset(cls) -> None:
+        cls.failures = 0
+        cls.keys = []
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        self.rfile.read(length)
+        type(self).keys.append(self.headers.get('Idempotency-Key'))
+        if type(self).failures > 0:
+            type(self).failures -= 1
+            status, body = 503, b'{"message": "unavailable"}'
+        else:
+            status, body = 200, b'{"message": "success"}'
+        self.reply(status, body, {'Retry-After': '0'} if status == 503 else None)
+
+
+def test_retries_keep_the_idempotency_key(serve):
+    url = serve(_FlakyHandler)
+    _FlakyHandler.failures = 2
+    http = HttpHandler(_StaticToken(), retry=RetryPolicy(max_attempts=3))
+
+    assert http.post(f'{url}/webhooks/xrweb', json={}, idempotency_key='abc') == {'message': 'success'}
+    assert _FlakyHandler.keys == ['abc'] * 3
+    stats = http.retry_stats()
+    assert stats['retries'] == 2
+    assert stats['retried_successes'] == 1
+    assert stats['first_try_successes'] == 0
+    http.close()
+
+
+def test_post_without_idempotency_key_is_not_retried(serve):
+    url = serve(_FlakyHandler)
+    _FlakyHandler.failures = 1
+    http = HttpHandler(_StaticToken(), retry=RetryPolicy(max_attempts=3))
+
+    with pytest.raises(ApiError) as excinfo:
+        http.post(f'{url}/webhooks/xrweb', json={})
+    assert excinfo.value.status_code == 503
+    assert excinfo.value.retry_after == 0
+    assert len(_FlakyHandler.keys) == 1
+    http.close()
+
+
+@pytest.mark.asyncio
+async def test_async_retries_stop_when_the_budget_is_spent(serve):
+    url = serve(_FlakyHandler)
+    _FlakyHandler.failures = 100
+    http = AsyncHttpHandler(_StaticToken(), retry=RetryPolicy(max_attempts=5, budget_burst=2))
+
+    with pytest.raises(ApiError):
+        await http.post(f'{url}/webhooks/xrweb', json={}, idempotency_key='abc')
+    # One attempt plus the two retries the budget allows
+    assert len(_FlakyHandler.keys) == 3
+    assert http.retry_stats()['budget_exhausted'] == 1
+    await http.close()
+
+
+class _DroppingHandler(_Handler):
+    """
+    Reads a request and then drops the connection without answering, as a
+    server closing an idle keep-alive connection mid-request would.
+    """
+    drops = 0
+    keys = []
+
+    @classmethod
+    def reset(cls) -> None:
+        cls.drops = 1
+        cls.keys = []
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        self.rfile.read(length)
+        type(self).keys.append(self.headers.get('Idempotency-Key'))
+        if type(self).drops > 0:
+            type(self).drops -= 1
+            self.close_connection = True
+            return
+        self.reply(200, b'{"message": "success"}')
+
+
+def test_dropped_post_is_only_resent_with_an_idempotency_key(serve):
+    url = serve(_DroppingHandler)
+    http = HttpHandler(_StaticToken())
+
+    with pytest.raises(requests.ConnectionError):
+        http.post(f'{url}/webhooks/xrweb', json={})
+    assert _DroppingHandler.keys == [None]
+
+    _DroppingHandler.drops = 1
+    assert http.post(f'{url}/webhooks/xrweb', json={}, idempotency_key='abc') == {'message': 'success'}
+    assert _DroppingHandler.keys == [None, 'abc', 'abc']
+    http.close()
+
+
+@pytest.mark.asyncio
+async def test_async_dropped_post_is_only_resent_with_an_idempotency_key(serve):
+    url = serve(_DroppingHandler)
+    http = AsyncHttpHandler(_StaticToken())
+
+    with pytest.raises(aiohttp.ServerDisconnectedError):
+        await http.post(f'{url}/webhooks/xrweb', json={})
+    assert _DroppingHandler.keys == [None]
+
+    _DroppingHandler.drops = 1
+    assert await http.post(f'{url}/webhooks/xrweb', json={}, idempotency_key='abc') == {'message': 'success'}
+    assert _DroppingHandler.keys == [None, 'abc', 'abc']
+    await http.close()
+
+
+class _EncodingHandler(_Handler):
+    accept_gzip = True
+    received = []
+    bodies = []
+
+    @classmethod
+    def reset(cls) -> None:
+        cls.accept_gzip = True
+        cls.received = []
+        cls.bodies = []
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        encoding = self.headers.get('Content-Encoding')
+        type(self).received.append((encoding, len(body)))
+        if encoding == 'gzip' and not type(self).accept_gzip:
+            status, reply = 415, b'{"message": "unsupported encoding"}'
+        else:
+            if encoding == 'gzip':
+                body = gzip.decompress(body)
+            type(self).bodies.append(body)
+            json.loads(body)
+            status, reply = 200, b'{"message": "success"}'
+        self.reply(status, reply)
+
+
+_STORY = {'xr.data': [{'type': 'xr.data.vr-quiz-data', 'args': {'story': 'Once upon a time ' * 200}}]}
+
+
+def test_large_bodies_are_gzipped_and_small_ones_are_not(serve):
+    url = serve(_EncodingHandler)
+    http = HttpHandler(_StaticToken(), compression=CompressionConfig(min_bytes=512))
+
+    http.post(f'{url}/webhooks/xrweb', json={'xr.data': []})
+    http.post(f'{url}/webhooks/xrweb', json=_STORY)
+
+    (small_encoding, _), (large_encoding, large_size) = _EncodingHandler.received
+    assert small_encoding is None
+    assert large_encoding == 'gzip'
+    assert large_size < len(json.dumps(_STORY)) / 10
+    assert http.compression_stats()['bodies_compressed'] == 1
+    http.close()
+
+
+@pytest.mark.asyncio
+async def test_unsupported_encoding_falls_back_to_plain_bodies(serve):
+    url = serve(_EncodingHandler)
+    _EncodingHandler.accept_gzip = False
+    http = AsyncHttpHandler(_StaticToken(), compression=CompressionConfig(min_bytes=512))
+
+    assert await http.post(f'{url}/webhooks/xrweb', json=_STORY) == {'message': 'success'}
+    assert await http.post(f'{url}/webhooks/xrweb', json=_STORY) == {'message': 'success'}
+
+    assert [encoding for encoding, _ in _EncodingHandler.received] == ['gzip', None, None]
+    assert [json.loads(body) for body in _EncodingHandler.bodies] == [_STORY, _STORY]
+    assert http.compression_stats()['fallbacks'] == 1
+    await http.close()
+
+
+def test_models_are_serialized_once_with_aliases_and_without_nulls(serve, monkeypatch):
+    url = serve(_EncodingHandler)
+    batch = XRWebhookEventBatch(**{'xr.data': [XRWebhookEvent(type='xr.data.test', args={'n': 1})]})
+    monkeypatch.setattr(XRWebhookEventBatch, 'model_dump', lambda *a, **k: pytest.fail('dumped to a dict'))
+    http = HttpHandler(_StaticToken())
+
+    http.post(f'{url}/webhooks/xrweb', json=batch)
+
+    assert _EncodingHandler.bodies == [b'{"xr.rt":[],"xr.data":[{"type":"xr.data.test","args":{"n":1}}],"xr.nrt":[]}']
+    http.close()
@@ -0,0 +1,129 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from xrvoyage.handlers import limits
+from xrvoyage.handlers.limits import EgressLimiter, EgressLimitsConfig, RateLimit
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_spaces_requests_after_the_burst():
+    limiter = EgressLimiter(EgressLimitsConfig(endpoints={'xrweb': RateLimit(rate=50, burst=2)}))
+    sent = []
+
+    async def send():
+        async with limiter.acquire_async('xrweb'):
+            sent.append(time.monotonic())
+
+    started = time.monotonic()
+    await asyncio.gather(*[send() for _ in range(6)])
+
+    # Two go out at once, the other four are paced at 20ms
+    assert sent[-1] - started == pytest.approx(0.08, abs=0.04)
+    stats = limiter.stats()['xrweb']
+    assert stats['requests'] == 6
+    assert stats['delayed'] == 4
+    assert stats['max_wait_seconds'] > 0.05
+
+
+@pytest.mark.asyncio
+async def test_max_in_flight_caps_concurrency():
+    limiter = EgressLimiter(EgressLimitsConfig(default=RateLimit(max_in_flight=2)))
+    in_flight = []
+
+    async def send():
+        async with limiter.acquire_async('data_webhook'):
+            in_flight.append(limiter.stats()['data_webhook']['in_flight'])
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*[send() for _ in range(6)])
+    assert max(in_flight) == 2
+
+
+def test_sync_and_unlimited_endpoints():
+    limiter = EgressLimiter(EgressLimitsConfig(endpoints={'xrweb': RateLimit(max_in_flight=1)}))
+    overlap = []
+    active = []
+
+    def send():
+        with limiter.acquire('xrweb'):
+            active.append(1)
+            overlap.append(len(active))
+            time.sleep(0.01)
+            active.pop()
+
+    threads = [threading.Thread(target=send) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert max(overlap) == 1
+    with limiter.acquire('data_webhook'):
+        pass
+    assert 'data_webhook' not in limiter.stats()
+
+
+@pytest.mark.asyncio
+async def test_blocking_and_async_callers_share_max_in_flight():
+    limiter = EgressLimiter(EgressLimitsConfig(default=RateLimit(max_in_flight=1)))
+    holding = threading.Event()
+    leave = threading.Event()
+
+    def blocking_send():
+        with limiter.acquire('xrweb'):
+            holding.set()
+            leave.wait(5)
+
+    thread = threading.Thread(target=blocking_send)
+    thread.start()
+    await asyncio.to_thread(holding.wait, 5)
+
+    async def send():
+        async with limiter.acquire_async('xrweb'):
+            pass
+
+    cancelled = asyncio.create_task(send())
+    sent = asyncio.create_task(send())
+    await asyncio.sleep(0.05)
+    assert not sent.done()
+    assert limiter.stats()['xrweb']['waiting'] == 2
+    cancelled.cancel()
+
+    leave.set()
+    await asyncio.wait_for(sent, 5)
+    await asyncio.to_thread(thread.join)
+    assert cancelled.cancelled()
+    assert limiter.stats()['xrweb']['waiting'] == 0
+    # No slot leaked to the cancelled waiter
+    with limiter.acquire('xrweb'):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_callers_abandoning_the_rate_limit_wait_are_not_left_waiting(monkeypatch):
+    limiter = EgressLimiter(EgressLimitsConfig(default=RateLimit(rate=1, burst=1, max_in_flight=2)))
+
+    async def send():
+        async with limiter.acquire_async('xrweb'):
+            pass
+
+    await send()
+    paced = asyncio.create_task(send())
+    await asyncio.sleep(0.05)
+    assert limiter.stats()['xrweb']['waiting'] == 1
+    paced.cancel()
+    await asyncio.gather(paced, return_exceptions=True)
+
+    def interrupted_sleep(seconds):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(limits.time, 'sleep', interrupted_sleep)
+    with pytest.raises(KeyboardInterrupt):
+        with limiter.acquire('xrweb'):
+            pass
+    monkeypatch.undo()
+
+    stats = limiter.stats()['xrweb']
+    assert (stats['waiting'], stats['in_flight']) == (0, 0)
@@ -0,0 +1,34 @@
+import logging
+
+from xrvoyage.common.log import LogConfig, PayloadLogger
+
+
+class _ExplodingPayload:
+    def __str__(self):
+        raise AssertionError('payload was rendered')
+
+
+def test_filtered_level_never_renders_payload():
+    logger = logging.getLogger('xrvoyage-test-filtered')
+    logger.setLevel(logging.WARNING)
+    payload_logger = PayloadLogger(logger=logger)
+
+    assert not payload_logger.should_log(logging.INFO, 'ingress')
+    logger.info('Received event: %s', payload_logger.payload(_ExplodingPayload()))
+
+
+def test_payload_is_truncated():
+    payload_logger = PayloadLogger(LogConfig(payload_max_chars=5))
+    assert str(payload_logger.payload('abcdefghij')) == 'abcde... (10 chars)'
+    assert str(payload_logger.payload(b'abc')) == 'abc'
+
+
+def test_sampling_is_per_stream():
+    logger = logging.getLogger('xrvoyage-test-sampled')
+    logger.setLevel(logging.DEBUG)
+    payload_logger = PayloadLogger(LogConfig(sample_every=3), logger=logger)
+
+    ingress = [payload_logger.should_log(logging.INFO, 'ingress') for _ in range(6)]
+    egress = [payload_logger.should_log(logging.INFO, 'egress') for _ in range(2)]
+    assert ingress == [True, False, False, True, False, False]
+    assert egress == [True, False]
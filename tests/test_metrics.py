@@ -0,0 +1,58 @@
+import urllib.request
+
+import pytest
+from xrvoyage.common.metrics import MetricsConfig, MetricsRegistry, MetricsServer, endpoint_label
+
+
+def test_disabled_registry_records_nothing():
+    registry = MetricsRegistry()
+    registry.inc('xrvoyage_frames_received_total', ship='SHIP')
+    registry.observe('xrvoyage_decode_seconds', 0.001)
+    registry.gauge_callback('xrvoyage_dispatch_queue_depth', lambda: 3)
+
+    assert registry.snapshot() == {'counters': {}, 'gauges': {}, 'histograms': {}}
+
+
+def test_snapshot_and_prometheus_text():
+    registry = MetricsRegistry(MetricsConfig(buckets=(0.01, 0.1)))
+    registry.inc('xrvoyage_frames_received_total', ship='A')
+    registry.inc('xrvoyage_frames_received_total', ship='A')
+    registry.inc('xrvoyage_frames_received_total', ship='B')
+    registry.gauge_callback('xrvoyage_dispatch_queue_depth', lambda: 3)
+    for seconds in (0.005, 0.05, 0.5):
+        registry.observe('xrvoyage_handler_seconds', seconds, event_type='xr.data.test')
+
+    snapshot = registry.snapshot()
+    assert {s['labels']['ship']: s['value'] for s in snapshot['counters']['xrvoyage_frames_received_total']} == {'A': 2, 'B': 1}
+    assert snapshot['gauges']['xrvoyage_dispatch_queue_depth'] == [{'labels': {}, 'value': 3.0}]
+    histogram = snapshot['histograms']['xrvoyage_handler_seconds'][0]
+    assert histogram['count'] == 3
+    assert histogram['buckets'] == {'0.01': 1, '0.1': 2, '+Inf': 3}
+
+    text = registry.prometheus_text()
+    assert '# TYPE xrvoyage_frames_received_total counter' in text
+    assert 'xrvoyage_frames_received_total{ship="A"} 2' in text
+    assert 'xrvoyage_handler_seconds_bucket{event_type="xr.data.test",le="+Inf"} 3' in text
+    assert 'xrvoyage_dispatch_queue_depth 3' in text
+
+
+def test_prometheus_endpoint_serves_the_registry():
+    registry = MetricsRegistry(MetricsConfig())
+    registry.inc('xrvoyage_token_renewals_total', kind='login')
+    server = MetricsServer(registry, '127.0.0.1', 0)
+    server.start()
+    try:
+        with urllib.request.urlopen(f'http://127.0.0.1:{server.port}/metrics', timeout=5) as response:
+            body = response.read().decode()
+    finally:
+        server.stop()
+    assert 'xrvoyage_token_renewals_total{kind="login"} 1' in body
+
+
+@pytest.mark.parametrize('path, label', [
+    ('/webhooks/xrweb', '/webhooks/xrweb'),
+    ('/data/webhook/5f1c0e9a2b', '/data/webhook/{id}'),
+    ('/v2/ship/A895570833F0429A98940C079555AE51/', '/v2/ship/{id}/'),
+])
+def test_endpoint_label_collapses_ids(path, label):
+    assert endpoint_label(path) == label
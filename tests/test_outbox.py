@@ -0,0 +1,179 @@
+import asyncio
+
+import pytest
+from xrvoyage.handlers.outbox import Outbox, OutboxConfig
+
+
+class _FlakySink:
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.batches = []
+
+    async def send(self, records):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError('api down')
+        self.batches.append(list(records))
+
+    @property
+    def records(self):
+        return [record for batch in self.batches for record in batch]
+
+
+@pytest.mark.asyncio
+async def test_put_does_not_wait_for_the_api_and_retries_in_order():
+    sink = _FlakySink(failures=2)
+    outbox = Outbox('test', sink.send, OutboxConfig(replay_batch_size=3, retry_delay=0.01))
+
+    for n in range(7):
+        outbox.put({'n': n})
+    assert len(outbox) == 7
+
+    await asyncio.wait_for(outbox.flush(), timeout=5)
+    await outbox.close()
+
+    assert [r['n'] for r in sink.records] == list(range(7))
+    assert [len(batch) for batch in sink.batches] == [3, 3, 1]
+    assert outbox.stats()['send_failures'] == 2
+
+
+@pytest.mark.asyncio
+async def test_without_spill_the_ring_drops_the_oldest():
+    sink = _FlakySink()
+    outbox = Outbox('test', sink.send, OutboxConfig(memory_capacity=3))
+
+    for n in range(5):
+        outbox.put({'n': n})
+    await outbox.flush()
+    await outbox.close()
+
+    assert [r['n'] for r in sink.records] == [2, 3, 4]
+    assert outbox.stats()['records_dropped'] == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('spill', [False, True])
+async def test_records_put_from_another_thread_are_sent(tmp_path, spill):
+    sink = _FlakySink()
+    # With a spill file, most of the records go to disk
+    config = OutboxConfig(memory_capacity=2 if spill else 100, spill_path=str(tmp_path / 'outbox.db') if spill else None)
+    outbox = Outbox('test', sink.send, config)
+    outbox.start()
+
+    def put_from_thread():
+        for n in range(5):
+            outbox.put({'n': n})
+
+    await asyncio.to_thread(put_from_thread)
+    # No flush, the replay task has to be woken by the thread itself
+    for _ in range(100):
+        if len(sink.records) == 5:
+            break
+        await asyncio.sleep(0.01)
+    await outbox.close()
+
+    assert [r['n'] for r in sink.records] == list(range(5))
+
+
+def test_overflow_spills_to_disk_and_survives_a_restart(tmp_path):
+    path = str(tmp_path / 'outbox.db')
+    config = OutboxConfig(memory_capacity=2, spill_path=path, replay_batch_size=10)
+
+    async def first_run():
+        sink = _FlakySink(failures=10 ** 6)
+        outbox = Outbox('test', sink.send, config)
+        for n in range(5):
+            outbox.put({'n': n})
+        assert outbox.stats()['queued_spilled'] == 3
+        await outbox.close()
+
+    async def second_run():
+        sink = _FlakySink()
+        outbox = Outbox('test', sink.send, config)
+        assert len(outbox) == 5
+        outbox.put({'n': 5})
+        await asyncio.wait_for(outbox.flush(), timeout=5)
+        await outbox.close()
+        return sink
+
+    # Separate loops, as two processes would have
+    asyncio.run(first_run())
+    sink = asyncio.run(second_run())
+
+    assert [r['n'] for r in sink.records] == list(range(6))
+
+
+class _RecordingAsyncHttp:
+    def __init__(self):
+        self.posts = []
+
+    async def post(self, url, json=None, **kwargs):
+        self.posts.append((url, json))
+        return {'message': 'success'}
+
+
+@pytest.mark.asyncio
+async def test_egress_through_the_outbox_groups_events_by_channel():
+    from xrvoyage.entities.webhooks_xrweb import Webhooks_XRWebHandler
+    from xrvoyage.handlers.decorators import DecoratorsHandlers
+
+    http = _RecordingAsyncHttp()
+    webhooks = Webhooks_XRWebHandler(None, http_handler=object(), async_http_handler=http, outbox=OutboxConfig())
+    decorators = DecoratorsHandlers(webhooks, 'PROJECT')
+
+    class Producer:
+        @decorators.eventEgress('xr.data.test')
+        async def data(self, n):
+            return {'args': {'n': n}}
+
+        @decorators.eventEgress('xr.rt.test', channel='xr.rt')
+        async def rt(self, n):
+            return {'args': {'n': n}}
+
+    producer = Producer()
+    assert await producer.data(1) is None
+    await producer.rt(2)
+    await webhooks.outbox.flush()
+    await webhooks.outbox.close()
+
+    url, body = http.posts[0]
+    assert url.endswith('/webhooks/xrweb')
+    assert [e['args']['n'] for e in body['xr.data']] == [1]
+    assert [e['args']['n'] for e in body['xr.rt']] == [2]
+
+
+@pytest.mark.asyncio
+async def test_a_failed_batch_is_resent_unchanged_with_the_same_key():
+    from xrvoyage.entities.webhooks_xrweb import Webhooks_XRWebHandler
+    from xrvoyage.models.events import XRWebhookEvent
+
+    first_attempt = asyncio.Event()
+
+    class TimingOutHttp:
+        def __init__(self):
+            self.attempts = []
+
+        async def post(self, url, json=None, idempotency_key=None):
+            self.attempts.append((idempotency_key, [e['args']['n'] for e in json['xr.data']]))
+            if len(self.attempts) == 1:
+                first_attempt.set()
+                # The API may have applied it, the client only sees the timeout
+                raise asyncio.TimeoutError()
+            return {'message': 'success'}
+
+    http = TimingOutHttp()
+    webhooks = Webhooks_XRWebHandler(
+        None, http_handler=object(), async_http_handler=http,
+        outbox=OutboxConfig(replay_batch_size=10, retry_delay=0.05),
+    )
+    webhooks.enqueue_event(XRWebhookEvent(type='xr.data.test', args={'n': 0}))
+    await asyncio.wait_for(first_attempt.wait(), timeout=5)
+    for n in (1, 2):
+        webhooks.enqueue_event(XRWebhookEvent(type='xr.data.test', args={'n': n}))
+    await asyncio.wait_for(webhooks.outbox.flush(), timeout=5)
+    await webhooks.outbox.close()
+
+    (failed_key, failed), (retry_key, retried), (_, rest) = http.attempts
+    assert retried == failed == [0]
+    assert retry_key == failed_key
+    assert rest == [1, 2]
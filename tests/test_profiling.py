@@ -0,0 +1,93 @@
+import asyncio
+import logging
+import time
+
+import logzero
+import pytest
+from xrvoyage.handlers.decorators import DecoratorsHandlers
+from xrvoyage.handlers.profiling import HandlerProfiler, ProfilingConfig
+
+
+def _decorators(profiler):
+    return DecoratorsHandlers(webhooks_xrweb=None, project_guid='PROJECT', profiler=profiler)
+
+
+@pytest.fixture
+def warnings(caplog):
+    logzero.logger.propagate = True
+    caplog.set_level(logging.WARNING, logger=logzero.logger.name)
+    yield caplog
+    logzero.logger.propagate = False
+
+
+@pytest.mark.asyncio
+async def test_async_handler_timing_and_loop_block(warnings):
+    profiler = HandlerProfiler(ProfilingConfig(slow_threshold_ms=None, loop_block_threshold_ms=20))
+    decorators = _decorators(profiler)
+
+    @decorators.eventIngress('xr.data.test')
+    async def handler(event):
+        await asyncio.sleep(0.01)
+        time.sleep(0.03)  # holds the loop between awaits
+
+    (routed,) = decorators.router.resolve('xr.data.test', 'xr.data')
+    await routed({'type': 'xr.data.test'})
+
+    (stats,) = profiler.stats().values()
+    assert stats['calls'] == 1
+    assert stats['wall_max'] >= 0.04
+    assert stats['cpu_avg'] < 0.02
+    assert stats['loop_blocks'] == 1
+    assert stats['max_loop_block'] == pytest.approx(0.03, abs=0.02)
+    assert 'blocked the event loop' in warnings.text
+
+
+@pytest.mark.asyncio
+async def test_slow_call_logs_a_stack_sample(warnings):
+    profiler = HandlerProfiler(ProfilingConfig(slow_threshold_ms=20, loop_block_threshold_ms=None))
+    decorators = _decorators(profiler)
+
+    async def wait_for_the_api():
+        await asyncio.sleep(0.1)
+
+    @decorators.eventIngress('xr.data.test')
+    async def handler(event):
+        await wait_for_the_api()
+
+    (routed,) = decorators.router.resolve('xr.data.test', 'xr.data')
+    await routed({'type': 'xr.data.test'})
+
+    assert 'still running after' in warnings.text
+    assert 'wait_for_the_api' in warnings.text
+    (stats,) = profiler.stats().values()
+    assert stats['slow_calls'] == 1
+
+
+def test_sync_handler_keeps_process_pool_attributes():
+    profiler = HandlerProfiler()
+    decorators = _decorators(profiler)
+
+    def handler(event):
+        return event['type']
+
+    decorators.eventIngress('xr.data.test')(handler)
+    (routed,) = decorators.router.resolve('xr.data.test', 'xr.data')
+
+    assert routed({'type': 'xr.data.test'}) == 'xr.data.test'
+    assert routed.__wrapped__ is handler
+    assert profiler.stats()[f'{__name__}.test_sync_handler_keeps_process_pool_attributes.<locals>.handler']['calls'] == 1
+
+
+@pytest.mark.asyncio
+async def test_profile_window_reports_handler_functions():
+    profiler = HandlerProfiler()
+
+    async def busy():
+        for _ in range(20):
+            sum(range(10000))
+            await asyncio.sleep(0.001)
+
+    task = asyncio.create_task(busy())
+    report = await profiler.profile_window(0.1)
+    await task
+    assert 'busy' in report
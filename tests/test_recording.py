@@ -0,0 +1,146 @@
+import asyncio
+import json
+import time
+
+import pytest
+from xrvoyage import XrApiClient
+from xrvoyage.handlers.decorators import DecoratorsHandlers
+from xrvoyage.handlers.recording import FrameRecorder, RecordingConfig, read_recording, replay_recording
+from xrvoyage.handlers.wss import WssHandler
+from xrvoyage.testing import StandInConfig
+
+SHIP = 'C9EECCC7826249E386B45B78D8A14B19'
+
+
+@pytest.fixture
+def standin_config():
+    return StandInConfig(event_rate=100, event_types=['xr.rt.status.ship.geo', 'xr.data.quiz'], events_per_frame=3)
+
+
+def _frame(n: int, event_type: str = 'xr.rt.status.ship.geo') -> str:
+    return json.dumps({'xr.rt': [{'type': event_type, 'args': {'n': n}}]})
+
+
+def _handler_for(event_type: str, received: list) -> WssHandler:
+    decorators = DecoratorsHandlers(None, 'PROJECT')
+
+    @decorators.eventIngress(event_type)
+    async def on_event(event):
+        received.append(event)
+
+    return WssHandler(None, decorators)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('compress', [False, True])
+async def test_live_frames_replay_through_the_same_handlers(standin, tmp_path, compress):
+    path = str(tmp_path / 'session.xrrec')
+    live = XrApiClient(SHIP, recording=RecordingConfig(path=path, compress=compress))
+    live_events = []
+
+    @live.decorators.eventIngress('xr.rt.status.*')
+    async def on_live(event):
+        live_events.append(event['args']['seq'])
+
+    async with live:
+        while len(live_events) < 30:
+            await asyncio.sleep(0.01)
+
+    recorded = list(read_recording(path))
+    assert len(recorded) == live.wss.recorder.frames == live.wss.frames_received
+    assert all(frame.ship_guid == SHIP for frame in recorded)
+    assert [frame.received_at for frame in recorded] == sorted(frame.received_at for frame in recorded)
+
+    replayed = XrApiClient(SHIP)
+    replayed_events = []
+
+    @replayed.decorators.eventIngress('xr.rt.status.*')
+    async def on_replayed(event):
+        replayed_events.append(event['args']['seq'])
+
+    stats = await replayed.replay(path, speed=None)
+
+    assert stats['frames'] == len(recorded)
+    assert sorted(replayed_events) == sorted(live_events)
+    assert not replayed.wss.dispatcher.running
+
+
+@pytest.mark.asyncio
+async def test_replay_keeps_the_recorded_timing_scaled_by_speed(tmp_path):
+    path = str(tmp_path / 'burst.xrrec')
+    recorder = FrameRecorder(RecordingConfig(path=path))
+    start = time.time()
+    for n, offset in enumerate([0.0, 0.01, 0.02, 0.4]):
+        recorder.record(_frame(n), 'SHIP', received_at=start + offset)
+    recorder.close()
+
+    received = []
+    wss = _handler_for('xr.rt.status.ship.geo', received)
+    realtime = await replay_recording(wss, path, speed=1.0)
+    fast = await replay_recording(wss, path, speed=8.0, ship_guid='OTHER')
+    await wss.dispatcher.stop()
+
+    assert realtime['recorded_seconds'] == pytest.approx(0.4)
+    assert 0.4 <= realtime['seconds'] < 0.6
+    assert 0.05 <= fast['seconds'] < 0.2
+    assert [event['args']['n'] for event in received] == [0, 1, 2, 3] * 2
+    assert [event['ship_guid'] for event in received] == ['SHIP'] * 4 + ['OTHER'] * 4
+
+
+@pytest.mark.asyncio
+async def test_replay_skips_frames_without_a_route(tmp_path):
+    path = str(tmp_path / 'mixed.xrrec')
+    recorder = FrameRecorder(RecordingConfig(path=path))
+    for n in range(10):
+        recorder.record(_frame(n, 'xr.rt.status.ship.geo' if n % 2 else 'xr.rt.chat'), 'SHIP')
+    recorder.close()
+
+    received = []
+    wss = _handler_for('xr.rt.status.ship.geo', received)
+    stats = await replay_recording(wss, path, speed=None)
+    await wss.dispatcher.stop()
+
+    assert stats['frames'] == 10
+    assert wss.frames_skipped == 5
+    assert [event['args']['n'] for event in received] == [1, 3, 5, 7, 9]
+
+
+def test_torn_last_record_is_dropped_and_appending_resumes(tmp_path):
+    path = tmp_path / 'crashed.xrrec'
+    recorder = FrameRecorder(RecordingConfig(path=str(path)))
+    recorder.record(_frame(0), 'SHIP')
+    recorder.record(b'\x00binary', 'SHIP')
+    recorder.close()
+    size = path.stat().st_size
+    with open(path, 'ab') as file:
+        file.write(b'\x01\x02\x03')  # A crash mid-header
+
+    assert [frame.frame for frame in read_recording(str(path))] == [_frame(0), b'\x00binary']
+
+    recorder = FrameRecorder(RecordingConfig(path=str(path)))
+    # Repaired before the first frame arrives
+    assert path.stat().st_size == size
+    recorder.record(_frame(2), 'SHIP')
+    recorder.close()
+
+    assert [frame.frame for frame in read_recording(str(path))] == [_frame(0), b'\x00binary', _frame(2)]
+
+
+def test_compressed_recordings_append_one_member_per_run(tmp_path):
+    path = str(tmp_path / 'runs.xrrec.gz')
+    for n in range(3):
+        recorder = FrameRecorder(RecordingConfig(path=path, compress=True))
+        recorder.record(_frame(n), f'SHIP-{n}')
+        recorder.close()
+
+    assert [frame.ship_guid for frame in read_recording(path)] == ['SHIP-0', 'SHIP-1', 'SHIP-2']
+    with pytest.raises(ValueError):
+        FrameRecorder(RecordingConfig(path=path))
+
+
+def test_other_files_are_rejected(tmp_path):
+    path = tmp_path / 'notes.txt'
+    path.write_text('hello')
+
+    with pytest.raises(ValueError):
+        list(read_recording(str(path)))
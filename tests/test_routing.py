@@ -0,0 +1,61 @@
+import pytest
+from xrvoyage.handlers.routing import EventRouter
+
+
+def _handler(name):
+    def handler(event):
+        return name
+    handler.__name__ = name
+    return handler
+
+
+def test_exact_prefix_and_channel_routes():
+    router = EventRouter()
+    exact, status, everything, rt = (_handler(n) for n in ('exact', 'status', 'everything', 'rt'))
+    router.add('xr.rt.status.ship.geo', exact)
+    router.add('xr.rt.status.*', status)
+    router.add('*', everything)
+    router.add_channel('xr.rt', rt)
+
+    assert router.resolve('xr.rt.status.ship.geo', 'xr.rt') == (exact, status, everything, rt)
+    assert router.resolve('xr.rt.status.ship.crew', 'xr.rt') == (status, everything, rt)
+    assert router.resolve('xr.rt.status', 'xr.rt') == (everything, rt)
+    assert router.resolve('xr.data.wh1', 'xr.data') == (everything,)
+    assert len(router) == 4
+
+
+def test_multiple_handlers_per_type_are_kept():
+    router = EventRouter()
+    first, second = _handler('first'), _handler('second')
+    router.add('xr.data.wh1', first)
+    router.add('xr.data.wh1', second)
+    router.add('xr.data.wh1', first)
+
+    assert router.resolve('xr.data.wh1') == (first, second)
+
+
+def test_registration_invalidates_cached_routes():
+    router = EventRouter()
+    assert router.resolve('xr.data.wh1') == ()
+    handler = _handler('late')
+    router.add('xr.data.*', handler)
+    assert 'xr.data.wh1' in router
+
+
+def test_wildcard_must_be_trailing():
+    with pytest.raises(ValueError):
+        EventRouter().add('xr.*.status', _handler('bad'))
+
+
+def test_frame_prefilter_skips_frames_without_registered_types():
+    router = EventRouter()
+    assert not router.may_match('{"xr.data": [{"type": "xr.data.wh1"}]}')
+
+    router.add('xr.data.wh1', _handler('wh1'))
+    router.add('xr.rt.status.*', _handler('status'))
+    assert router.may_match('{"xr.data": [{"type": "xr.data.wh1"}]}')
+    assert router.may_match(b'{"xr.rt": [{"type": "xr.rt.status.ship.geo"}]}')
+    assert not router.may_match('{"xr.rt": [{"type": "xr.rt.chat.message"}]}')
+
+    router.add_channel('xr.rt', _handler('rt'))
+    assert router.may_match('{"xr.rt": [{"type": "xr.rt.chat.message"}]}')
@@ -0,0 +1,62 @@
+import asyncio
+import random
+
+import pytest
+import websockets
+from xrvoyage.entities.webhooks_xrweb import Webhooks_XRWebHandler
+from xrvoyage.handlers.auth import get_token_strategy
+from xrvoyage.handlers.http import CompressionConfig, HttpHandler
+from xrvoyage.handlers.retry import RetryPolicy
+from xrvoyage.models.events import XRWebhookEvent, XRWebhookEventBatch
+from xrvoyage.testing import StandInConfig, StandInServer
+
+
+@pytest.fixture
+def standin_config():
+    return StandInConfig(event_rate=0, failure_rate=0.3)
+
+
+def test_retried_compressed_egress_is_delivered_once(standin):
+    random.seed(7)
+    token_strategy = get_token_strategy()
+    http = HttpHandler(
+        token_strategy,
+        retry=RetryPolicy(max_attempts=10, backoff_initial=0.001, budget_burst=100),
+        compression=CompressionConfig(min_bytes=256),
+    )
+    webhooks = Webhooks_XRWebHandler(token_strategy, http_handler=http)
+
+    for n in range(20):
+        event = XRWebhookEvent(type='xr.data.vr-quiz-data', args={'n': n, 'story': 'Once upon a time ' * 50})
+        webhooks.post_event_as_batch(XRWebhookEventBatch(**{'xr.data': [event]}))
+
+    assert standin.failures_injected > 0
+    assert [event['args']['n'] for event in standin.events] == list(range(20))
+    assert http.retry_stats()['retries'] == standin.failures_injected
+    assert http.compression_stats()['bodies_compressed'] == 20
+    http.close()
+
+
+def test_generated_frames_follow_the_config():
+    server = StandInServer(StandInConfig(event_types=['xr.rt.status.ship.geo'], events_per_frame=3, payload_bytes=512))
+    frame = server.make_frame('SHIP')
+
+    assert list(frame) == ['xr.rt']
+    assert len(frame['xr.rt']) == 3
+    assert all(event['ship_guid'] == 'SHIP' for event in frame['xr.rt'])
+    assert 400 < len(str(frame['xr.rt'][0])) < 700
+
+
+@pytest.mark.asyncio
+async def test_dropped_websockets_are_aborted_without_a_close_frame():
+    server = StandInServer(StandInConfig(event_rate=200, drop_after_frames=5))
+    with server.running_in_thread():
+        url = f'{server.ws_url}/v2/ship/SHIP/?token={server.issue_token()}'
+        async with websockets.connect(url) as ws:
+            with pytest.raises(websockets.ConnectionClosedError) as excinfo:
+                async with asyncio.timeout(5):
+                    async for _ in ws:
+                        pass
+
+    assert excinfo.value.rcvd is None
+    assert server.frames_sent == 5
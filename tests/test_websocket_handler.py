@@ -1,43 +1,35 @@
-import os
 import asyncio
+
 import pytest
-from dotenv import load_dotenv
-from xrvoyage.handlers.api_client import XrApiClient
-from xrvoyage.handlers.wss_handler import eventIngress, WssHandler
-from xrvoyage.models.events import XRWebhookEventBatch
-import logzero
 from logzero import logger
+from xrvoyage import XrApiClient
+from xrvoyage.testing import StandInConfig
 
-load_dotenv()
 
 @pytest.fixture
-def setup_environment(monkeypatch):
-    logger.debug('Setting up environment variables')
-    monkeypatch.setenv('XRVOYAGE_ACCESS_KEY_ID', os.getenv('XRVOYAGE_ACCESS_KEY_ID'))
-    monkeypatch.setenv('XRVOYAGE_SECRET_ACCESS_KEY', os.getenv('XRVOYAGE_SECRET_ACCESS_KEY'))
-
-@eventIngress("xr.data.some-data-id2")
-def handle_some_data(event: XRWebhookEventBatch):
-    logger.debug(f"Handling event of type 'xr.data.some-data-id2'")
-    print("Handling event of type 'xr.data.some-data-id2'")
-    print("Event data:", event)
+def standin_config():
+    return StandInConfig(event_rate=50, event_types=['xr.data.some-data-id2'])
 
 @pytest.mark.asyncio
-@pytest.mark.dependency(name='websocket_test')
-async def test_websocket_handler(setup_environment):
+async def test_websocket_handler(standin):
     logger.debug('Starting test_websocket_handler')
-    xr = XrApiClient()
-    ship_guid = "C9EECCC7826249E386B45B78D8A14B19"
-    timeout = int(os.getenv('WEBSOCKET_TIMEOUT'))
-
-    xr.wss.connect(ship_guid)
-
-    try:
-        logger.debug(f'Running event loop for {timeout} seconds')
-        await asyncio.sleep(timeout)
-    finally:
-        logger.debug('Destroying websocket connection at the end of the test')
-        await xr.wss.destroy()
+    xr = XrApiClient("C9EECCC7826249E386B45B78D8A14B19")
+    received = []
+    enough = asyncio.Event()
+
+    @xr.decorators.eventIngress("xr.data.some-data-id2")
+    def handle_some_data(event):
+        logger.debug(f"Handling event of type 'xr.data.some-data-id2'")
+        received.append(event)
+        if len(received) >= 5:
+            enough.set()
+
+    async with xr:
+        await asyncio.wait_for(enough.wait(), timeout=10)
+
+    assert standin.logins == 1
+    assert all(event['ship_guid'] == "C9EECCC7826249E386B45B78D8A14B19" for event in received)
+    assert not xr.wss.running
 
 # Simple test to ensure pytest recognition
 def test_simple():
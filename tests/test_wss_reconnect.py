@@ -0,0 +1,115 @@
+import asyncio
+import json
+
+import pytest
+import websockets
+from xrvoyage.common.config import get_app_config
+from xrvoyage.handlers.auth import TokenStrategy
+from xrvoyage.handlers.decorators import DecoratorsHandlers
+from xrvoyage.handlers.dispatch import DispatchConfig
+from xrvoyage.handlers.wss import ReconnectPolicy, WssHandler
+
+
+class _StaticToken(TokenStrategy):
+    def __init__(self):
+        self.calls = 0
+
+    def get_token(self):
+        self.calls += 1
+        return f'token-{self.calls}'
+
+
+def _decorators(handlers: dict) -> DecoratorsHandlers:
+    decorators = DecoratorsHandlers(webhooks_xrweb=None, project_guid='PROJECT')
+    for event_type, handler in handlers.items():
+        decorators.eventIngress(event_type)(handler)
+    return decorators
+
+
+@pytest.mark.asyncio
+async def test_listener_reconnects_after_server_drops(monkeypatch):
+    connections = 0
+    received = []
+
+    async def server_handler(websocket):
+        nonlocal connections
+        connections += 1
+        await websocket.send(json.dumps({'xr.rt': [{'type': 'xr.rt.status.ship.geo', 'args': {'n': connections}}]}))
+        if connections == 1:
+            await websocket.close(code=1011)
+            return
+        await websocket.wait_closed()
+
+    async def handler(event):
+        received.append(event['args']['n'])
+
+    async with websockets.serve(server_handler, '127.0.0.1', 0) as server:
+        port = server.sockets[0].getsockname()[1]
+        monkeypatch.setattr(get_app_config(), 'XRVOYAGE_WEBSOCKETS_BASE_URL', f'ws://127.0.0.1:{port}')
+
+        token = _StaticToken()
+        wss = WssHandler(
+            token,
+            _decorators({'xr.rt.status.ship.geo': handler}),
+            DispatchConfig(workers=1),
+            ReconnectPolicy(initial_delay=0.01, jitter=0),
+        )
+        await wss.connect('SHIP')
+        for _ in range(100):
+            if len(received) == 2:
+                break
+            await asyncio.sleep(0.01)
+        await wss.destroy()
+
+    assert received == [1, 2]
+    assert token.calls == 2
+    stats = wss.connection_stats()['SHIP']
+    assert stats['reconnects'] == 1
+    assert stats['last_time_to_reconnect'] is not None
+    assert stats['downtime_seconds'] > 0
+    assert not wss.running
+
+
+@pytest.mark.asyncio
+async def test_listener_gives_up_after_max_attempts(monkeypatch):
+    monkeypatch.setattr(get_app_config(), 'XRVOYAGE_WEBSOCKETS_BASE_URL', 'ws://127.0.0.1:9')
+    wss = WssHandler(_StaticToken(), _decorators({}), reconnect=ReconnectPolicy(initial_delay=0.001, max_attempts=2))
+
+    with pytest.raises(Exception, match='Giving up'):
+        await wss.connect('SHIP')
+    assert wss.connection_stats()['SHIP']['reconnect_attempts'] == 1
+    await wss.destroy()
+
+
+@pytest.mark.asyncio
+async def test_one_handler_listens_to_many_ships(monkeypatch):
+    received = []
+
+    async def server_handler(websocket):
+        # websockets 14+ exposes the handshake as request, the legacy server as path
+        path = websocket.request.path if hasattr(websocket, 'request') else websocket.path
+        ship = path.split('/')[3]
+        await websocket.send(json.dumps({'xr.data': [{'type': 'xr.data.ping', 'args': {'ship': ship}}]}))
+        await websocket.wait_closed()
+
+    async def handler(event):
+        received.append((event['args']['ship'], event['ship_guid']))
+
+    async with websockets.serve(server_handler, '127.0.0.1', 0) as server:
+        port = server.sockets[0].getsockname()[1]
+        monkeypatch.setattr(get_app_config(), 'XRVOYAGE_WEBSOCKETS_BASE_URL', f'ws://127.0.0.1:{port}')
+
+        wss = WssHandler(_StaticToken(), _decorators({'xr.data.ping': handler}))
+        await wss.connect(['SHIP_A', 'SHIP_B', 'SHIP_C'])
+        for _ in range(100):
+            if len(received) == 3:
+                break
+            await asyncio.sleep(0.01)
+        assert set(wss.connection_stats()) == {'SHIP_A', 'SHIP_B', 'SHIP_C'}
+
+        await wss.destroy('SHIP_A')
+        assert wss.running
+        await wss.destroy()
+
+    assert sorted(received) == [('SHIP_A', 'SHIP_A'), ('SHIP_B', 'SHIP_B'), ('SHIP_C', 'SHIP_C')]
+    assert not wss.running
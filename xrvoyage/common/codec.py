@@ -0,0 +1,59 @@
+import json
+from functools import lru_cache
+from typing import Any
+
+from .config import get_app_config
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the installed extras
+    orjson = None
+
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so this catches both backends.
+DecodeError = json.JSONDecodeError
+
+
+class EncodedJson(bytes):
+    """
+    JSON that is already serialized, sent as a request body unchanged.
+    """
+
+
+class JsonCodec:
+    """
+    Standard library JSON codec. Encodes to compact UTF-8 bytes.
+    """
+    name = 'json'
+
+    def loads(self, data: str | bytes) -> Any:
+        return json.loads(data)
+
+    def dumps(self, obj: Any) -> bytes:
+        return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+class OrjsonCodec(JsonCodec):
+    """
+    orjson backed codec, used when the optional orjson package is installed.
+    """
+    name = 'orjson'
+
+    def loads(self, data: str | bytes) -> Any:
+        return orjson.loads(data)
+
+    def dumps(self, obj: Any) -> bytes:
+        return orjson.dumps(obj)
+
+
+@lru_cache()
+def get_codec() -> JsonCodec:
+    """
+    Returns the JSON codec selected by XRVOYAGE_JSON_CODEC ('auto', 'json' or 'orjson').
+    'auto' picks orjson when it is installed and falls back to the standard library.
+    """
+    choice = get_app_config().XRVOYAGE_JSON_CODEC
+    if choice == 'orjson' and orjson is None:
+        raise ImportError("XRVOYAGE_JSON_CODEC is 'orjson' but orjson is not installed")
+    if choice in ('auto', 'orjson') and orjson is not None:
+        return OrjsonCodec()
+    return JsonCodec()
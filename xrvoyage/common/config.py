@@ -14,6 +14,13 @@ class Settings(BaseSettings):
         self.XRVOYAGE_ACCESS_KEY_ID: str | None = config('XRVOYAGE_ACCESS_KEY_ID', None)
         self.XRVOYAGE_SECRET_ACCESS_KEY: str | None = config('XRVOYAGE_SECRET_ACCESS_KEY', None)
         self.XRVOYAGE_SESSION_TOKEN: str | None = config('XRVOYAGE_SESSION_TOKEN', None)
+        self.XRVOYAGE_JSON_CODEC: str = config('XRVOYAGE_JSON_CODEC', 'auto')
+        self.XRVOYAGE_TOKEN_CACHE_PATH: str | None = config('XRVOYAGE_TOKEN_CACHE_PATH', None)
+        # Point the client at another deployment, e.g. the local stand-in in xrvoyage.testing
+        self.XRVOYAGE_API_BASE_URL: str = config('XRVOYAGE_API_BASE_URL', self.XRVOYAGE_API_BASE_URL).rstrip('/')
+        self.XRVOYAGE_WEBSOCKETS_BASE_URL: str = config(
+            'XRVOYAGE_WEBSOCKETS_BASE_URL', self.XRVOYAGE_WEBSOCKETS_BASE_URL
+        ).rstrip('/')
 
 @lru_cache()
 def get_app_config():
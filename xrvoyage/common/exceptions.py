@@ -32,13 +32,17 @@ class ApiError(Exception):
     """
         Exception thrown due to an api error
     """
-    def __init__(self, status_code: int, body: str):
+    def __init__(self, status_code: int, body: str, retry_after: float | None = None):
         """
         Constructor.
 
         Args:
             status_code (int): The server status code.
             body (str): The server message
+            retry_after (float, optional): Seconds the server asked to wait before retrying.
         """
+        self.status_code = status_code
+        self.body = body
+        self.retry_after = retry_after
         msg = f'Status Code: {status_code}, Body: {body}'
         super().__init__(msg)
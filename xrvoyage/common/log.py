@@ -0,0 +1,100 @@
+import itertools
+import logging
+from typing import Any, Dict, Iterator
+
+import logzero
+import pydantic
+
+
+class LogConfig(pydantic.BaseModel):
+    """
+    Logging of event payloads on the ingress and egress hot paths.
+
+    Payloads longer than payload_max_chars are truncated (None logs them in full).
+    With sample_every set to N, only one in N events per stream is logged.
+    """
+    payload_max_chars: int | None = 1024
+    sample_every: int = 1
+
+
+class _LazyPayload:
+    """
+    Defers rendering a payload until a log record is actually formatted.
+    """
+    __slots__ = ('_payload', '_max_chars')
+
+    def __init__(self, payload: Any, max_chars: int | None) -> None:
+        self._payload = payload
+        self._max_chars = max_chars
+
+    def __str__(self) -> str:
+        payload = self._payload
+        if isinstance(payload, bytes):
+            text = payload.decode('utf-8', errors='replace')
+        elif isinstance(payload, pydantic.BaseModel):
+            text = payload.model_dump_json(by_alias=True, exclude_unset=True)
+        else:
+            text = str(payload)
+        if self._max_chars is not None and len(text) > self._max_chars:
+            return f'{text[:self._max_chars]}... ({len(text)} chars)'
+        return text
+
+
+class PayloadLogger:
+    def __init__(self, config: LogConfig | None = None, logger: logging.Logger | None = None) -> None:
+        """
+        Level-guarded, sampled logging of event payloads.
+
+        Call sites check should_log first, so neither the payload nor the message is
+        rendered when the level is filtered out or the event is not sampled, and pass
+        payload(...) as a %s argument so it is only rendered by the log handler.
+
+        Args:
+            config (LogConfig, optional): Truncation and sampling settings.
+            logger (logging.Logger, optional): Defaults to the logzero logger.
+        """
+        self._logger = logger
+        self.configure(config or LogConfig())
+
+    @property
+    def logger(self) -> logging.Logger:
+        # Resolved on use, since logzero.setup_default_logger replaces logzero.logger
+        return self._logger or logzero.logger
+
+    def configure(self, config: LogConfig) -> None:
+        self._config = config
+        self._counters: Dict[str, Iterator[int]] = {}
+
+    def should_log(self, level: int, stream: str = 'default') -> bool:
+        """
+        Whether an event on this stream should be logged at this level.
+
+        Args:
+            level (int): The logging level.
+            stream (str): Sampling is counted separately per stream, e.g. 'ingress'.
+        """
+        if not self.logger.isEnabledFor(level):
+            return False
+        sample_every = self._config.sample_every
+        if sample_every <= 1:
+            return True
+        counter = self._counters.get(stream)
+        if counter is None:
+            counter = self._counters[stream] = itertools.count()
+        return next(counter) % sample_every == 0
+
+    def payload(self, payload: Any) -> _LazyPayload:
+        """
+        Wrap a payload so it is rendered, and truncated, only when logged.
+        """
+        return _LazyPayload(payload, self._config.payload_max_chars)
+
+
+payload_logger = PayloadLogger()
+
+
+def configure_payload_logging(config: LogConfig) -> None:
+    """
+    Apply truncation and sampling settings to the shared payload logger.
+    """
+    payload_logger.configure(config)
@@ -0,0 +1,278 @@
+import bisect
+import math
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Tuple
+
+import pydantic
+from logzero import logger
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class MetricsConfig(pydantic.BaseModel):
+    """
+    In-process metrics.
+
+    When enabled, counters, gauges and latency histograms are kept in memory
+    and can be read with metrics.snapshot() or metrics.prometheus_text().
+    With prometheus_port set, the Prometheus text format is also served on
+    http://prometheus_host:prometheus_port/metrics while the client runs.
+    """
+    enabled: bool = True
+    buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    prometheus_host: str = '127.0.0.1'
+    prometheus_port: int | None = None
+
+
+class _Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets: Tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def snapshot(self) -> dict:
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(self.buckets + (math.inf,), self.counts):
+            cumulative += count
+            buckets['+Inf' if bound == math.inf else repr(bound)] = cumulative
+        return {'count': self.count, 'sum': self.sum, 'buckets': buckets}
+
+
+class MetricsRegistry:
+    def __init__(self, config: MetricsConfig | None = None) -> None:
+        """
+        Metrics Registry Constructor
+
+        Every recording method returns straight away while the registry is
+        disabled, and call sites that need a clock check enabled first, so
+        instrumentation costs an attribute lookup when metrics are off.
+
+        Args:
+            config (MetricsConfig, optional): Defaults to disabled.
+        """
+        self._lock = threading.Lock()
+        self.configure(config or MetricsConfig(enabled=False))
+
+    def configure(self, config: MetricsConfig) -> None:
+        with self._lock:
+            self._config = config
+            self.enabled = config.enabled
+            self._counters: Dict[str, Dict[_LabelKey, float]] = {}
+            self._gauges: Dict[str, Dict[_LabelKey, float]] = {}
+            self._gauge_callbacks: Dict[str, Dict[_LabelKey, Callable[[], float]]] = {}
+            self._histograms: Dict[str, Dict[_LabelKey, _Histogram]] = {}
+
+    def inc(self, name: str, value: float = 1.0, **labels: str) -> None:
+        """
+        Add to a counter.
+
+        Args:
+            name (str): The metric name, e.g. 'xrvoyage_frames_received_total'.
+            value (float): The increment.
+            **labels (str): Label values.
+        """
+        if not self.enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def set(self, name: str, value: float, **labels: str) -> None:
+        """
+        Set a gauge.
+        """
+        if not self.enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._gauges.setdefault(name, {})[key] = value
+
+    def gauge_callback(self, name: str, callback: Callable[[], float], **labels: str) -> None:
+        """
+        Register a gauge that is read from callback whenever metrics are collected,
+        e.g. a queue depth, so nothing is recorded on the hot path.
+        """
+        if not self.enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._gauge_callbacks.setdefault(name, {})[key] = callback
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        """
+        Record a value, usually a latency in seconds, in a histogram.
+        """
+        if not self.enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram(self._config.buckets)
+            histogram.observe(value)
+
+    def _collect_gauges(self) -> Dict[str, Dict[_LabelKey, float]]:
+        gauges = {name: dict(series) for name, series in self._gauges.items()}
+        for name, callbacks in self._gauge_callbacks.items():
+            series = gauges.setdefault(name, {})
+            for key, callback in callbacks.items():
+                try:
+                    series[key] = float(callback())
+                except Exception as e:
+                    logger.debug(f'Gauge {name} callback failed: {e}')
+        return gauges
+
+    def snapshot(self) -> dict:
+        """
+        Pull every metric.
+
+        Returns:
+            dict: 'counters', 'gauges' and 'histograms', each mapping a metric
+                name to a list of {'labels': {...}, ...} series.
+        """
+        with self._lock:
+            counters = {name: dict(series) for name, series in self._counters.items()}
+            histograms = {
+                name: {key: histogram.snapshot() for key, histogram in series.items()}
+                for name, series in self._histograms.items()
+            }
+            gauges = self._collect_gauges()
+        return {
+            'counters': {
+                name: [{'labels': dict(key), 'value': value} for key, value in series.items()]
+                for name, series in counters.items()
+            },
+            'gauges': {
+                name: [{'labels': dict(key), 'value': value} for key, value in series.items()]
+                for name, series in gauges.items()
+            },
+            'histograms': {
+                name: [{'labels': dict(key), **data} for key, data in series.items()]
+                for name, series in histograms.items()
+            },
+        }
+
+    def prometheus_text(self) -> str:
+        """
+        Every metric in the Prometheus text exposition format.
+        """
+        snapshot = self.snapshot()
+        lines: List[str] = []
+        for name, series in sorted(snapshot['counters'].items()):
+            lines.append(f'# TYPE {name} counter')
+            lines.extend(f'{name}{_labels(s["labels"])} {_number(s["value"])}' for s in series)
+        for name, series in sorted(snapshot['gauges'].items()):
+            lines.append(f'# TYPE {name} gauge')
+            lines.extend(f'{name}{_labels(s["labels"])} {_number(s["value"])}' for s in series)
+        for name, series in sorted(snapshot['histograms'].items()):
+            lines.append(f'# TYPE {name} histogram')
+            for s in series:
+                for bound, count in s['buckets'].items():
+                    lines.append(f'{name}_bucket{_labels({**s["labels"], "le": bound})} {count}')
+                lines.append(f'{name}_sum{_labels(s["labels"])} {_number(s["sum"])}')
+                lines.append(f'{name}_count{_labels(s["labels"])} {s["count"]}')
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ''
+    pairs = (f'{key}="{_escape(str(value))}"' for key, value in labels.items())
+    return '{' + ','.join(pairs) + '}'
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value: float) -> str:
+    return repr(int(value)) if float(value).is_integer() else repr(value)
+
+
+_ID_SEGMENT = re.compile(r'^(?=.*\d)[0-9A-Za-z_-]{8,}$')
+
+
+def endpoint_label(path: str) -> str:
+    """
+    Collapse id-like path segments, so '/data/webhook/5f1c0e9a' becomes
+    '/data/webhook/{id}' and label cardinality stays bounded.
+    """
+    return '/'.join('{id}' if _ID_SEGMENT.match(segment) else segment for segment in path.split('/'))
+
+
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+    registry: MetricsRegistry
+
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = self.registry.prometheus_text().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class MetricsServer:
+    def __init__(self, registry: MetricsRegistry, host: str, port: int) -> None:
+        """
+        Metrics Server Constructor
+
+        Serves registry.prometheus_text() on /metrics from a daemon thread, so
+        scrapes do not run on the event loop.
+
+        Args:
+            registry (MetricsRegistry): The registry to expose.
+            host (str): The interface to bind, keep it local.
+            port (int): The port to bind, 0 picks a free one.
+        """
+        handler = type('MetricsRequestHandler', (_MetricsRequestHandler,), {'registry': registry})
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._server.serve_forever, name='xrvoyage-metrics', daemon=True)
+        self._thread.start()
+        logger.info(f'Serving metrics on http://{self._server.server_address[0]}:{self.port}/metrics')
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+
+metrics = MetricsRegistry()
+
+
+def configure_metrics(config: MetricsConfig) -> None:
+    """
+    Apply settings to the shared metrics registry, clearing what it recorded.
+    """
+    metrics.configure(config)
@@ -0,0 +1,53 @@
+import asyncio
+from typing import Coroutine, Set
+
+from logzero import logger
+
+
+class TaskScope:
+    def __init__(self, name: str = 'xrvoyage') -> None:
+        """
+        Owns the background tasks a client spawns: listeners, dispatch workers,
+        batch flushes and the token refresher.
+
+        Unlike asyncio.TaskGroup, a failing task does not cancel its siblings (one
+        ship giving up must not stop the others); the failure is logged. close()
+        cancels whatever is still running and waits for it, so nothing outlives
+        the client.
+
+        Args:
+            name (str): Prefix for task names.
+        """
+        self._name = name
+        self._tasks: Set[asyncio.Task] = set()
+
+    def spawn(self, coro: Coroutine, name: str | None = None) -> asyncio.Task:
+        """
+        Start a task owned by this scope.
+
+        Args:
+            coro (Coroutine): The coroutine to run.
+            name (str, optional): Task name, prefixed with the scope name.
+        """
+        task = asyncio.create_task(coro, name=f'{self._name}:{name}' if name else None)
+        self._tasks.add(task)
+        task.add_done_callback(self._on_done)
+        return task
+
+    def _on_done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f'Background task {task.get_name()} failed: {task.exception()}')
+
+    async def close(self) -> None:
+        """
+        Cancel every task still running and wait for them to finish.
+        """
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def __len__(self) -> int:
+        return len(self._tasks)
@@ -1,18 +1,40 @@
+import asyncio
+import uuid
+from typing import Callable, List
+
 from ..handlers.auth import TokenStrategy
 from ..models.data import DataWebhookEvent
 from ..common.config import get_app_config
 from ..common.exceptions import ApiError
-from ..handlers.http import HttpHandler
+from ..handlers.http import AsyncHttpHandler, HttpHandler
+from ..handlers.limits import EgressLimiter
+from ..handlers.outbox import Outbox, OutboxConfig
 
 class DataWebhookHandler:
-    def __init__(self, token_strategy: TokenStrategy):
+    def __init__(
+        self,
+        token_strategy: TokenStrategy,
+        http_handler: HttpHandler | None = None,
+        async_http_handler: AsyncHttpHandler | None = None,
+        outbox: OutboxConfig | None = None,
+        spawn: Callable[..., asyncio.Task] | None = None,
+        limiter: EgressLimiter | None = None
+    ):
         """
         Data Handler Constructor
 
         Args:
             token_strategy (TokenStrategy): The strategy to get the auth token
+            http_handler (HttpHandler, optional): A shared HTTP handler whose connection pool is reused.
+            async_http_handler (AsyncHttpHandler, optional): A shared asyncio HTTP handler.
+            outbox (OutboxConfig, optional): Enables the store-and-forward outbox.
+            spawn (Callable, optional): Task factory for the outbox replay task.
+            limiter (EgressLimiter, optional): Rate and concurrency limits, shared with the other handlers.
         """
-        self._http_handler = HttpHandler(token_strategy)
+        self._http_handler = http_handler or HttpHandler(token_strategy)
+        self._async_http_handler = async_http_handler or AsyncHttpHandler(token_strategy)
+        self._limiter = limiter or EgressLimiter()
+        self.outbox = Outbox('data_webhook', self._send_outboxed, outbox, spawn) if outbox is not None else None
 
     def post_webhook(self, webhook_id: str, event: DataWebhookEvent) -> None:
         """
@@ -25,5 +47,51 @@ class DataWebhookHandler:
         settings = get_app_config()
         api_base_url = settings.XRVOYAGE_API_BASE_URL.removesuffix('/')
         url = f'{api_base_url}/data/webhook/{webhook_id}'
-        response = self._http_handler.post(url, json=event)
-        return response
\ No newline at end of file
+        with self._limiter.acquire('data_webhook'):
+            response = self._http_handler.post(url, json=event, idempotency_key=uuid.uuid4().hex)
+        return response
+
+    async def post_webhook_async(self, webhook_id: str, event: DataWebhookEvent) -> dict:
+        """
+        Send an event payload to a data webhook endpoint without leaving the event loop.
+
+        Args:
+            webhook_id (str): The webhook id.
+            event (BaseModel): the event to be sent to the webhook.
+        """
+        settings = get_app_config()
+        api_base_url = settings.XRVOYAGE_API_BASE_URL.removesuffix('/')
+        url = f'{api_base_url}/data/webhook/{webhook_id}'
+        async with self._limiter.acquire_async('data_webhook'):
+            response = await self._async_http_handler.post(url, json=event, idempotency_key=uuid.uuid4().hex)
+        return response
+
+    def enqueue_webhook(self, webhook_id: str, event: DataWebhookEvent) -> None:
+        """
+        Queue a data webhook event in the outbox. Returns immediately; the outbox
+        posts it once the API accepts it.
+
+        Args:
+            webhook_id (str): The webhook id.
+            event (BaseModel): the event to be sent to the webhook.
+
+        Raises:
+            RuntimeError: If no outbox is configured.
+        """
+        if self.outbox is None:
+            raise RuntimeError('No outbox configured for DataWebhookHandler')
+        self.outbox.put({
+            'webhook_id': webhook_id,
+            'event': event.model_dump(by_alias=True, exclude_none=True),
+            'key': uuid.uuid4().hex,
+        })
+
+    async def _send_outboxed(self, records: List[dict]) -> None:
+        # The endpoint takes one event per request; a failure part way through
+        # makes the outbox retry the whole batch.
+        settings = get_app_config()
+        api_base_url = settings.XRVOYAGE_API_BASE_URL.removesuffix('/')
+        for record in records:
+            url = f'{api_base_url}/data/webhook/{record["webhook_id"]}'
+            async with self._limiter.acquire_async('data_webhook'):
+                await self._async_http_handler.post(url, json=record['event'], idempotency_key=record['key'])
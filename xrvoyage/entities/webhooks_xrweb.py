@@ -1,18 +1,43 @@
+import asyncio
+import hashlib
+import uuid
+from typing import Callable, List
+
 from ..handlers.auth import TokenStrategy
 from ..models.events import XRWebhookEventBatch, XRWebhookEvent
+from ..common.codec import EncodedJson
 from ..common.config import get_app_config
 from ..common.exceptions import ApiError
-from ..handlers.http import HttpHandler
+from ..handlers.batcher import CHANNELS
+from ..handlers.http import AsyncHttpHandler, HttpHandler
+from ..handlers.limits import EgressLimiter
+from ..handlers.outbox import Outbox, OutboxConfig
 
 class Webhooks_XRWebHandler:
-    def __init__(self, token_strategy: TokenStrategy):
+    def __init__(
+        self,
+        token_strategy: TokenStrategy,
+        http_handler: HttpHandler | None = None,
+        async_http_handler: AsyncHttpHandler | None = None,
+        outbox: OutboxConfig | None = None,
+        spawn: Callable[..., asyncio.Task] | None = None,
+        limiter: EgressLimiter | None = None
+    ):
         """
         Constructor for the XR Events Handler
 
         Args:
             token_strategy (TokenStrategy): The strategy to get the auth token
+            http_handler (HttpHandler, optional): A shared HTTP handler whose connection pool is reused.
+            async_http_handler (AsyncHttpHandler, optional): A shared asyncio HTTP handler.
+            outbox (OutboxConfig, optional): Enables the store-and-forward outbox.
+            spawn (Callable, optional): Task factory for the outbox replay task.
+            limiter (EgressLimiter, optional): Rate and concurrency limits, shared with the other handlers.
         """
-        self._http_handler = HttpHandler(token_strategy)
+        self._http_handler = http_handler or HttpHandler(token_strategy)
+        self._async_http_handler = async_http_handler or AsyncHttpHandler(token_strategy)
+        self._limiter = limiter or EgressLimiter()
+        self.outbox = Outbox('xrweb', self._send_outboxed, outbox, spawn) if outbox is not None else None
 
     def post_event_as_batch(self, event_batch: XRWebhookEventBatch) -> dict:
         """
@@ -24,7 +49,8 @@ class Webhooks_XRWebHandler:
         settings = get_app_config()
         api_base_url = settings.XRVOYAGE_API_BASE_URL
         url = f'{api_base_url}/webhooks/xrweb'
-        response = self._http_handler.post(url, json=event_batch.model_dump(by_alias=True))
+        with self._limiter.acquire('xrweb'):
+            response = self._http_handler.post(url, json=event_batch, idempotency_key=uuid.uuid4().hex)
         return response
 
     def post_event(self, event: XRWebhookEvent) -> dict:
@@ -37,5 +63,69 @@ class Webhooks_XRWebHandler:
         settings = get_app_config()
         api_base_url = settings.XRVOYAGE_API_BASE_URL
         url = f'{api_base_url}/webhooks/xrweb'
-        response = self._http_handler.post(url, json=event.model_dump(by_alias=True))
+        with self._limiter.acquire('xrweb'):
+            response = self._http_handler.post(url, json=event, idempotency_key=uuid.uuid4().hex)
         return response
+
+    async def post_event_as_batch_async(self, event_batch: XRWebhookEventBatch | EncodedJson) -> dict:
+        """
+        Send an event batch to the API without leaving the event loop
+
+        Args:
+            event_batch (XRWebhookEventBatch | EncodedJson): the event batch to be sent to the API,
+                or its already serialized JSON
+        """
+        settings = get_app_config()
+        api_base_url = settings.XRVOYAGE_API_BASE_URL
+        url = f'{api_base_url}/webhooks/xrweb'
+        async with self._limiter.acquire_async('xrweb'):
+            response = await self._async_http_handler.post(url, json=event_batch, idempotency_key=uuid.uuid4().hex)
+        return response
+
+    async def post_event_async(self, event: XRWebhookEvent) -> dict:
+        """
+        Send an event to the API without leaving the event loop
+
+        Args:
+            event (XRWebhookEvent): the event to be sent to the API
+        """
+        settings = get_app_config()
+        api_base_url = settings.XRVOYAGE_API_BASE_URL
+        url = f'{api_base_url}/webhooks/xrweb'
+        async with self._limiter.acquire_async('xrweb'):
+            response = await self._async_http_handler.post(url, json=event, idempotency_key=uuid.uuid4().hex)
+        return response
+
+    def enqueue_event(self, event: XRWebhookEvent, channel: str = 'xr.data') -> None:
+        """
+        Queue an event in the outbox. Returns immediately; the outbox posts it,
+        batched with its neighbours, once the API accepts it.
+
+        Args:
+            event (XRWebhookEvent): the event to be sent to the API
+            channel (str): One of 'xr.rt', 'xr.data' or 'xr.nrt'.
+
+        Raises:
+            RuntimeError: If no outbox is configured.
+            ValueError: If the channel is unknown.
+        """
+        if self.outbox is None:
+            raise RuntimeError('No outbox configured for Webhooks_XRWebHandler')
+        if channel not in CHANNELS:
+            raise ValueError(f'Unknown egress channel: {channel}')
+        self.outbox.put({
+            'channel': channel,
+            'event': event.model_dump(by_alias=True, exclude_none=True),
+            'key': uuid.uuid4().hex,
+        })
+
+    async def _send_outboxed(self, records: List[dict]) -> None:
+        event_batch = {}
+        for record in records:
+            event_batch.setdefault(record['channel'], []).append(record['event'])
+        # The same records always get the same key, however often the outbox resends them
+        idempotency_key = hashlib.sha256(''.join(record['key'] for record in records).encode()).hexdigest()[:32]
+        settings = get_app_config()
+        url = f'{settings.XRVOYAGE_API_BASE_URL}/webhooks/xrweb'
+        async with self._limiter.acquire_async('xrweb'):
+            await self._async_http_handler.post(url, json=event_batch, idempotency_key=idempotency_key)
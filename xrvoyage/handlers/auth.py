@@ -1,22 +1,30 @@
 from abc import ABC, abstractmethod
+import asyncio
+import threading
 import time
+from typing import Callable
 
 import jwt
+import pydantic
 import requests
 import logzero
 
 from xrvoyage.common.config import get_app_config
 from xrvoyage.common.exceptions import InvalidCredentialsError
+from xrvoyage.common.metrics import metrics
+from xrvoyage.handlers.token_cache import FileTokenCache
 
 
-def _is_token_expired(token: str) -> bool:
+# Tokens are treated as expired this many seconds before their exp claim
+_EXPIRY_LEEWAY = 60
+# How much earlier than the leeway the background refresher renews at the latest
+_REFRESH_MARGIN = 5
+
+
+def _token_expiry(token: str) -> float:
     try:
         payload = jwt.decode(token, options={"verify_signature": False})
-        exp = payload.get('exp', 0)
-        current_time = time.time()
-        if current_time > exp or current_time >= (exp - 60):
-            return True
-        return False
+        return float(payload.get('exp', 0))
     except Exception as e:
         logzero.logger.debug('Token could not be decoded', e)
         raise InvalidCredentialsError('Could not decode token')
@@ -27,11 +35,52 @@ class TokenStrategy(ABC):
     def   get_token(self):
         raise NotImplementedError
 
+    async def get_token_async(self) -> str:
+        """
+        get_token for callers on the event loop. get_token may block on a login
+        or refresh round trip, so by default it runs in a worker thread.
+        """
+        return await asyncio.to_thread(self.get_token)
+
+    @property
+    def can_refresh(self) -> bool:
+        """
+        Whether the strategy can renew its token ahead of expiry.
+        """
+        return False
+
+    def expires_at(self) -> float | None:
+        """
+        Unix time the current token expires at, or None when there is no token yet.
+        """
+        return None
+
+    def refresh(self) -> None:
+        """
+        Renew the token now, regardless of its expiry.
+        """
+        raise NotImplementedError
+
 
 class _AccessAndSecretKeyTokenStrategy(TokenStrategy):
-    def __init__(self):
+    def __init__(self, token_cache: FileTokenCache | None = None):
+        self._token_cache = token_cache
         self._access_token = None
         self._refresh_token = None
+        # Expiry of each token, decoded once when the token is stored
+        self._access_expires_at = 0.0
+        self._refresh_expires_at = 0.0
+        self._lock = threading.Lock()
+        self.logins = 0
+        self.refreshes = 0
+
+    def _store_tokens(self, raw_data: dict) -> None:
+        access_token = raw_data['access_token']
+        refresh_token = raw_data['refresh_token']
+        self._access_expires_at = _token_expiry(access_token)
+        self._refresh_expires_at = _token_expiry(refresh_token)
+        self._access_token = access_token
+        self._refresh_token = refresh_token
 
     def _login(self):
         settings = get_app_config()
@@ -46,9 +95,9 @@ class _AccessAndSecretKeyTokenStrategy(TokenStrategy):
         if not response.ok:
             raise InvalidCredentialsError(msg='Invalid access or secret key.')
 
-        raw_data = response.json()
-        self._access_token = raw_data['access_token']
-        self._refresh_token = raw_data['refresh_token']
+        self._store_tokens(response.json())
+        self.logins += 1
+        metrics.inc('xrvoyage_token_renewals_total', kind='login')
 
     def _refresh_access_token(self):
         credentials = {
@@ -62,33 +111,227 @@ class _AccessAndSecretKeyTokenStrategy(TokenStrategy):
         if not response.ok:
             raise InvalidCredentialsError(msg='Could not refresh access token')
 
-        raw_data = response.json()
-        self._access_token = raw_data['access_token']
-        self._refresh_token = raw_data['refresh_token']
-
-    def get_token(self):
+        self._store_tokens(response.json())
+        self.refreshes += 1
+        metrics.inc('xrvoyage_token_renewals_total', kind='refresh')
+
+    def _access_token_valid(self) -> bool:
+        return self._access_token is not None and time.time() < self._access_expires_at - _EXPIRY_LEEWAY
+
+    def _renew(self) -> None:
+        if self._token_cache is None:
+            self._renew_tokens()
+            return
+
+        access_key_id = get_app_config().XRVOYAGE_ACCESS_KEY_ID
+        # The file lock makes renewal single flight across processes as well
+        with self._token_cache.lock():
+            cached = self._token_cache.load(access_key_id)
+            if cached is not None and self._adopt_cached_tokens(cached) and self._access_token_valid():
+                logzero.logger.debug('Using tokens from the token cache')
+                return
+            self._renew_tokens()
+            self._token_cache.store(access_key_id, self._access_token, self._refresh_token)
+
+    def _adopt_cached_tokens(self, cached: dict) -> bool:
+        """
+        Take over cached tokens if they are newer than the ones held in memory.
+        """
+        try:
+            if _token_expiry(cached['access_token']) <= self._access_expires_at:
+                return False
+            self._store_tokens(cached)
+        except InvalidCredentialsError:
+            return False
+        return True
+
+    def _renew_tokens(self) -> None:
+        if self._refresh_token is None or time.time() >= self._refresh_expires_at - _EXPIRY_LEEWAY:
+            self._login()
+            return
 
-        if self._refresh_token is None or _is_token_expired(self._refresh_token):
+        try:
+            self._refresh_access_token()
+        except InvalidCredentialsError:
+            logzero.logger.debug('Failed to refresh access token. Attempting to login ...')
             self._login()
 
-        if _is_token_expired(self._access_token):
-            try:
-                self._refresh_access_token()
-            except InvalidCredentialsError:
-                logzero.logger.debug('Failed to refresh access token. Attempting to login ...')
-                self._login()
+    @property
+    def can_refresh(self) -> bool:
+        return True
+
+    def expires_at(self) -> float | None:
+        return self._access_expires_at if self._access_token is not None else None
 
-        return self._access_token
+    def refresh(self) -> None:
+        with self._lock:
+            self._renew()
+
+    async def get_token_async(self) -> str:
+        # A valid token is returned inline, only a renewal leaves the event loop
+        if self._access_token_valid():
+            return self._access_token
+        return await asyncio.to_thread(self.get_token)
+
+    def get_token(self):
+        # Hot path: a timestamp compare against the cached expiry
+        if self._access_token_valid():
+            return self._access_token
+
+        # Single flight: concurrent callers wait for the one renewal in progress
+        with self._lock:
+            if not self._access_token_valid():
+                self._renew()
+            return self._access_token
 
 
 class _TemporaryTokenStrategy(TokenStrategy):
+    def __init__(self):
+        self._token = None
+        self._expires_at = 0.0
+
     def get_token(self):
         settings = get_app_config()
         token = settings.XRVOYAGE_SESSION_TOKEN
-        if _is_token_expired(token):
+        if token != self._token:
+            self._expires_at = _token_expiry(token)
+            self._token = token
+        if time.time() >= self._expires_at - _EXPIRY_LEEWAY:
             raise InvalidCredentialsError('The provided XRVOYAGE_SESSION_TOKEN is expired.')
         return token
 
+    async def get_token_async(self) -> str:
+        # Never blocks: the token comes from the settings
+        return self.get_token()
+
+
+class TokenRefreshConfig(pydantic.BaseModel):
+    """
+    Settings for renewing the access token in the background.
+
+    The token is renewed lead_seconds before it expires, which must be more than the
+    60 second leeway get_token applies so requests never renew it themselves. The
+    lead is capped at max_lead_fraction of the token's lifetime, so tokens issued
+    for less than lead_seconds are not renewed back to back, but never below that
+    leeway plus a few seconds. Only tokens that live shorter than the leeway are
+    left to the requests to renew. After a failed renewal
+    the refresher retries every retry_delay seconds. min_interval is the shortest
+    time between two renewals.
+    """
+    lead_seconds: float = 120.0
+    max_lead_fraction: float = 0.5
+    retry_delay: float = 5.0
+    min_interval: float = 1.0
+
+
+class TokenRefresher:
+    def __init__(
+        self,
+        token_strategy: TokenStrategy,
+        config: TokenRefreshConfig | None = None,
+        spawn: Callable[..., asyncio.Task] | None = None
+    ) -> None:
+        """
+        Background Token Refresher Constructor
+
+        Renews the token ahead of expiry from a task on the event loop. The blocking
+        HTTP round trip runs in the default executor so the loop is never held up.
+
+        Args:
+            token_strategy (TokenStrategy): The strategy whose token is kept fresh.
+            config (TokenRefreshConfig, optional): Lead time and retry settings.
+            spawn (Callable, optional): Task factory for the refresher, defaults to asyncio.create_task.
+        """
+        self._token_strategy = token_strategy
+        self._spawn = spawn or asyncio.create_task
+        self._config = config or TokenRefreshConfig()
+        self._task: asyncio.Task | None = None
+        self._tracked_expiry: float | None = None
+        self._tracked_since = 0.0
+        self.refreshes = 0
+        self.failures = 0
+        self.last_latency: float | None = None
+        self.max_latency = 0.0
+        self._total_latency = 0.0
+        self.last_error: str | None = None
+
+    def start(self) -> None:
+        """
+        Start the refresher task. Does nothing for strategies that cannot refresh.
+        """
+        if not self._token_strategy.can_refresh:
+            logzero.logger.debug('Token strategy cannot refresh, background refresh disabled')
+            return
+        if self._task is None or self._task.done():
+            self._task = self._spawn(self._run(), name='token-refresher')
+
+    async def stop(self) -> None:
+        """
+        Stop the refresher task.
+        """
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    def _next_delay(self) -> float:
+        expires_at = self._token_strategy.expires_at()
+        if expires_at is None:
+            return 0.0
+        now = time.time()
+        if expires_at != self._tracked_expiry:
+            # First sight of this token, which is usually just after it was issued
+            self._tracked_expiry = expires_at
+            self._tracked_since = now
+        lifetime = expires_at - self._tracked_since
+        lead = min(self._config.lead_seconds, lifetime * self._config.max_lead_fraction)
+        latest = min(_EXPIRY_LEEWAY + _REFRESH_MARGIN, self._config.lead_seconds)
+        if lifetime > latest:
+            # Renew before get_token's leeway makes requests renew the token themselves
+            lead = max(lead, latest)
+        return max(expires_at - lead - now, self._config.min_interval)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self._next_delay())
+            started = time.perf_counter()
+            try:
+                await loop.run_in_executor(None, self._token_strategy.refresh)
+            except Exception as e:
+                self.failures += 1
+                metrics.inc('xrvoyage_token_refresh_failures_total')
+                self.last_error = str(e)
+                logzero.logger.warning(f'Background token refresh failed: {e}')
+                await asyncio.sleep(self._config.retry_delay)
+                continue
+
+            latency = time.perf_counter() - started
+            metrics.observe('xrvoyage_token_refresh_seconds', latency)
+            self.refreshes += 1
+            self.last_latency = latency
+            self.max_latency = max(self.max_latency, latency)
+            self._total_latency += latency
+            logzero.logger.debug(f'Access token refreshed in the background in {latency:.3f}s')
+
+    def stats(self) -> dict:
+        """
+        Background refresh statistics.
+
+        Returns:
+            dict: Refresh and failure counts, refresh latency in seconds, and when the
+                current token expires.
+        """
+        return {
+            'refreshes': self.refreshes,
+            'failures': self.failures,
+            'last_latency': self.last_latency,
+            'max_latency': self.max_latency,
+            'avg_latency': self._total_latency / self.refreshes if self.refreshes else None,
+            'last_error': self.last_error,
+            'expires_at': self._token_strategy.expires_at(),
+        }
+
 
 def _check_credentials():
     settings = get_app_config()
@@ -136,4 +379,7 @@ def get_token_strategy() -> TokenStrategy:
     if settings.XRVOYAGE_SESSION_TOKEN is not None:
         return _TemporaryTokenStrategy()
 
-    return _AccessAndSecretKeyTokenStrategy()
+    token_cache = None
+    if settings.XRVOYAGE_TOKEN_CACHE_PATH:
+        token_cache = FileTokenCache(settings.XRVOYAGE_TOKEN_CACHE_PATH)
+    return _AccessAndSecretKeyTokenStrategy(token_cache)
@@ -0,0 +1,149 @@
+import asyncio
+from typing import Callable, Dict, List, Set, Tuple
+
+import pydantic
+from logzero import logger
+
+from ..common.codec import EncodedJson
+from ..models.events import XRWebhookEvent
+
+CHANNELS = ('xr.rt', 'xr.data', 'xr.nrt')
+
+
+class EgressBatchConfig(pydantic.BaseModel):
+    """
+    Limits for coalescing egress events into one /webhooks/xrweb POST.
+
+    A batch is sent as soon as it holds max_events events or max_bytes of
+    serialized events, or max_linger_ms after its first event was queued.
+    """
+    max_events: int = 100
+    max_bytes: int = 256 * 1024
+    max_linger_ms: float = 20.0
+
+
+class EgressBatcher:
+    def __init__(
+        self,
+        webhooks_xrweb,
+        config: EgressBatchConfig | None = None,
+        spawn: Callable[..., asyncio.Task] | None = None
+    ) -> None:
+        """
+        Egress Batcher Constructor
+
+        Args:
+            webhooks_xrweb (Webhooks_XRWebHandler): Handler used to post the coalesced batches.
+            config (EgressBatchConfig, optional): Batch size and linger limits.
+            spawn (Callable, optional): Task factory for batch sends, defaults to asyncio.create_task.
+        """
+        self._spawn = spawn or asyncio.create_task
+        self._webhooks_xrweb = webhooks_xrweb
+        self._config = config or EgressBatchConfig()
+        self._pending: List[Tuple[str, bytes, asyncio.Future]] = []
+        self._pending_bytes = 0
+        self._linger_handle: asyncio.TimerHandle | None = None
+        self._in_flight: Set[asyncio.Task] = set()
+        self.batches_sent = 0
+        self.events_sent = 0
+        self.batches_failed = 0
+
+    async def submit(self, channel: str, event: XRWebhookEvent) -> dict:
+        """
+        Queue an event for the next batch and wait for that batch to be posted.
+
+        Args:
+            channel (str): One of 'xr.rt', 'xr.data' or 'xr.nrt'.
+            event (XRWebhookEvent): The event to send.
+
+        Returns:
+            dict: The API response for the batch the event was sent in.
+
+        Raises:
+            ValueError: If the channel is unknown.
+        """
+        if channel not in CHANNELS:
+            raise ValueError(f'Unknown egress channel: {channel}')
+
+        # Serialized once, the batch body is assembled from these bytes
+        data = event.__pydantic_serializer__.to_json(event, by_alias=True, exclude_none=True)
+        if self._pending and self._pending_bytes + len(data) > self._config.max_bytes:
+            self._flush_pending()
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((channel, data, future))
+        self._pending_bytes += len(data)
+
+        if len(self._pending) >= self._config.max_events or self._pending_bytes >= self._config.max_bytes:
+            self._flush_pending()
+        elif self._linger_handle is None:
+            self._linger_handle = loop.call_later(self._config.max_linger_ms / 1000, self._flush_pending)
+
+        return await future
+
+    def _flush_pending(self) -> None:
+        if self._linger_handle is not None:
+            self._linger_handle.cancel()
+            self._linger_handle = None
+        if not self._pending:
+            return
+
+        items = self._pending
+        self._pending = []
+        self._pending_bytes = 0
+        task = self._spawn(self._send(items), name='egress-batch')
+        self._in_flight.add(task)
+        task.add_done_callback(self._in_flight.discard)
+
+    async def _send(self, items: List[Tuple[str, bytes, asyncio.Future]]) -> None:
+        grouped: Dict[str, List[bytes]] = {channel: [] for channel in CHANNELS}
+        for channel, data, _ in items:
+            grouped[channel].append(data)
+
+        try:
+            response = await self._webhooks_xrweb.post_event_as_batch_async(_encode_batch(grouped))
+        except Exception as e:
+            self.batches_failed += 1
+            logger.error(f'Egress batch of {len(items)} events failed: {e}')
+            for _, _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.batches_sent += 1
+        self.events_sent += len(items)
+        for _, _, future in items:
+            if not future.done():
+                future.set_result(dict(response) if isinstance(response, dict) else response)
+
+    async def flush(self) -> None:
+        """
+        Send whatever is queued and wait for every in-flight batch to finish.
+        """
+        self._flush_pending()
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+
+    def stats(self) -> dict:
+        """
+        Batching statistics.
+
+        Returns:
+            dict: Batches and events sent, failed batches, and events queued.
+        """
+        return {
+            'batches_sent': self.batches_sent,
+            'events_sent': self.events_sent,
+            'batches_failed': self.batches_failed,
+            'events_per_batch': self.events_sent / self.batches_sent if self.batches_sent else 0.0,
+            'pending_events': len(self._pending),
+            'in_flight_batches': len(self._in_flight),
+        }
+
+
+def _encode_batch(grouped: Dict[str, List[bytes]]) -> EncodedJson:
+    # The same JSON that serializing an XRWebhookEventBatch of these events gives
+    return EncodedJson(b'{' + b','.join(
+        b'"%s":[%s]' % (channel.encode(), b','.join(events)) for channel, events in grouped.items()
+    ) + b'}')
@@ -1,54 +1,123 @@
 import functools
 import asyncio
-import json
-from typing import Callable, Dict, List, Union, Any
+import inspect
+import logging
+import typing
+from typing import Callable, Dict, List, Type, Union, Any
 from logzero import logger
-from xrvoyage.models.events import XRWebhookEventBatch
+from xrvoyage.common.codec import DecodeError
+from xrvoyage.common.log import payload_logger
+from xrvoyage.models.events import XRWebhookEvent, XRWebhookEventBatch
 from xrvoyage.entities.webhooks_xrweb import Webhooks_XRWebHandler
+from xrvoyage.handlers.batcher import CHANNELS, EgressBatcher
+from xrvoyage.handlers.profiling import HandlerProfiler
+from xrvoyage.handlers.routing import EventRouter
 
 class DecoratorsHandlers:
-    def __init__(self, webhooks_xrweb: Webhooks_XRWebHandler, project_guid: str):
+    def __init__(
+        self,
+        webhooks_xrweb: Webhooks_XRWebHandler,
+        project_guid: str,
+        batcher: EgressBatcher | None = None,
+        profiler: HandlerProfiler | None = None
+    ):
         self.webhooks_xrweb = webhooks_xrweb
         self.project_guid = project_guid
+        self.batcher = batcher
+        self.profiler = profiler
+        self.router = EventRouter()
 
-    def eventIngress(self, event_types: Union[str, List[str]]):
+    def eventIngress(
+        self,
+        event_types: Union[str, List[str], None] = None,
+        channels: Union[str, List[str], None] = None,
+        model: Type[XRWebhookEvent] | None = None,
+        validate: bool = False
+    ):
+        """
+        Register the decorated function as an ingress handler.
+
+        Handlers receive the raw event dict unless they ask for a typed event, either
+        with model or by annotating their first parameter with XRWebhookEvent (or a
+        subclass). Typed events are only built for events routed to that handler. By
+        default they are constructed without validation, trusting the server data;
+        pass validate=True to run full pydantic validation instead.
+
+        Args:
+            event_types (str | List[str], optional): Exact event types ('xr.data.wh1'), prefix
+                patterns ('xr.rt.status.*') or '*' for every event.
+            channels (str | List[str], optional): Channel keys ('xr.rt', 'xr.data', 'xr.nrt')
+                whose events should all be handled.
+            model (Type[XRWebhookEvent], optional): Model to pass to the handler instead of a dict.
+            validate (bool): Validate typed events instead of trusting the server data.
+        """
         if isinstance(event_types, str):
             event_types = [event_types]
+        if isinstance(channels, str):
+            channels = [channels]
 
         def decorator(func: Callable[[Any, dict], None]):
+            event_model = model or _annotated_event_model(func)
+            prepare_event = _event_builder(event_model, validate) if event_model is not None else None
+
             @functools.wraps(func)
             async def async_wrapper(*args, **kwargs):
                 try:
+                    if prepare_event is not None and args and isinstance(args[0], dict):
+                        args = (prepare_event(args[0]),) + args[1:]
                     await func(*args, **kwargs)
                 except KeyError as e:
                     logger.error(f"KeyError accessing event data: {e}")
-                except json.JSONDecodeError as e:
+                except DecodeError as e:
                     logger.error(f"JSON decoding error: {e}")
                 except Exception as e:
                     logger.error(f"Unexpected error: {e}", exc_info=True)
                     raise e  # Re-raise the exception to propagate it if necessary
 
+            @functools.wraps(func)
             def wrapper(*args, **kwargs):
                 try:
+                    if prepare_event is not None and args and isinstance(args[0], dict):
+                        args = (prepare_event(args[0]),) + args[1:]
                     return func(*args, **kwargs)
                 except KeyError as e:
                     logger.error(f"KeyError accessing event data: {e}")
-                except json.JSONDecodeError as e:
+                except DecodeError as e:
                     logger.error(f"JSON decoding error: {e}")
                 except Exception as e:
                     logger.error(f"Unexpected error: {e}", exc_info=True)
                     raise e  # Re-raise the exception to propagate it if necessary
 
-            for event_type in event_types:
+            handler = async_wrapper if asyncio.iscoroutinefunction(func) else wrapper
+            # Used by the dispatch stage when the undecorated function runs in another process
+            handler.prepare_event = prepare_event
+            if self.profiler is not None:
+                handler = self.profiler.instrument(handler)
+            for event_type in event_types or []:
                 logger.debug(f'Registering eventIngress handler for event type: {event_type}')
-                if asyncio.iscoroutinefunction(func):
-                    DecoratorsHandlers.event_handlers[event_type] = async_wrapper
-                else:
-                    DecoratorsHandlers.event_handlers[event_type] = wrapper
+                self.router.add(event_type, handler)
+            for channel in channels or []:
+                logger.debug(f'Registering eventIngress handler for channel: {channel}')
+                self.router.add_channel(channel, handler)
             return func
         return decorator
 
-    def eventEgress(self, event_type: str):
+    def eventEgress(self, event_type: str, channel: str = "xr.data"):
+        """
+        Decorator posting the event the decorated coroutine returns. The event goes
+        through the outbox or the batcher when either is configured, and is
+        posted on its own otherwise.
+
+        Args:
+            event_type (str): Type of the posted event.
+            channel (str): One of 'xr.rt', 'xr.data' or 'xr.nrt'.
+
+        Raises:
+            ValueError: If the channel is unknown.
+        """
+        if channel not in CHANNELS:
+            raise ValueError(f'Unknown egress channel: {channel}')
+
         def decorator(func: Callable[..., Any]):
             @functools.wraps(func)
             async def async_wrapper(instance, *args, **kwargs):
@@ -56,23 +125,31 @@ class DecoratorsHandlers:
                     event_details = await func(instance, *args, **kwargs)
                     event_args = event_details.get('args', {})
 
-                    payload_dict = {
-                        "xr.data": [
-                            {
-                                "project_guid": self.project_guid,
-                                "type": event_type,
-                                "args": event_args  # Ensure args contains the full dictionary with xrvoyage_game key
-                            }
-                        ]
-                    }
-
-                    event_batch = XRWebhookEventBatch(**payload_dict)
-                    event_json = event_batch.model_dump_json(indent=4, by_alias=True, exclude_unset=True)
-                    logger.debug(f"EVENT XR.DATA EGRESS: {event_json}")
-                    response = await asyncio.get_event_loop().run_in_executor(None, self.webhooks_xrweb.post_event_as_batch, event_batch)
+                    event = XRWebhookEvent(
+                        project_guid=self.project_guid,
+                        type=event_type,
+                        args=event_args  # Ensure args contains the full dictionary with xrvoyage_game key
+                    )
+
+                    log_egress = payload_logger.should_log(logging.DEBUG, 'egress')
+                    if self.webhooks_xrweb.outbox is not None:
+                        if log_egress:
+                            logger.debug("EVENT %s EGRESS (outbox): %s", channel, payload_logger.payload(event))
+                        self.webhooks_xrweb.enqueue_event(event, channel)
+                        return None
+                    elif self.batcher is not None:
+                        if log_egress:
+                            logger.debug("EVENT %s EGRESS (batched): %s", channel, payload_logger.payload(event))
+                        response = await self.batcher.submit(channel, event)
+                    else:
+                        event_batch = XRWebhookEventBatch(**{channel: [event]})
+                        if log_egress:
+                            logger.debug("EVENT %s EGRESS: %s", channel, payload_logger.payload(event_batch))
+                        response = await self.webhooks_xrweb.post_event_as_batch_async(event_batch)
 
                     # Log the response
-                    logger.debug(f"Egress response: {response}")
+                    if log_egress:
+                        logger.debug("Egress response: %s", response)
                     if isinstance(response, dict):
                         if response.get('message', '').lower() == 'success':
                             logger.info("Event egress successfully processed")
@@ -85,7 +162,7 @@ class DecoratorsHandlers:
 
                 except KeyError as e:
                     logger.error(f"KeyError accessing event data: {e}")
-                except json.JSONDecodeError as e:
+                except DecodeError as e:
                     logger.error(f"JSON decoding error: {e}")
                 except Exception as e:
                     logger.error(f"Unexpected error: {e}", exc_info=True)
@@ -94,4 +171,25 @@ class DecoratorsHandlers:
             return async_wrapper
         return decorator
 
-    event_handlers: Dict[str, Callable[[dict], None]] = {}
+
+def _annotated_event_model(func: Callable) -> Type[XRWebhookEvent] | None:
+    """
+    Returns the XRWebhookEvent model the first parameter of func is annotated with, if any.
+    """
+    try:
+        parameters = list(inspect.signature(func).parameters.values())
+        hints = typing.get_type_hints(func)
+    except (TypeError, ValueError, NameError):
+        return None
+    if not parameters:
+        return None
+    annotation = hints.get(parameters[0].name)
+    if inspect.isclass(annotation) and issubclass(annotation, XRWebhookEvent):
+        return annotation
+    return None
+
+
+def _event_builder(event_model: Type[XRWebhookEvent], validate: bool) -> Callable[[dict], XRWebhookEvent]:
+    if validate:
+        return event_model.model_validate
+    return event_model.from_trusted
@@ -0,0 +1,194 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, List, Literal
+
+import pydantic
+from logzero import logger
+
+from ..common.metrics import metrics
+
+
+class DispatchConfig(pydantic.BaseModel):
+    """
+    Settings for the ingress dispatch stage between the websocket and the handlers.
+
+    queue_size bounds the number of events waiting for a worker and workers is
+    the number of tasks draining it. sync_executor decides where sync handlers
+    run: 'inline' on the event loop, or on a 'thread' or 'process' pool of
+    sync_pool_size workers. overflow decides what happens when the queue is
+    full: 'block' the websocket reader, 'drop_oldest' queued event, or
+    'drop_newest' (the incoming one).
+    """
+    queue_size: int = 1000
+    workers: int = 4
+    sync_executor: Literal['inline', 'thread', 'process'] = 'inline'
+    sync_pool_size: int | None = None
+    overflow: Literal['block', 'drop_oldest', 'drop_newest'] = 'block'
+
+
+class EventDispatcher:
+    def __init__(
+        self,
+        config: DispatchConfig | None = None,
+        spawn: Callable[..., asyncio.Task] | None = None
+    ) -> None:
+        """
+        Event Dispatcher Constructor
+
+        Args:
+            config (DispatchConfig, optional): Queue, worker and overflow settings.
+            spawn (Callable, optional): Task factory for the workers, defaults to asyncio.create_task.
+        """
+        self._config = config or DispatchConfig()
+        self._spawn = spawn or asyncio.create_task
+        self._queue: asyncio.Queue | None = None
+        self._workers: List[asyncio.Task] = []
+        self._executor: Executor | None = None
+        self.enqueued = 0
+        self.processed = 0
+        self.failed = 0
+        self.dropped_oldest = 0
+        self.dropped_newest = 0
+        self.blocked = 0
+        self.blocked_seconds = 0.0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    def start(self) -> None:
+        """
+        Create the queue, the worker tasks and the sync handler pool. Must be
+        called from within the running event loop; calling it again is a no-op.
+        """
+        if self.running:
+            return
+
+        self._queue = asyncio.Queue(maxsize=self._config.queue_size)
+        metrics.gauge_callback('xrvoyage_dispatch_queue_depth', self._queue.qsize)
+        if self._config.sync_executor == 'thread':
+            self._executor = ThreadPoolExecutor(
+                max_workers=self._config.sync_pool_size,
+                thread_name_prefix='xrvoyage-dispatch'
+            )
+        elif self._config.sync_executor == 'process':
+            self._executor = ProcessPoolExecutor(max_workers=self._config.sync_pool_size)
+        self._workers = [
+            self._spawn(self._worker(), name=f'dispatch-worker-{n}') for n in range(self._config.workers)
+        ]
+        logger.debug(f'Started {len(self._workers)} dispatch workers ({self._config.sync_executor} sync handlers)')
+
+    async def put(self, event_type: str, handler: Callable, event_data: dict) -> bool:
+        """
+        Queue an event for its handler, applying the overflow policy when the queue is full.
+
+        Args:
+            event_type (str): The event type, used for logging.
+            handler (Callable): The registered handler.
+            event_data (dict): The event passed to the handler.
+
+        Returns:
+            bool: False if the event was dropped.
+        """
+        item = (event_type, handler, event_data)
+        if self._queue.full():
+            if self._config.overflow == 'drop_newest':
+                self.dropped_newest += 1
+                metrics.inc('xrvoyage_dispatch_dropped_total', policy='drop_newest')
+                logger.debug(f'Dispatch queue full, dropping incoming {event_type}')
+                return False
+            if self._config.overflow == 'drop_oldest':
+                dropped_type, _, _ = self._queue.get_nowait()
+                self._queue.task_done()
+                self.dropped_oldest += 1
+                metrics.inc('xrvoyage_dispatch_dropped_total', policy='drop_oldest')
+                logger.debug(f'Dispatch queue full, dropping queued {dropped_type}')
+            else:
+                self.blocked += 1
+                started = time.monotonic()
+                await self._queue.put(item)
+                self.blocked_seconds += time.monotonic() - started
+                self.enqueued += 1
+                return True
+
+        self._queue.put_nowait(item)
+        self.enqueued += 1
+        return True
+
+    async def _worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            event_type, handler, event_data = await self._queue.get()
+            started = time.perf_counter() if metrics.enabled else None
+            outcome = 'ok'
+            try:
+                if asyncio.iscoroutinefunction(handler):
+                    await handler(event_data)
+                elif self._executor is None:
+                    handler(event_data)
+                elif isinstance(self._executor, ProcessPoolExecutor):
+                    # The decorator wrappers are closures and cannot be pickled,
+                    # so the undecorated module-level function is sent instead.
+                    prepare_event = getattr(handler, 'prepare_event', None)
+                    if prepare_event is not None:
+                        event_data = prepare_event(event_data)
+                    await loop.run_in_executor(self._executor, getattr(handler, '__wrapped__', handler), event_data)
+                else:
+                    await loop.run_in_executor(self._executor, handler, event_data)
+                self.processed += 1
+            except Exception as e:
+                self.failed += 1
+                outcome = 'error'
+                logger.error(f"Error handling event {event_type}: {e}")
+            finally:
+                self._queue.task_done()
+                if started is not None:
+                    metrics.observe('xrvoyage_handler_seconds', time.perf_counter() - started, event_type=event_type)
+                    metrics.inc('xrvoyage_handler_calls_total', event_type=event_type, outcome=outcome)
+
+    async def join(self) -> None:
+        """
+        Wait until every queued event has been handled.
+        """
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def stop(self, drain: bool = True) -> None:
+        """
+        Stop the workers and shut down the sync handler pool.
+
+        Args:
+            drain (bool): Wait for queued events to be handled before stopping.
+        """
+        if not self.running:
+            return
+        if drain:
+            await self._queue.join()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        """
+        Dispatch statistics.
+
+        Returns:
+            dict: Queue depth and the enqueued, processed, failed, dropped and blocked counters.
+        """
+        return {
+            'queue_depth': self._queue.qsize() if self._queue is not None else 0,
+            'queue_size': self._config.queue_size,
+            'workers': len(self._workers),
+            'enqueued': self.enqueued,
+            'processed': self.processed,
+            'failed': self.failed,
+            'dropped_oldest': self.dropped_oldest,
+            'dropped_newest': self.dropped_newest,
+            'blocked': self.blocked,
+            'blocked_seconds': self.blocked_seconds,
+        }
@@ -1,24 +1,217 @@
+import asyncio
+import gzip
+import logging
+import threading
+import time
+from typing import Literal
+from urllib.parse import urlsplit
+
+import aiohttp
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ReadTimeoutError
+from urllib3.util.retry import Retry
 from pydantic import BaseModel
+import pydantic
 import logzero
 
-class ApiError(Exception):
-    def __init__(self, status_code, body):
-        self.status_code = status_code
-        self.body = body
-        super().__init__(f"API Error {status_code}: {body}")
+from ..common.codec import EncodedJson, get_codec
+from ..common.exceptions import ApiError
+from ..common.log import payload_logger
+from ..common.metrics import endpoint_label, metrics
+from .retry import IDEMPOTENCY_HEADER, IDEMPOTENT_METHODS, RetryEngine, RetryPolicy, parse_retry_after
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the installed extras
+    zstandard = None
+
+
+class HttpPoolConfig(pydantic.BaseModel):
+    """
+    Connection pool settings for HttpHandler.
+
+    pool_connections is the number of per-host pools kept around, pool_maxsize
+    is the number of keep-alive connections kept per host. When pool_block is
+    set, callers wait for a free connection instead of opening a throwaway one.
+    idle_reset_retries is how many times a request is resent when a pooled
+    keep-alive connection turns out to have been closed by the server while idle.
+    Only idempotent methods and requests carrying an Idempotency-Key are
+    resent, since the server may have processed the request before the
+    connection dropped.
+    """
+    pool_connections: int = 10
+    pool_maxsize: int = 10
+    pool_block: bool = False
+    keep_alive: bool = True
+    idle_reset_retries: int = 1
+
+
+class CompressionConfig(pydantic.BaseModel):
+    """
+    Request body compression for HttpHandler and AsyncHttpHandler.
+
+    JSON bodies of at least min_bytes are compressed with algorithm, 'gzip' or
+    'zstd' (needs the zstandard package). A host that answers 415 to a
+    compressed body is sent uncompressed bodies from then on.
+    """
+    algorithm: Literal['gzip', 'zstd'] = 'gzip'
+    min_bytes: int = 1024
+    level: int | None = None
+
+
+class _BodyCompressor:
+    """
+    Compresses request bodies and remembers the hosts that refused them.
+    """
+
+    def __init__(self, config: CompressionConfig) -> None:
+        if config.algorithm == 'zstd' and zstandard is None:
+            raise ImportError("Compression algorithm is 'zstd' but zstandard is not installed")
+        self._config = config
+        self.encoding = config.algorithm
+        self._unsupported_hosts = set()
+        self._lock = threading.Lock()
+        self.bodies_compressed = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.fallbacks = 0
+
+    def compress(self, url: str, body: bytes) -> bytes | None:
+        if len(body) < self._config.min_bytes or urlsplit(url).netloc in self._unsupported_hosts:
+            return None
+        if self.encoding == 'zstd':
+            compressed = zstandard.ZstdCompressor(level=self._config.level or 3).compress(body)
+        else:
+            compressed = gzip.compress(body, compresslevel=self._config.level or 6, mtime=0)
+        if len(compressed) >= len(body):
+            return None
+        with self._lock:
+            self.bodies_compressed += 1
+            self.bytes_in += len(body)
+            self.bytes_out += len(compressed)
+        return compressed
+
+    def reject(self, url: str) -> None:
+        host = urlsplit(url).netloc
+        logzero.logger.warning(f'{host} does not accept {self.encoding} request bodies, sending them uncompressed')
+        with self._lock:
+            self._unsupported_hosts.add(host)
+            self.fallbacks += 1
+
+    def stats(self) -> dict:
+        return {
+            'encoding': self.encoding,
+            'bodies_compressed': self.bodies_compressed,
+            'bytes_in': self.bytes_in,
+            'bytes_out': self.bytes_out,
+            'ratio': self.bytes_out / self.bytes_in if self.bytes_in else 1.0,
+            'fallbacks': self.fallbacks,
+        }
+
+
+def _record_request(method: str, url: str, outcome: str, seconds: float) -> None:
+    endpoint = endpoint_label(urlsplit(url).path)
+    metrics.observe('xrvoyage_http_request_seconds', seconds, method=method, endpoint=endpoint)
+    metrics.inc('xrvoyage_http_requests_total', method=method, endpoint=endpoint, outcome=outcome)
+
+
+def _keyed_post(method: str, headers: dict) -> bool:
+    return method.upper() not in IDEMPOTENT_METHODS and IDEMPOTENCY_HEADER in headers
+
+
+def _encode_json(codec, payload) -> bytes:
+    """
+    Serializes a request body. Models go through pydantic-core straight to JSON
+    bytes in a single pass, without an intermediate dict. EncodedJson is sent as is.
+    """
+    if isinstance(payload, EncodedJson):
+        return bytes(payload)
+    if isinstance(payload, BaseModel):
+        return payload.__pydantic_serializer__.to_json(payload, by_alias=True, exclude_none=True)
+    return codec.dumps(payload)
+
+
+class _IdleResetRetry(Retry):
+    """
+    Retries connection-level failures only. A read timeout means the server may
+    have processed the request, so it is raised instead of being resent. Read
+    and protocol errors are only retried for idempotent methods; HttpHandler
+    resends requests with an Idempotency-Key itself, as urllib3 cannot see headers.
+    """
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        if isinstance(error, ReadTimeoutError):
+            raise error
+        return super().increment(method, url, response, error, _pool, _stacktrace)
+
 
 class HttpHandler:
-    def __init__(self, token_strategy):
+    def __init__(
+        self,
+        token_strategy,
+        pool: HttpPoolConfig | None = None,
+        retry: RetryPolicy | None = None,
+        compression: CompressionConfig | None = None
+    ):
         """
         HTTP Handler Constructor
 
         Args:
             token_strategy (TokenStrategy): The strategy to get the auth token
+            pool (HttpPoolConfig, optional): Connection pool settings.
+            retry (RetryPolicy, optional): Retry settings, by default requests are not retried.
+            compression (CompressionConfig, optional): Compress large request bodies.
         """
         self._token_strategy = token_strategy
+        self._pool_config = pool or HttpPoolConfig()
+        self._session = self._create_session(self._pool_config)
+        self._retry = RetryEngine(retry)
+        self._compressor = _BodyCompressor(compression) if compression is not None else None
+        self._codec = get_codec()
+        self._lock = threading.Lock()
+        self._requests_sent = 0
+
+    @staticmethod
+    def _create_session(config: HttpPoolConfig) -> requests.Session:
+        retries = config.idle_reset_retries
+        max_retries = _IdleResetRetry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=0,
+            other=0,
+            allowed_methods=IDEMPOTENT_METHODS,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=config.pool_connections,
+            pool_maxsize=config.pool_maxsize,
+            pool_block=config.pool_block,
+            max_retries=max_retries,
+        )
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        if not config.keep_alive:
+            session.headers['Connection'] = 'close'
+        return session
 
     def _request(self, method: str, url: str, **kwargs) -> dict:
+        if not metrics.enabled:
+            return self._send_request(method, url, **kwargs)
+        started = time.perf_counter()
+        outcome = 'error'
+        try:
+            response = self._send_request(method, url, **kwargs)
+            outcome = 'ok'
+            return response
+        except ApiError as e:
+            outcome = str(e.status_code)
+            raise
+        finally:
+            _record_request(method, url, outcome, time.perf_counter() - started)
+
+    def _send_request(self, method: str, url: str, **kwargs) -> dict:
         """
         Send an HTTP request with the specified method.
 
@@ -30,35 +223,136 @@ class HttpHandler:
             dict: The JSON response from the server.
 
         Raises:
-            ApiError: If the response status code is not 2xx.
+            ApiError: If the response status code is not 2xx once retries are exhausted.
         """
         token = self._token_strategy.get_token()
         headers = kwargs.get('headers', {})
         headers['Authorization'] = f'Bearer {token}'
+        idempotency_key = kwargs.pop('idempotency_key', None)
+        if idempotency_key is not None:
+            headers[IDEMPOTENCY_HEADER] = idempotency_key
         kwargs['headers'] = headers
 
-        if 'json' in kwargs and isinstance(kwargs['json'], BaseModel):
-            payload = kwargs['json'].dict(by_alias=True, exclude_none=True)
-            logzero.logger.debug(f"Request Payload: {payload}")
-            kwargs['json'] = payload
+        if 'json' in kwargs:
+            body = kwargs['data'] = _encode_json(self._codec, kwargs.pop('json'))
+            if payload_logger.should_log(logging.DEBUG, 'http'):
+                logzero.logger.debug("Request Payload: %s", payload_logger.payload(body))
+            headers['Content-Type'] = 'application/json'
+            compressed = self._compressor.compress(url, body) if self._compressor is not None else None
+            if compressed is not None:
+                kwargs['data'] = compressed
+                headers['Content-Encoding'] = self._compressor.encoding
+
+        with self._lock:
+            self._requests_sent += 1
+        retryable = self._retry.retryable(method, headers)
+        # urllib3 already resent idempotent methods after an idle reset
+        idle_resets_left = self._pool_config.idle_reset_retries if _keyed_post(method, headers) else 0
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                response = self._session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if idle_resets_left > 0 and not isinstance(e, requests.Timeout):
+                    # A stale keep-alive connection does not count as an attempt
+                    idle_resets_left -= 1
+                    attempt -= 1
+                    logzero.logger.debug('Pooled connection was reset, resending request')
+                    continue
+                if retryable and self._retry.should_retry(attempt, error=e):
+                    logzero.logger.debug(f'{method} {url} failed ({e}), retrying')
+                    time.sleep(self._retry.delay(attempt))
+                    continue
+                self._retry.record(attempt, success=False)
+                raise
+
+            if response.ok:
+                self._retry.record(attempt, success=True)
+                return self._codec.loads(response.content)
+
+            if response.status_code == 415 and 'Content-Encoding' in headers:
+                self._compressor.reject(url)
+                kwargs['data'] = body
+                del headers['Content-Encoding']
+                attempt -= 1
+                continue
+
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            if retryable and self._retry.should_retry(attempt, status=response.status_code):
+                logzero.logger.debug(f'{method} {url} returned {response.status_code}, retrying')
+                time.sleep(self._retry.delay(attempt, retry_after))
+                continue
+            self._retry.record(attempt, success=False)
+            raise ApiError(status_code=response.status_code, body=response.text, retry_after=retry_after)
+
+    def retry_stats(self) -> dict:
+        """
+        Retry statistics, see RetryEngine.stats.
+        """
+        return self._retry.stats()
+
+    def compression_stats(self) -> dict | None:
+        """
+        Request body compression statistics, or None when compression is off.
+
+        Returns:
+            dict: Bodies compressed, bytes before and after, and hosts fallen back to plain bodies.
+        """
+        return self._compressor.stats() if self._compressor is not None else None
 
-        response = requests.request(method, url, **kwargs)
-        if not response.ok:
-            raise ApiError(status_code=response.status_code, body=response.text)
-        return response.json()
+    def pool_stats(self) -> dict:
+        """
+        Connection reuse statistics for the pooled session.
+
+        Returns:
+            dict: Requests sent, connections opened, and the share of requests
+                that went over an already open connection.
+        """
+        connections = 0
+        pool_requests = 0
+        pools = 0
+        for adapter in {id(a): a for a in self._session.adapters.values()}.values():
+            container = adapter.poolmanager.pools
+            for key in container.keys():
+                pool = container.get(key)
+                if pool is None:
+                    continue
+                pools += 1
+                connections += pool.num_connections
+                pool_requests += pool.num_requests
+
+        reused = max(pool_requests - connections, 0)
+        return {
+            'requests': self._requests_sent,
+            'pool_requests': pool_requests,
+            'connections_opened': connections,
+            'connections_reused': reused,
+            'reuse_ratio': reused / pool_requests if pool_requests else 0.0,
+            'pools': pools,
+            'pool_maxsize': self._pool_config.pool_maxsize,
+        }
+
+    def close(self) -> None:
+        """
+        Close every pooled connection.
+        """
+        self._session.close()
 
-    def post(self, url: str, json: BaseModel) -> dict:
+    def post(self, url: str, json: BaseModel, idempotency_key: str | None = None) -> dict:
         """
         Send a POST request to a specified URL with JSON payload.
 
         Args:
             url (str): The URL to send the POST request to.
             json (BaseModel): The JSON payload to send.
+            idempotency_key (str, optional): Sent as the Idempotency-Key header so the
+                request can be retried without being applied twice.
 
         Returns:
             dict: The JSON response from the server.
         """
-        return self._request('POST', url, json=json)
+        return self._request('POST', url, json=json, idempotency_key=idempotency_key)
 
     def put(self, url: str, json: BaseModel) -> dict:
         """
@@ -97,3 +391,249 @@ class HttpHandler:
             dict: The JSON response from the server.
         """
         return self._request('DELETE', url)
+
+
+class AsyncHttpHandler:
+    def __init__(
+        self,
+        token_strategy,
+        pool: HttpPoolConfig | None = None,
+        retry: RetryPolicy | None = None,
+        compression: CompressionConfig | None = None
+    ):
+        """
+        Asyncio HTTP Handler Constructor
+
+        The aiohttp session is created lazily inside the running event loop. With
+        pool_block set, at most pool_maxsize requests per host are in flight and
+        the rest wait for a connection; otherwise concurrency is unbounded and
+        idle connections are kept alive for reuse.
+
+        Args:
+            token_strategy (TokenStrategy): The strategy to get the auth token
+            pool (HttpPoolConfig, optional): Connection pool settings.
+            retry (RetryPolicy, optional): Retry settings, by default requests are not retried.
+            compression (CompressionConfig, optional): Compress large request bodies.
+        """
+        self._token_strategy = token_strategy
+        self._pool_config = pool or HttpPoolConfig()
+        self._retry = RetryEngine(retry)
+        self._compressor = _BodyCompressor(compression) if compression is not None else None
+        self._session: aiohttp.ClientSession | None = None
+        self._codec = get_codec()
+        self._requests_sent = 0
+        self._connections_opened = 0
+        self._connections_reused = 0
+
+    def _create_session(self) -> aiohttp.ClientSession:
+        config = self._pool_config
+        connector = aiohttp.TCPConnector(
+            limit=config.pool_connections * config.pool_maxsize if config.pool_block else 0,
+            limit_per_host=config.pool_maxsize if config.pool_block else 0,
+            force_close=not config.keep_alive,
+        )
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_connection_create_end.append(self._on_connection_create)
+        trace_config.on_connection_reuseconn.append(self._on_connection_reuse)
+        return aiohttp.ClientSession(connector=connector, trace_configs=[trace_config])
+
+    async def _on_connection_create(self, session, context, params) -> None:
+        self._connections_opened += 1
+
+    async def _on_connection_reuse(self, session, context, params) -> None:
+        self._connections_reused += 1
+
+    async def _request(self, method: str, url: str, **kwargs) -> dict:
+        if not metrics.enabled:
+            return await self._send_request(method, url, **kwargs)
+        started = time.perf_counter()
+        outcome = 'error'
+        try:
+            response = await self._send_request(method, url, **kwargs)
+            outcome = 'ok'
+            return response
+        except ApiError as e:
+            outcome = str(e.status_code)
+            raise
+        finally:
+            _record_request(method, url, outcome, time.perf_counter() - started)
+
+    async def _send_request(self, method: str, url: str, **kwargs) -> dict:
+        """
+        Send an HTTP request with the specified method.
+
+        Args:
+            method (str): The HTTP method (GET, POST, PUT, DELETE).
+            url (str): The URL to send the request to.
+
+        Returns:
+            dict: The JSON response from the server.
+
+        Raises:
+            ApiError: If the response status code is not 2xx once retries are exhausted.
+        """
+        if self._session is None or self._session.closed:
+            self._session = self._create_session()
+
+        token = await self._token_strategy.get_token_async()
+        headers = kwargs.get('headers', {})
+        headers['Authorization'] = f'Bearer {token}'
+        idempotency_key = kwargs.pop('idempotency_key', None)
+        if idempotency_key is not None:
+            headers[IDEMPOTENCY_HEADER] = idempotency_key
+        kwargs['headers'] = headers
+
+        if 'json' in kwargs:
+            request_body = kwargs['data'] = _encode_json(self._codec, kwargs.pop('json'))
+            if payload_logger.should_log(logging.DEBUG, 'http'):
+                logzero.logger.debug("Request Payload: %s", payload_logger.payload(request_body))
+            headers['Content-Type'] = 'application/json'
+            compressed = self._compressor.compress(url, request_body) if self._compressor is not None else None
+            if compressed is not None:
+                kwargs['data'] = compressed
+                headers['Content-Encoding'] = self._compressor.encoding
+
+        if kwargs.get('params') is None:
+            kwargs.pop('params', None)
+
+        self._requests_sent += 1
+        retryable = self._retry.retryable(method, headers)
+        resendable = method.upper() in IDEMPOTENT_METHODS or IDEMPOTENCY_HEADER in headers
+        idle_resets_left = self._pool_config.idle_reset_retries if resendable else 0
+        attempt = 0
+        while True:
+            attempt += 1
+            error = None
+            try:
+                async with self._session.request(method, url, **kwargs) as response:
+                    if response.ok:
+                        result = self._codec.loads(await response.read())
+                        self._retry.record(attempt, success=True)
+                        return result
+                    status = response.status
+                    response_text = await response.text()
+                    retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            except (aiohttp.ServerDisconnectedError, aiohttp.ClientOSError) as e:
+                if idle_resets_left > 0:
+                    # A stale keep-alive connection does not count as an attempt
+                    idle_resets_left -= 1
+                    attempt -= 1
+                    logzero.logger.debug('Pooled connection was reset, resending request')
+                    continue
+                error = e
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                error = e
+
+            if error is not None:
+                if retryable and self._retry.should_retry(attempt, error=error):
+                    logzero.logger.debug(f'{method} {url} failed ({error}), retrying')
+                    await asyncio.sleep(self._retry.delay(attempt))
+                    continue
+                self._retry.record(attempt, success=False)
+                raise error
+
+            if status == 415 and 'Content-Encoding' in headers:
+                self._compressor.reject(url)
+                kwargs['data'] = request_body
+                del headers['Content-Encoding']
+                attempt -= 1
+                continue
+
+            if retryable and self._retry.should_retry(attempt, status=status):
+                logzero.logger.debug(f'{method} {url} returned {status}, retrying')
+                await asyncio.sleep(self._retry.delay(attempt, retry_after))
+                continue
+            self._retry.record(attempt, success=False)
+            raise ApiError(status_code=status, body=response_text, retry_after=retry_after)
+
+    def retry_stats(self) -> dict:
+        """
+        Retry statistics, see RetryEngine.stats.
+        """
+        return self._retry.stats()
+
+    def compression_stats(self) -> dict | None:
+        """
+        Request body compression statistics, or None when compression is off.
+
+        Returns:
+            dict: Bodies compressed, bytes before and after, and hosts fallen back to plain bodies.
+        """
+        return self._compressor.stats() if self._compressor is not None else None
+
+    def pool_stats(self) -> dict:
+        """
+        Connection reuse statistics for the aiohttp session.
+
+        Returns:
+            dict: Requests sent, connections opened, and the share of requests
+                that went over an already open connection.
+        """
+        total = self._connections_opened + self._connections_reused
+        return {
+            'requests': self._requests_sent,
+            'connections_opened': self._connections_opened,
+            'connections_reused': self._connections_reused,
+            'reuse_ratio': self._connections_reused / total if total else 0.0,
+        }
+
+    async def close(self) -> None:
+        """
+        Close the aiohttp session and every pooled connection.
+        """
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def post(self, url: str, json: BaseModel, idempotency_key: str | None = None) -> dict:
+        """
+        Send a POST request to a specified URL with JSON payload.
+
+        Args:
+            url (str): The URL to send the POST request to.
+            json (BaseModel): The JSON payload to send.
+            idempotency_key (str, optional): Sent as the Idempotency-Key header so the
+                request can be retried without being applied twice.
+
+        Returns:
+            dict: The JSON response from the server.
+        """
+        return await self._request('POST', url, json=json, idempotency_key=idempotency_key)
+
+    async def put(self, url: str, json: BaseModel) -> dict:
+        """
+        Send a PUT request to a specified URL with JSON payload.
+
+        Args:
+            url (str): The URL to send the PUT request to.
+            json (BaseModel): The JSON payload to send.
+
+        Returns:
+            dict: The JSON response from the server.
+        """
+        return await self._request('PUT', url, json=json)
+
+    async def get(self, url: str, params: dict = None) -> dict:
+        """
+        Send a GET request to a specified URL.
+
+        Args:
+            url (str): The URL to send the GET request to.
+            params (dict, optional): The query parameters to send.
+
+        Returns:
+            dict: The JSON response from the server.
+        """
+        return await self._request('GET', url, params=params)
+
+    async def delete(self, url: str) -> dict:
+        """
+        Send a DELETE request to a specified URL.
+
+        Args:
+            url (str): The URL to send the DELETE request to.
+
+        Returns:
+            dict: The JSON response from the server.
+        """
+        return await self._request('DELETE', url)
@@ -0,0 +1,303 @@
+import asyncio
+import collections
+import contextlib
+import threading
+import time
+from typing import AsyncIterator, Dict, Iterator
+
+import pydantic
+
+ENDPOINTS = ('xrweb', 'data_webhook')
+
+
+class RateLimit(pydantic.BaseModel):
+    """
+    Limits for one egress endpoint.
+
+    rate is the sustained number of requests per second, with up to burst
+    requests allowed back to back (None disables rate limiting). max_in_flight
+    caps concurrent requests (None for no cap), blocking and async ones together.
+    """
+    rate: float | None = None
+    burst: int = 1
+    max_in_flight: int | None = None
+
+
+class EgressLimitsConfig(pydantic.BaseModel):
+    """
+    Egress limits keyed by endpoint: 'xrweb' (/webhooks/xrweb) and
+    'data_webhook' (/data/webhook/{id}). default applies to endpoints without
+    an entry of their own.
+    """
+    endpoints: Dict[str, RateLimit] = {}
+    default: RateLimit | None = None
+
+
+class _TokenBucket:
+    """
+    Thread-safe token bucket handing out reservations: each caller is told how
+    long to wait for its token, so waiters are served in arrival order and
+    requests leave evenly spaced at the configured rate.
+    """
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self._rate = rate
+        self._burst = max(burst, 1)
+        self._tokens = float(self._burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self._tokens + (now - self._updated) * self._rate, self._burst)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self._rate
+
+
+class _Slots:
+    """
+    Concurrency slots shared by threads and event loops. A released slot is
+    handed straight to the longest waiting caller, blocking or async, so both
+    kinds of caller draw from the one cap.
+    """
+
+    def __init__(self, count: int) -> None:
+        self._free = count
+        self._waiters = collections.deque()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        with self._lock:
+            if self._free > 0 and not self._waiters:
+                self._free -= 1
+                return
+            granted = threading.Event()
+            self._waiters.append(granted)
+        try:
+            granted.wait()
+        except BaseException:
+            # Interrupted, e.g. by KeyboardInterrupt
+            with self._lock:
+                waiting = granted in self._waiters
+                if waiting:
+                    self._waiters.remove(granted)
+            if not waiting:
+                # Granted just before the interruption
+                self.release()
+            raise
+
+    async def acquire_async(self) -> None:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._free > 0 and not self._waiters:
+                self._free -= 1
+                return
+            waiter = (loop, loop.create_future())
+            self._waiters.append(waiter)
+        future = waiter[1]
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                waiting = waiter in self._waiters
+                if waiting:
+                    self._waiters.remove(waiter)
+            if not waiting and future.done() and not future.cancelled():
+                # Granted just before the cancellation landed
+                self.release()
+            raise
+
+    def release(self) -> None:
+        with self._lock:
+            if not self._waiters:
+                self._free += 1
+                return
+            waiter = self._waiters.popleft()
+        if isinstance(waiter, threading.Event):
+            waiter.set()
+            return
+        loop, future = waiter
+        try:
+            loop.call_soon_threadsafe(self._grant, future)
+        except RuntimeError:
+            # The waiter's loop is closed, pass the slot on
+            self.release()
+
+    def _grant(self, future: asyncio.Future) -> None:
+        if future.cancelled():
+            self.release()
+        else:
+            future.set_result(None)
+
+
+class EndpointLimiter:
+    def __init__(self, name: str, limit: RateLimit) -> None:
+        """
+        Endpoint Limiter Constructor
+
+        Args:
+            name (str): The endpoint name, used in stats.
+            limit (RateLimit): Rate and concurrency limits.
+        """
+        self.name = name
+        self._bucket = _TokenBucket(limit.rate, limit.burst) if limit.rate else None
+        self._max_in_flight = limit.max_in_flight
+        self._slots = _Slots(limit.max_in_flight) if limit.max_in_flight else None
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.in_flight = 0
+        self.waiting = 0
+        self.delayed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _started(self, queued_at: float) -> None:
+        wait = time.monotonic() - queued_at
+        with self._lock:
+            self.waiting -= 1
+            self.in_flight += 1
+            self.requests += 1
+            self.total_wait += wait
+            if wait > 0.001:
+                self.delayed += 1
+            self.max_wait = max(self.max_wait, wait)
+
+    def _queued(self) -> float:
+        with self._lock:
+            self.waiting += 1
+        return time.monotonic()
+
+    def _abandoned(self) -> None:
+        with self._lock:
+            self.waiting -= 1
+
+    def _finished(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    @contextlib.contextmanager
+    def acquire(self) -> Iterator[None]:
+        """
+        Block until a request may be sent and hold a concurrency slot while it runs.
+        """
+        queued_at = self._queued()
+        if self._slots is not None:
+            try:
+                self._slots.acquire()
+            except BaseException:
+                self._abandoned()
+                raise
+        try:
+            if self._bucket is not None:
+                delay = self._bucket.reserve()
+                if delay:
+                    try:
+                        time.sleep(delay)
+                    except BaseException:
+                        self._abandoned()
+                        raise
+            self._started(queued_at)
+            try:
+                yield
+            finally:
+                self._finished()
+        finally:
+            if self._slots is not None:
+                self._slots.release()
+
+    @contextlib.asynccontextmanager
+    async def acquire_async(self) -> AsyncIterator[None]:
+        """
+        Wait, without blocking the event loop, until a request may be sent and
+        hold a concurrency slot while it runs.
+        """
+        queued_at = self._queued()
+        if self._slots is not None:
+            try:
+                await self._slots.acquire_async()
+            except asyncio.CancelledError:
+                self._abandoned()
+                raise
+        try:
+            if self._bucket is not None:
+                delay = self._bucket.reserve()
+                if delay:
+                    try:
+                        await asyncio.sleep(delay)
+                    except asyncio.CancelledError:
+                        self._abandoned()
+                        raise
+            self._started(queued_at)
+            try:
+                yield
+            finally:
+                self._finished()
+        finally:
+            if self._slots is not None:
+                self._slots.release()
+
+    def stats(self) -> dict:
+        """
+        Limiter statistics.
+
+        Returns:
+            dict: Requests let through, requests in flight and waiting, and the
+                queueing delay they saw.
+        """
+        return {
+            'requests': self.requests,
+            'in_flight': self.in_flight,
+            'waiting': self.waiting,
+            'delayed': self.delayed,
+            'avg_wait_seconds': self.total_wait / self.requests if self.requests else 0.0,
+            'max_wait_seconds': self.max_wait,
+        }
+
+
+class EgressLimiter:
+    def __init__(self, config: EgressLimitsConfig | None = None) -> None:
+        """
+        Egress Limiter Constructor
+
+        One instance is shared by the webhook handlers so every request to an
+        endpoint draws from the same rate and concurrency budget.
+
+        Args:
+            config (EgressLimitsConfig, optional): Limits per endpoint; without it nothing is limited.
+        """
+        config = config or EgressLimitsConfig()
+        self._limiters: Dict[str, EndpointLimiter] = {}
+        for name in set(ENDPOINTS) | set(config.endpoints):
+            limit = config.endpoints.get(name, config.default)
+            if limit is not None:
+                self._limiters[name] = EndpointLimiter(name, limit)
+
+    def acquire(self, endpoint: str) -> contextlib.AbstractContextManager:
+        """
+        Context manager holding a permit for a blocking request to the endpoint.
+
+        Args:
+            endpoint (str): The endpoint name, e.g. 'xrweb'.
+        """
+        limiter = self._limiters.get(endpoint)
+        return limiter.acquire() if limiter is not None else contextlib.nullcontext()
+
+    def acquire_async(self, endpoint: str) -> contextlib.AbstractAsyncContextManager:
+        """
+        Async context manager holding a permit for a request to the endpoint.
+
+        Args:
+            endpoint (str): The endpoint name, e.g. 'xrweb'.
+        """
+        limiter = self._limiters.get(endpoint)
+        return limiter.acquire_async() if limiter is not None else contextlib.nullcontext()
+
+    def stats(self) -> dict:
+        """
+        Limiter statistics per limited endpoint, see EndpointLimiter.stats.
+        """
+        return {name: limiter.stats() for name, limiter in self._limiters.items()}
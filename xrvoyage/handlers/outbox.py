@@ -0,0 +1,267 @@
+import asyncio
+import collections
+import os
+import sqlite3
+import threading
+from typing import Any, Awaitable, Callable, Deque, List, Tuple
+
+import pydantic
+from logzero import logger
+
+from ..common.codec import get_codec
+
+
+class OutboxConfig(pydantic.BaseModel):
+    """
+    Store-and-forward settings for egress.
+
+    Up to memory_capacity records are held in memory. When spill_path is set,
+    records beyond that are appended to a SQLite file at that path, which also
+    keeps whatever is left unsent at shutdown for the next run. Without a
+    spill_path the memory buffer is a ring: the oldest record is dropped.
+
+    Records are replayed in order, replay_batch_size at a time, retrying with
+    exponential backoff from retry_delay up to max_retry_delay seconds.
+    Delivery is at-least-once.
+    """
+    memory_capacity: int = 10_000
+    spill_path: str | None = None
+    replay_batch_size: int = 100
+    retry_delay: float = 1.0
+    max_retry_delay: float = 30.0
+
+
+class _SpillFile:
+    """
+    Append-only SQLite table of encoded records, ordered by sequence number.
+    Usable from any thread; the outbox serializes access with its lock.
+    """
+
+    def __init__(self, path: str, table: str) -> None:
+        path = os.path.abspath(os.path.expanduser(path))
+        os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        self._table = table
+        self._db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.execute(f'CREATE TABLE IF NOT EXISTS {table} (seq INTEGER PRIMARY KEY, record BLOB NOT NULL)')
+        self.count = self._db.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+
+    def last_seq(self) -> int:
+        row = self._db.execute(f'SELECT MAX(seq) FROM {self._table}').fetchone()
+        return row[0] or 0
+
+    def append(self, rows: List[Tuple[int, bytes]]) -> None:
+        self._db.executemany(f'INSERT INTO {self._table} (seq, record) VALUES (?, ?)', rows)
+        self.count += len(rows)
+
+    def head(self, limit: int) -> List[Tuple[int, bytes]]:
+        return self._db.execute(
+            f'SELECT seq, record FROM {self._table} ORDER BY seq LIMIT ?', (limit,)
+        ).fetchall()
+
+    def remove_through(self, seq: int, count: int) -> None:
+        self._db.execute(f'DELETE FROM {self._table} WHERE seq <= ?', (seq,))
+        self.count -= count
+
+    def close(self) -> None:
+        self._db.close()
+
+
+class Outbox:
+    def __init__(
+        self,
+        name: str,
+        send: Callable[[List[Any]], Awaitable[None]],
+        config: OutboxConfig | None = None,
+        spawn: Callable[..., asyncio.Task] | None = None
+    ) -> None:
+        """
+        Outbox Constructor
+
+        put() never blocks on the network and may be called from any thread:
+        records are queued and a background task hands them to send in order,
+        in batches. A batch that fails is
+        resent, with exactly the same records, until it succeeds. While anything is spilled to disk, new records
+        are spilled too, so the order is kept.
+
+        Args:
+            name (str): Name of the outbox, also its table in the spill file.
+            send (Callable): Coroutine function posting a list of records; raises on failure.
+            config (OutboxConfig, optional): Capacity, spill and retry settings.
+            spawn (Callable, optional): Task factory for the replay task, defaults to asyncio.create_task.
+        """
+        self._name = name
+        self._send = send
+        self._config = config or OutboxConfig()
+        self._spawn = spawn or asyncio.create_task
+        self._codec = get_codec()
+        self._memory: Deque[Tuple[int, Any]] = collections.deque()
+        # Guards the queue and the spill file against put() from other threads
+        self._lock = threading.Lock()
+        self._spill = _SpillFile(self._config.spill_path, name) if self._config.spill_path else None
+        self._seq = self._spill.last_seq() if self._spill is not None else 0
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._idle: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self.records_sent = 0
+        self.batches_sent = 0
+        self.send_failures = 0
+        self.records_spilled = 0
+        self.records_dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._memory) + (self._spill.count if self._spill is not None else 0)
+
+    def put(self, record: Any) -> None:
+        """
+        Queue a record for delivery.
+
+        Args:
+            record (Any): A JSON serializable record for send.
+        """
+        with self._lock:
+            self._seq += 1
+            if self._spill is not None and (self._spill.count or len(self._memory) >= self._config.memory_capacity):
+                self._spill.append([(self._seq, self._codec.dumps(record))])
+                self.records_spilled += 1
+            else:
+                if len(self._memory) >= self._config.memory_capacity:
+                    self._memory.popleft()
+                    self.records_dropped += 1
+                self._memory.append((self._seq, record))
+        self._kick()
+
+    def _kick(self) -> None:
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is not None and self._loop in (None, running):
+            self._wake()
+        elif self._loop is not None:
+            # put() from a worker thread, wake the replay task on its own loop
+            try:
+                self._loop.call_soon_threadsafe(self._wake)
+            except RuntimeError:
+                # The loop is closed, the records are replayed once start() runs again
+                pass
+        # Otherwise there is no loop yet, the records are replayed once start() runs
+
+    def _wake(self) -> None:
+        self.start()
+        self._idle.clear()
+        self._wakeup.set()
+
+    def start(self) -> None:
+        """
+        Start replaying queued records, including any left in the spill file by a previous run.
+        """
+        if self._task is not None and not self._task.done():
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        if len(self):
+            self._wakeup.set()
+        else:
+            self._idle.set()
+        self._task = self._spawn(self._run(), name=f'outbox-{self._name}')
+
+    def _next_batch(self) -> Tuple[str, List[Tuple[int, Any]]]:
+        limit = self._config.replay_batch_size
+        with self._lock:
+            if self._memory:
+                return 'memory', [self._memory[i] for i in range(min(limit, len(self._memory)))]
+            if self._spill is not None and self._spill.count:
+                rows = self._spill.head(limit)
+            else:
+                return 'memory', []
+        return 'spill', [(seq, self._codec.loads(record)) for seq, record in rows]
+
+    async def _run(self) -> None:
+        delay = self._config.retry_delay
+        failed = None
+        while True:
+            await self._wakeup.wait()
+            # A failed batch is resent exactly as it was, even if more records have
+            # arrived since, so the retry carries the same idempotency key
+            source, batch = failed or self._next_batch()
+            if not batch:
+                self._wakeup.clear()
+                self._idle.set()
+                continue
+
+            try:
+                await self._send([record for _, record in batch])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.send_failures += 1
+                failed = source, batch
+                logger.warning(f'Outbox {self._name}: sending {len(batch)} records failed, retrying in {delay:.1f}s: {e}')
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self._config.max_retry_delay)
+                continue
+
+            failed = None
+            delay = self._config.retry_delay
+            with self._lock:
+                if source == 'memory':
+                    # put() may have dropped records from the head of the ring while the batch was in flight
+                    last_seq = batch[-1][0]
+                    while self._memory and self._memory[0][0] <= last_seq:
+                        self._memory.popleft()
+                else:
+                    self._spill.remove_through(batch[-1][0], len(batch))
+            self.records_sent += len(batch)
+            self.batches_sent += 1
+
+    async def flush(self) -> None:
+        """
+        Wait until every queued record has been delivered.
+        """
+        if not len(self):
+            return
+        self.start()
+        await self._idle.wait()
+
+    async def close(self) -> None:
+        """
+        Stop replaying. Records still in memory are written to the spill file,
+        when there is one, so the next run delivers them.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        with self._lock:
+            if self._spill is None:
+                if self._memory:
+                    logger.warning(f'Outbox {self._name}: {len(self._memory)} undelivered records discarded')
+                return
+            if self._memory:
+                # Memory records always precede the spilled ones, and keep their sequence numbers
+                self._spill.append([(seq, self._codec.dumps(record)) for seq, record in self._memory])
+                logger.info(f'Outbox {self._name}: {len(self._memory)} undelivered records kept in {self._config.spill_path}')
+                self._memory.clear()
+            self._spill.close()
+            self._spill = None
+
+    def stats(self) -> dict:
+        """
+        Outbox statistics.
+
+        Returns:
+            dict: Records queued in memory and on disk, sent, spilled and dropped, and failed sends.
+        """
+        return {
+            'queued_memory': len(self._memory),
+            'queued_spilled': self._spill.count if self._spill is not None else 0,
+            'records_sent': self.records_sent,
+            'batches_sent': self.batches_sent,
+            'send_failures': self.send_failures,
+            'records_spilled': self.records_spilled,
+            'records_dropped': self.records_dropped,
+        }
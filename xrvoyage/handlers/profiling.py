@@ -0,0 +1,332 @@
+import asyncio
+import collections
+import cProfile
+import functools
+import io
+import itertools
+import pstats
+import sys
+import threading
+import time
+import traceback
+from typing import Callable, Dict, List, Tuple
+
+import pydantic
+from logzero import logger
+
+from ..common.metrics import metrics
+
+
+class ProfilingConfig(pydantic.BaseModel):
+    """
+    Instrumentation of ingress handlers.
+
+    Every call is timed (wall and CPU time). A call still running after
+    slow_threshold_ms gets a stack sample logged, showing where it is stuck.
+    A handler occupying the event loop thread for more than
+    loop_block_threshold_ms in one go (a sync handler run inline, or an async
+    handler between two awaits) is reported as blocking the loop. None
+    disables either check.
+    """
+    slow_threshold_ms: float | None = 100.0
+    loop_block_threshold_ms: float | None = 50.0
+    stack_limit: int = 20
+
+
+class _HandlerStats:
+    __slots__ = ('calls', 'errors', 'wall_total', 'wall_max', 'cpu_total', 'slow_calls', 'loop_blocks', 'max_block')
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.errors = 0
+        self.wall_total = 0.0
+        self.wall_max = 0.0
+        self.cpu_total = 0.0
+        self.slow_calls = 0
+        self.loop_blocks = 0
+        self.max_block = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'wall_avg': self.wall_total / self.calls if self.calls else 0.0,
+            'wall_max': self.wall_max,
+            'cpu_avg': self.cpu_total / self.calls if self.calls else 0.0,
+            'slow_calls': self.slow_calls,
+            'loop_blocks': self.loop_blocks,
+            'max_loop_block': self.max_block,
+        }
+
+
+class _Call:
+    __slots__ = ('name', 'started', 'thread_id', 'coro', 'in_step', 'sampled')
+
+    def __init__(self, name: str, thread_id: int, coro=None) -> None:
+        self.name = name
+        self.started = time.perf_counter()
+        self.thread_id = thread_id
+        self.coro = coro
+        self.in_step = coro is None
+        self.sampled = False
+
+
+class _TimedCoroutine:
+    """
+    Drives a coroutine step by step, measuring CPU time and the longest step,
+    i.e. the longest stretch it held the event loop without awaiting.
+    """
+
+    def __init__(self, coro, call: _Call) -> None:
+        self._coro = coro
+        self._call = call
+        self.cpu = 0.0
+        self.max_step = 0.0
+
+    def __await__(self):
+        coro = self._coro
+        call = self._call
+        send_value, error = None, None
+        while True:
+            call.in_step = True
+            cpu_started = time.thread_time()
+            step_started = time.perf_counter()
+            try:
+                if error is not None:
+                    yielded = coro.throw(error)
+                else:
+                    yielded = coro.send(send_value)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                call.in_step = False
+                self.cpu += time.thread_time() - cpu_started
+                self.max_step = max(self.max_step, time.perf_counter() - step_started)
+            try:
+                send_value, error = (yield yielded), None
+            except BaseException as e:
+                send_value, error = None, e
+
+
+class HandlerProfiler:
+    def __init__(self, config: ProfilingConfig | None = None) -> None:
+        """
+        Handler Profiler Constructor
+
+        instrument() wraps the handlers registered with eventIngress. While any
+        instrumented call is running, a watchdog thread checks for calls past
+        the slow threshold and logs their stack once.
+
+        Args:
+            config (ProfilingConfig, optional): Thresholds for slow calls and loop blocking.
+        """
+        self._config = config or ProfilingConfig()
+        self._stats: Dict[str, _HandlerStats] = collections.defaultdict(_HandlerStats)
+        self._active: Dict[int, _Call] = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._watchdog: threading.Thread | None = None
+        self._profiling = False
+
+    def instrument(self, handler: Callable) -> Callable:
+        """
+        Wrap a handler so each call is timed and checked against the thresholds.
+
+        Args:
+            handler (Callable): The handler produced by eventIngress.
+
+        Returns:
+            Callable: The instrumented handler, keeping prepare_event and __wrapped__.
+        """
+        name = f'{handler.__module__}.{handler.__qualname__}'
+
+        if asyncio.iscoroutinefunction(handler):
+            @functools.wraps(handler)
+            async def instrumented(*args, **kwargs):
+                coro = handler(*args, **kwargs)
+                call_id, call = self._begin(name, coro)
+                timed = _TimedCoroutine(coro, call)
+                failed = True
+                try:
+                    result = await timed
+                    failed = False
+                    return result
+                finally:
+                    self._end(call_id, call, timed.cpu, timed.max_step, failed)
+        else:
+            @functools.wraps(handler)
+            def instrumented(*args, **kwargs):
+                call_id, call = self._begin(name)
+                cpu_started = time.thread_time()
+                failed = True
+                try:
+                    result = handler(*args, **kwargs)
+                    failed = False
+                    return result
+                finally:
+                    cpu = time.thread_time() - cpu_started
+                    # Only an inline sync handler runs on the event loop thread
+                    on_loop = _running_loop() is not None
+                    block = time.perf_counter() - call.started if on_loop else 0.0
+                    self._end(call_id, call, cpu, block, failed)
+
+        # The dispatch stage sends the undecorated function to process pools
+        instrumented.__wrapped__ = getattr(handler, '__wrapped__', handler)
+        instrumented.prepare_event = getattr(handler, 'prepare_event', None)
+        return instrumented
+
+    def _begin(self, name: str, coro=None) -> Tuple[int, _Call]:
+        call = _Call(name, threading.get_ident(), coro)
+        call_id = next(self._ids)
+        with self._lock:
+            self._active[call_id] = call
+            if self._config.slow_threshold_ms is not None and self._watchdog is None:
+                self._watchdog = threading.Thread(target=self._watch, name='xrvoyage-profiler', daemon=True)
+                self._watchdog.start()
+        return call_id, call
+
+    def _end(self, call_id: int, call: _Call, cpu: float, block: float, failed: bool) -> None:
+        wall = time.perf_counter() - call.started
+        config = self._config
+        slow = config.slow_threshold_ms is not None and wall * 1000 >= config.slow_threshold_ms
+        blocked = config.loop_block_threshold_ms is not None and block * 1000 >= config.loop_block_threshold_ms
+        with self._lock:
+            self._active.pop(call_id, None)
+            stats = self._stats[call.name]
+            stats.calls += 1
+            stats.errors += failed
+            stats.wall_total += wall
+            stats.wall_max = max(stats.wall_max, wall)
+            stats.cpu_total += cpu
+            stats.slow_calls += slow
+            stats.loop_blocks += blocked
+            stats.max_block = max(stats.max_block, block)
+        metrics.observe('xrvoyage_handler_cpu_seconds', cpu, handler=call.name)
+        if slow:
+            logger.warning(f'Slow handler {call.name}: {wall * 1000:.1f}ms wall, {cpu * 1000:.1f}ms CPU')
+        if blocked:
+            logger.warning(
+                f'Handler {call.name} blocked the event loop for {block * 1000:.1f}ms; '
+                f"make it async or run it with sync_executor='thread'"
+            )
+
+    def _watch(self) -> None:
+        threshold = self._config.slow_threshold_ms / 1000
+        interval = min(max(threshold / 4, 0.005), 0.25)
+        while True:
+            time.sleep(interval)
+            now = time.perf_counter()
+            with self._lock:
+                if not self._active:
+                    # Started again by the next call
+                    self._watchdog = None
+                    return
+                overdue = [call for call in self._active.values() if not call.sampled and now - call.started >= threshold]
+                for call in overdue:
+                    call.sampled = True
+            for call in overdue:
+                logger.warning(
+                    f'Handler {call.name} still running after {(now - call.started) * 1000:.0f}ms:\n'
+                    f'{self._sample_stack(call)}'
+                )
+
+    def _sample_stack(self, call: _Call) -> str:
+        limit = self._config.stack_limit
+        if call.in_step:
+            # The handler holds its thread right now, so that thread's stack is where it is
+            frame = sys._current_frames().get(call.thread_id)
+            if frame is not None:
+                return ''.join(traceback.format_stack(frame)[-limit:])
+        # A suspended coroutine: follow the chain of awaits down to where it waits
+        lines: List[str] = []
+        awaitable = call.coro
+        while awaitable is not None and len(lines) < limit:
+            frame = getattr(awaitable, 'cr_frame', None) or getattr(awaitable, 'gi_frame', None)
+            if frame is not None:
+                lines.extend(traceback.format_stack(frame, limit=1))
+            awaitable = getattr(awaitable, 'cr_await', None) or getattr(awaitable, 'gi_yieldfrom', None)
+        if awaitable is not None:
+            lines.append(f'  awaiting {awaitable!r}\n')
+        return ''.join(lines) or '  (no frames)\n'
+
+    async def profile_window(self, seconds: float = 10.0, sort: str = 'cumulative', limit: int = 30) -> str:
+        """
+        Run cProfile on the event loop thread for a while, covering async and
+        inline sync handlers, and return the report.
+
+        Args:
+            seconds (float): How long to profile.
+            sort (str): pstats sort key.
+            limit (int): Number of functions in the report.
+
+        Returns:
+            str: The pstats report.
+
+        Raises:
+            RuntimeError: If a profiling window is already open.
+        """
+        if self._profiling:
+            raise RuntimeError('A profiling window is already open')
+        self._profiling = True
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+            await asyncio.sleep(seconds)
+        finally:
+            profile.disable()
+            self._profiling = False
+        out = io.StringIO()
+        pstats.Stats(profile, stream=out).sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+    async def sample_window(self, seconds: float = 10.0, interval: float = 0.005, limit: int = 20) -> List[Tuple[str, int]]:
+        """
+        Sample the stacks of every thread for a while, from a separate thread,
+        so the overhead does not depend on how busy the handlers are.
+
+        Args:
+            seconds (float): How long to sample.
+            interval (float): Seconds between samples.
+            limit (int): Number of stacks returned.
+
+        Returns:
+            List[Tuple[str, int]]: The most frequent stacks, collapsed as
+                'outer;...;inner' function names, with their sample counts.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, _sample_stacks, seconds, interval, limit)
+
+    def stats(self) -> Dict[str, dict]:
+        """
+        Per handler timing statistics.
+
+        Returns:
+            dict: Calls, errors, average and max wall time, average CPU time,
+                slow calls and loop blocks, keyed by handler name.
+        """
+        with self._lock:
+            return {name: stats.as_dict() for name, stats in self._stats.items()}
+
+
+def _running_loop() -> asyncio.AbstractEventLoop | None:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def _sample_stacks(seconds: float, interval: float, limit: int) -> List[Tuple[str, int]]:
+    counts: Dict[str, int] = collections.Counter()
+    own = threading.get_ident()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own:
+                continue
+            names = []
+            while frame is not None:
+                names.append(f'{frame.f_code.co_filename.rsplit("/", 1)[-1]}:{frame.f_code.co_name}')
+                frame = frame.f_back
+            counts[';'.join(reversed(names))] += 1
+        time.sleep(interval)
+    return counts.most_common(limit)
@@ -0,0 +1,257 @@
+import asyncio
+import gzip
+import os
+import struct
+import time
+import zlib
+from typing import TYPE_CHECKING, BinaryIO, Iterator, NamedTuple
+
+import pydantic
+from logzero import logger
+
+if TYPE_CHECKING:
+    from .wss import WssHandler
+
+_MAGIC = b'XRVREC1\n'
+_GZIP_MAGIC = b'\x1f\x8b'
+# Receive time (unix seconds), frame kind, ship guid length, frame length
+_RECORD = struct.Struct('<dBHI')
+_TEXT, _BINARY = 0, 1
+
+
+class RecordingConfig(pydantic.BaseModel):
+    """
+    Recording of the raw websocket frames, for replay with replay_recording.
+
+    Every frame received from any ship is appended to the file at path with
+    its receive time, before it is decoded. Later runs append to the same
+    file. With compress set the file is gzip compressed, one member per run.
+    Writes are buffered and flushed at most every flush_interval seconds, so a
+    crash loses at most that much. A plain recording cut short by a crash is
+    repaired when the next run starts; a compressed one is readable up to the
+    run that did not close it.
+    """
+    path: str
+    compress: bool = False
+    flush_interval: float = 1.0
+    buffer_bytes: int = 1 << 20
+
+
+class RecordedFrame(NamedTuple):
+    received_at: float
+    ship_guid: str
+    frame: str | bytes
+
+
+class FrameRecorder:
+    def __init__(self, config: RecordingConfig) -> None:
+        """
+        Frame Recorder Constructor
+
+        An existing recording is checked, and a torn last record dropped, here
+        rather than on the first frame, so the websocket reader never has to
+        walk the file. The file is opened on the first frame. record() only
+        copies the frame into the write buffer, so it costs the reader little.
+
+        Args:
+            config (RecordingConfig): Where and how to record.
+
+        Raises:
+            ValueError: If path holds something other than a recording with the
+                configured compression.
+        """
+        self._config = config
+        self._path = os.path.abspath(os.path.expanduser(config.path))
+        self._file: BinaryIO | None = None
+        self._flushed_at = 0.0
+        self.frames = 0
+        self.bytes = 0
+        self._check_existing()
+
+    def _check_existing(self) -> None:
+        path = self._path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return
+        with open(path, 'rb') as existing:
+            if (existing.read(2) == _GZIP_MAGIC) != self._config.compress:
+                raise ValueError(f'{path} is a recording with different compression, record to another file')
+        if not self._config.compress:
+            _truncate_torn_record(path)
+
+    def _open(self) -> BinaryIO:
+        path = self._path
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        raw = open(path, 'ab', buffering=self._config.buffer_bytes)
+        self._file = gzip.GzipFile(fileobj=raw, mode='ab', compresslevel=6) if self._config.compress else raw
+        if new_file:
+            self._file.write(_MAGIC)
+        self._flushed_at = time.monotonic()
+        logger.info(f'Recording websocket frames to {path}')
+        return self._file
+
+    def record(self, frame: str | bytes, ship_guid: str, received_at: float | None = None) -> None:
+        """
+        Append a frame.
+
+        Args:
+            frame (str | bytes): The frame as received from the websocket.
+            ship_guid (str): The ship it was received from.
+            received_at (float, optional): Unix receive time, defaults to now.
+        """
+        file = self._file or self._open()
+        if isinstance(frame, str):
+            kind, data = _TEXT, frame.encode('utf-8')
+        else:
+            kind, data = _BINARY, frame
+        guid = ship_guid.encode('utf-8')
+        file.write(_RECORD.pack(received_at or time.time(), kind, len(guid), len(data)))
+        file.write(guid)
+        file.write(data)
+        self.frames += 1
+        self.bytes += _RECORD.size + len(guid) + len(data)
+        now = time.monotonic()
+        if now - self._flushed_at >= self._config.flush_interval:
+            self._flushed_at = now
+            self.flush()
+
+    def flush(self) -> None:
+        if self._file is None:
+            return
+        if self._config.compress:
+            # A sync flush makes everything written so far decompressible
+            self._file.flush(zlib.Z_SYNC_FLUSH)
+            self._file.fileobj.flush()
+        else:
+            self._file.flush()
+
+    def close(self) -> None:
+        """
+        Flush and close the file. Recording resumes, appending, on the next frame.
+        """
+        if self._file is None:
+            return
+        if self._config.compress:
+            raw = self._file.fileobj
+            self._file.close()
+            raw.close()
+        else:
+            self._file.close()
+        self._file = None
+
+    def stats(self) -> dict:
+        return {'frames': self.frames, 'bytes': self.bytes}
+
+
+def _truncate_torn_record(path: str) -> None:
+    # Walk the record headers, skipping over the frames, to the end of the last complete record
+    size = os.path.getsize(path)
+    with open(path, 'r+b') as file:
+        if file.read(len(_MAGIC)) != _MAGIC:
+            raise ValueError(f'{path} is not a websocket frame recording')
+        end = file.tell()
+        while True:
+            header = file.read(_RECORD.size)
+            if len(header) < _RECORD.size:
+                break
+            _, _, guid_length, frame_length = _RECORD.unpack(header)
+            record_end = end + _RECORD.size + guid_length + frame_length
+            if record_end > size:
+                break
+            end = file.seek(record_end)
+        if end < size:
+            logger.warning(f'Dropping a truncated record at the end of {path}')
+            file.truncate(end)
+
+
+def read_recording(path: str) -> Iterator[RecordedFrame]:
+    """
+    Iterate over the frames of a recording, plain or gzip compressed.
+
+    Args:
+        path (str): The recording file.
+
+    Raises:
+        ValueError: If the file is not a frame recording.
+    """
+    with open(path, 'rb') as raw:
+        compressed = raw.read(2) == _GZIP_MAGIC
+    with (gzip.open(path, 'rb') if compressed else open(path, 'rb')) as file:
+        if file.read(len(_MAGIC)) != _MAGIC:
+            raise ValueError(f'{path} is not a websocket frame recording')
+        try:
+            while True:
+                header = file.read(_RECORD.size)
+                if not header:
+                    return
+                if len(header) == _RECORD.size:
+                    received_at, kind, guid_length, frame_length = _RECORD.unpack(header)
+                    guid = file.read(guid_length)
+                    data = file.read(frame_length)
+                    complete = len(guid) == guid_length and len(data) == frame_length
+                else:
+                    complete = False
+                if not complete:
+                    logger.warning(f'Ignoring a truncated record at the end of {path}')
+                    return
+                yield RecordedFrame(received_at, guid.decode('utf-8'), data.decode('utf-8') if kind == _TEXT else data)
+        except (EOFError, zlib.error, gzip.BadGzipFile) as e:
+            # A run that did not close its gzip member, the frames flushed before it are kept
+            logger.warning(f'Recording {path} ends in an incomplete run: {e}')
+
+
+async def replay_recording(
+    wss: 'WssHandler',
+    path: str,
+    speed: float | None = 1.0,
+    ship_guid: str | None = None,
+    drain: bool = True
+) -> dict:
+    """
+    Feed a recording through the handler's ingress path, the same prefilter,
+    decode, routing and dispatch that live frames take, without a connection.
+
+    Args:
+        wss (WssHandler): The handler whose registered handlers receive the events,
+            e.g. XrApiClient.wss. Its dispatch stage is started if needed.
+        path (str): The recording file.
+        speed (float, optional): 1.0 keeps the recorded timing, 10.0 plays ten times
+            faster, None feeds the frames as fast as the handlers take them.
+        ship_guid (str, optional): Replay every frame as if received from this ship.
+        drain (bool): Wait until every replayed event has been handled before returning.
+
+    Returns:
+        dict: Frames replayed, wall time in seconds, the recorded span in seconds,
+            and the furthest replay fell behind the recorded timing.
+    """
+    if speed is not None and speed <= 0:
+        raise ValueError('speed must be positive, or None for as fast as possible')
+    wss.dispatcher.start()
+    frames = 0
+    max_lag = 0.0
+    first_at = last_at = None
+    started = time.monotonic()
+    for recorded in read_recording(path):
+        if first_at is None:
+            first_at = recorded.received_at
+        last_at = recorded.received_at
+        if speed is not None:
+            due = started + (recorded.received_at - first_at) / speed
+            wait = due - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            else:
+                max_lag = max(max_lag, -wait)
+        await wss._process_frame(recorded.frame, ship_guid or recorded.ship_guid)
+        frames += 1
+        if speed is None and frames % 100 == 0:
+            # Let the dispatch workers run even when the queue never fills
+            await asyncio.sleep(0)
+    if drain:
+        await wss.dispatcher.join()
+    return {
+        'frames': frames,
+        'seconds': time.monotonic() - started,
+        'recorded_seconds': (last_at - first_at) if frames else 0.0,
+        'max_lag_seconds': max_lag,
+    }
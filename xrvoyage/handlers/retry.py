@@ -0,0 +1,164 @@
+import email.utils
+import random
+import threading
+import time
+from typing import FrozenSet
+
+import pydantic
+
+from ..common.metrics import metrics
+
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'PUT', 'DELETE', 'OPTIONS'})
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+
+
+class RetryPolicy(pydantic.BaseModel):
+    """
+    When and how HttpHandler and AsyncHttpHandler retry a failed request.
+
+    A request is retried when the response status is in retry_statuses or the
+    request failed with a connection error or timeout, up to max_attempts
+    attempts in total. POSTs are only retried when they carry an idempotency
+    key. Waits use full jitter exponential backoff between backoff_initial and
+    backoff_max seconds; a Retry-After header, when present, is used instead,
+    capped at retry_after_max.
+
+    Retries are budgeted across all requests: every request earns budget_ratio
+    of a retry, and at most budget_burst unspent retries are banked, so a
+    failing API sees roughly budget_ratio extra load instead of max_attempts
+    times the load.
+    """
+    max_attempts: int = 4
+    retry_statuses: FrozenSet[int] = frozenset({408, 425, 429, 500, 502, 503, 504})
+    retry_on_connection_errors: bool = True
+    backoff_initial: float = 0.2
+    backoff_multiplier: float = 2.0
+    backoff_max: float = 10.0
+    respect_retry_after: bool = True
+    retry_after_max: float = 60.0
+    budget_ratio: float = 0.2
+    budget_burst: float = 10.0
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """
+    Parses a Retry-After header, either delay seconds or an HTTP date.
+
+    Returns:
+        float | None: Seconds to wait, or None when absent or unparseable.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(retry_at.timestamp() - time.time(), 0.0)
+
+
+class RetryEngine:
+    def __init__(self, policy: RetryPolicy | None = None) -> None:
+        """
+        Retry Engine Constructor
+
+        Decides whether and when to retry, and keeps the shared budget and
+        counters. The sync and async HTTP handlers each drive their own loop.
+
+        Args:
+            policy (RetryPolicy, optional): Defaults to a single attempt, i.e. no retries.
+        """
+        self.policy = policy or RetryPolicy(max_attempts=1)
+        self._lock = threading.Lock()
+        self._budget = self.policy.budget_burst
+        self.first_try_successes = 0
+        self.retried_successes = 0
+        self.retries = 0
+        self.failures = 0
+        self.budget_exhausted = 0
+
+    def retryable(self, method: str, headers: dict) -> bool:
+        """
+        Whether a request may be resent at all.
+
+        Args:
+            method (str): The HTTP method.
+            headers (dict): The request headers.
+        """
+        return self.policy.max_attempts > 1 and (
+            method.upper() in IDEMPOTENT_METHODS or IDEMPOTENCY_HEADER in headers
+        )
+
+    def should_retry(self, attempt: int, status: int | None = None, error: Exception | None = None) -> bool:
+        """
+        Whether a failed attempt should be retried. Takes a retry from the budget when it is.
+
+        Args:
+            attempt (int): The attempt that failed, starting at 1.
+            status (int, optional): The response status, if a response came back.
+            error (Exception, optional): The transport error, if none did.
+        """
+        if attempt >= self.policy.max_attempts:
+            return False
+        if status is not None and status not in self.policy.retry_statuses:
+            return False
+        if error is not None and not self.policy.retry_on_connection_errors:
+            return False
+        with self._lock:
+            if self._budget < 1:
+                self.budget_exhausted += 1
+                return False
+            self._budget -= 1
+            self.retries += 1
+        metrics.inc('xrvoyage_http_retries_total')
+        return True
+
+    def delay(self, attempt: int, retry_after: float | None = None) -> float:
+        """
+        Seconds to wait before the next attempt.
+
+        Args:
+            attempt (int): The attempt that failed, starting at 1.
+            retry_after (float, optional): The server's Retry-After, in seconds.
+        """
+        policy = self.policy
+        if retry_after is not None and policy.respect_retry_after:
+            return min(retry_after, policy.retry_after_max)
+        ceiling = min(policy.backoff_initial * policy.backoff_multiplier ** (attempt - 1), policy.backoff_max)
+        return random.uniform(0, ceiling)
+
+    def record(self, attempts: int, success: bool) -> None:
+        """
+        Count the outcome of a request and earn budget for future retries.
+
+        Args:
+            attempts (int): Attempts made.
+            success (bool): Whether the last attempt succeeded.
+        """
+        with self._lock:
+            self._budget = min(self._budget + self.policy.budget_ratio, self.policy.budget_burst)
+            if not success:
+                self.failures += 1
+            elif attempts == 1:
+                self.first_try_successes += 1
+            else:
+                self.retried_successes += 1
+
+    def stats(self) -> dict:
+        """
+        Retry statistics.
+
+        Returns:
+            dict: Successes on the first try and after retries, retries sent,
+                failed requests, and retries refused for lack of budget.
+        """
+        return {
+            'first_try_successes': self.first_try_successes,
+            'retried_successes': self.retried_successes,
+            'retries': self.retries,
+            'failures': self.failures,
+            'budget_exhausted': self.budget_exhausted,
+            'budget_remaining': self._budget,
+        }
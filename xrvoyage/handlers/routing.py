@@ -0,0 +1,170 @@
+import re
+from typing import Callable, Dict, Iterator, List, Pattern, Tuple
+
+_MAX_CACHED_ROUTES = 4096
+
+
+class _PrefixNode:
+    __slots__ = ('children', 'handlers')
+
+    def __init__(self) -> None:
+        self.children: Dict[str, '_PrefixNode'] = {}
+        self.handlers: List[Callable] = []
+
+
+class EventRouter:
+    def __init__(self) -> None:
+        """
+        Routing index from event types to ingress handlers.
+
+        Patterns are either an exact event type ('xr.data.wh1'), a prefix ending in
+        '.*' that matches every type below it ('xr.rt.status.*'), or '*' for every
+        event. Handlers can also subscribe to a whole channel ('xr.rt', 'xr.data',
+        'xr.nrt'), matching every event delivered under that key. Several handlers
+        may share a pattern; they are all called.
+
+        Prefix patterns live in a trie keyed by the dot-separated segments, so
+        resolving a type walks at most one node per segment. Resolved routes are
+        cached until the next registration.
+        """
+        self._exact: Dict[str, List[Callable]] = {}
+        self._prefixes = _PrefixNode()
+        self._channels: Dict[str, List[Callable]] = {}
+        self._cache: Dict[Tuple[str | None, str], Tuple[Callable, ...]] = {}
+        self._frame_filters: Dict[type, Pattern | None] = {}
+
+    def add(self, pattern: str, handler: Callable) -> None:
+        """
+        Register a handler for an event type or prefix pattern.
+
+        Args:
+            pattern (str): Exact event type, prefix pattern ending in '.*', or '*'.
+            handler (Callable): The handler to call.
+
+        Raises:
+            ValueError: If the pattern has a wildcard anywhere but at the end.
+        """
+        if pattern == '*' or pattern.endswith('.*'):
+            segments = [] if pattern == '*' else pattern[:-2].split('.')
+            if '*' in ''.join(segments):
+                raise ValueError(f'Wildcards are only supported at the end of a pattern: {pattern}')
+            node = self._prefixes
+            for segment in segments:
+                node = node.children.setdefault(segment, _PrefixNode())
+            handlers = node.handlers
+        elif '*' in pattern:
+            raise ValueError(f'Wildcards are only supported at the end of a pattern: {pattern}')
+        else:
+            handlers = self._exact.setdefault(pattern, [])
+
+        if handler not in handlers:
+            handlers.append(handler)
+        self._cache.clear()
+        self._frame_filters.clear()
+
+    def add_channel(self, channel: str, handler: Callable) -> None:
+        """
+        Register a handler for every event delivered under a channel key.
+
+        Args:
+            channel (str): The channel key, e.g. 'xr.rt'.
+            handler (Callable): The handler to call.
+        """
+        handlers = self._channels.setdefault(channel, [])
+        if handler not in handlers:
+            handlers.append(handler)
+        self._cache.clear()
+        self._frame_filters.clear()
+
+    def resolve(self, event_type: str | None, channel: str | None = None) -> Tuple[Callable, ...]:
+        """
+        Find every handler for an event.
+
+        Args:
+            event_type (str): The event type.
+            channel (str, optional): The channel key the event was delivered under.
+
+        Returns:
+            Tuple[Callable, ...]: Exact-match handlers first, then prefix handlers from
+                the most to the least specific, then channel handlers.
+        """
+        key = (channel, event_type)
+        handlers = self._cache.get(key)
+        if handlers is not None:
+            return handlers
+
+        found: List[Callable] = []
+        if event_type:
+            found.extend(self._exact.get(event_type, ()))
+            prefix_matches = []
+            node = self._prefixes
+            for segment in event_type.split('.'):
+                prefix_matches.append(node.handlers)
+                node = node.children.get(segment)
+                if node is None:
+                    break
+            for matched in reversed(prefix_matches):
+                found.extend(matched)
+        if channel is not None:
+            found.extend(self._channels.get(channel, ()))
+
+        handlers = tuple(dict.fromkeys(found))
+        if len(self._cache) >= _MAX_CACHED_ROUTES:
+            self._cache.clear()
+        self._cache[key] = handlers
+        return handlers
+
+    def may_match(self, frame: str | bytes) -> bool:
+        """
+        Cheap check on a raw frame, before it is parsed, for whether any registered
+        route could match an event in it. Every exact type and prefix is searched
+        for as a literal, so a False answer means the frame can be skipped. A
+        True answer may be a false positive.
+
+        Args:
+            frame (str | bytes): The raw websocket frame.
+
+        Returns:
+            bool: False only if no event in the frame can have a handler.
+        """
+        kind = type(frame)
+        if kind not in self._frame_filters:
+            self._frame_filters[kind] = self._compile_frame_filter(kind)
+        frame_filter = self._frame_filters[kind]
+        if frame_filter is None:
+            return True
+        return frame_filter.search(frame) is not None
+
+    def _compile_frame_filter(self, kind: type) -> Pattern | None:
+        if any(self._channels.values()) or self._prefixes.handlers:
+            return None
+        literals = [event_type for event_type, handlers in self._exact.items() if handlers]
+        literals.extend(prefix + '.' for prefix in self._prefix_patterns(self._prefixes, ''))
+        if not literals:
+            # Nothing is registered, so nothing can match.
+            expression = '(?!)'
+        else:
+            expression = '|'.join(re.escape(literal) for literal in sorted(literals, key=len, reverse=True))
+        if kind is bytes:
+            return re.compile(expression.encode('utf-8'))
+        return re.compile(expression)
+
+    def _prefix_patterns(self, node: _PrefixNode, path: str) -> Iterator[str]:
+        for segment, child in node.children.items():
+            child_path = f'{path}.{segment}' if path else segment
+            if child.handlers:
+                yield child_path
+            yield from self._prefix_patterns(child, child_path)
+
+    def __contains__(self, event_type: str) -> bool:
+        return bool(self.resolve(event_type))
+
+    def __len__(self) -> int:
+        return (
+            sum(len(handlers) for handlers in self._exact.values())
+            + sum(len(handlers) for handlers in self._channels.values())
+            + self._count_prefix_handlers(self._prefixes)
+        )
+
+    def _count_prefix_handlers(self, node: _PrefixNode) -> int:
+        return len(node.handlers) + sum(self._count_prefix_handlers(child) for child in node.children.values())
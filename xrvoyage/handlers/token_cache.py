@@ -0,0 +1,97 @@
+import contextlib
+import json
+import os
+import tempfile
+from typing import Iterator
+
+import logzero
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+
+class FileTokenCache:
+    def __init__(self, path: str) -> None:
+        """
+        File Token Cache Constructor
+
+        Keeps access and refresh tokens in a JSON file keyed by access key id, so
+        restarted or sibling processes can reuse them instead of logging in again.
+        The file and its lock file are created readable by the owner only. Writers
+        hold an exclusive flock on the lock file; on platforms without fcntl the
+        lock is skipped.
+
+        Args:
+            path (str): Location of the cache file.
+        """
+        self._path = os.path.abspath(os.path.expanduser(path))
+        self._lock_path = f'{self._path}.lock'
+
+    @contextlib.contextmanager
+    def lock(self) -> Iterator[None]:
+        """
+        Hold the cross-process lock, e.g. while renewing tokens.
+        """
+        directory = os.path.dirname(self._path)
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        fd = os.open(self._lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    def _read_all(self) -> dict:
+        try:
+            with open(self._path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logzero.logger.debug(f'Ignoring unreadable token cache {self._path}: {e}')
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def load(self, access_key_id: str) -> dict | None:
+        """
+        Returns the cached tokens for an access key id.
+
+        Args:
+            access_key_id (str): The access key id the tokens belong to.
+
+        Returns:
+            dict | None: access_token and refresh_token, or None when nothing is cached.
+        """
+        entry = self._read_all().get(access_key_id)
+        if not isinstance(entry, dict) or 'access_token' not in entry or 'refresh_token' not in entry:
+            return None
+        return entry
+
+    def store(self, access_key_id: str, access_token: str, refresh_token: str) -> None:
+        """
+        Save the tokens for an access key id. Callers should hold lock().
+
+        Args:
+            access_key_id (str): The access key id the tokens belong to.
+            access_token (str): The access token.
+            refresh_token (str): The refresh token.
+        """
+        data = self._read_all()
+        data[access_key_id] = {'access_token': access_token, 'refresh_token': refresh_token}
+
+        directory = os.path.dirname(self._path)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tokens-')
+        try:
+            os.chmod(tmp_path, 0o600)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self._path)
+        except BaseException:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(tmp_path)
+            raise
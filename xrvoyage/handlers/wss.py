@@ -1,119 +1,347 @@
 from typing import Callable, Dict, List, Union
 import asyncio
-import json
+import logging
+import random
+import time
+import pydantic
 import websockets
 import logzero
 from logzero import logger
 
 from ..models.events import XRWebhookEventBatch
 from .auth import TokenStrategy
+from ..common.codec import get_codec
 from ..common.config import get_app_config
+from ..common.log import payload_logger
+from ..common.metrics import metrics
 from ..common.exceptions import WssConnectionError
 from .decorators import DecoratorsHandlers
+from .dispatch import DispatchConfig, EventDispatcher
+from .recording import FrameRecorder, RecordingConfig
 
-class WssHandler:
-    def __init__(self, token_strategy: TokenStrategy, decorators: DecoratorsHandlers) -> None:
+class ReconnectPolicy(pydantic.BaseModel):
+    """
+    Backoff between websocket reconnect attempts.
+
+    The n-th consecutive failed attempt waits initial_delay * multiplier ** (n - 1)
+    seconds, capped at max_delay and reduced by a random share of up to jitter.
+    With max_attempts set, the listener gives up after that many consecutive failures.
+    """
+    initial_delay: float = 0.5
+    max_delay: float = 30.0
+    multiplier: float = 2.0
+    jitter: float = 0.5
+    max_attempts: int | None = None
+
+    def delay(self, attempt: int) -> float:
+        delay = min(self.max_delay, self.initial_delay * self.multiplier ** (attempt - 1))
+        return delay * (1 - random.uniform(0, self.jitter))
+
+
+class _ShipConnection:
+    def __init__(self, handler: 'WssHandler', ship_guid: str) -> None:
         """
-        Websockets Handler Constructor
+        Connection manager for a single ship's websocket.
 
         Args:
-            token_strategy (TokenStrategy): The strategy to get the API token.
-            decorators (DecoratorsHandlers): Instance of DecoratorsHandlers to access event handlers.
+            handler (WssHandler): The owning handler, which provides the token strategy,
+                reconnect policy and the shared dispatch stage.
+            ship_guid (str): The guid of the ship to listen to.
         """
-        logger.debug('Initializing WssHandler')
-        self._token_strategy = token_strategy
-        self._task = None
-        self._websocket = None
-        self._connected_event = asyncio.Event()
-        self._decorators = decorators
+        self._handler = handler
+        self.ship_guid = ship_guid
+        self.task: asyncio.Task | None = None
+        self.websocket = None
+        self.connected_event = asyncio.Event()
+        self.closing = False
+        self._disconnected_at: float | None = None
+        self._failures = 0
+        self.reconnects = 0
+        self.reconnect_attempts = 0
+        self.downtime_seconds = 0.0
+        self.last_time_to_reconnect: float | None = None
+        self.max_time_to_reconnect = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+    async def supervise_async(self) -> None:
+        """
+        Keep the listener connected, reconnecting with jittered exponential backoff.
+        Every attempt asks the token strategy for a fresh token.
+        """
+        policy = self._handler._reconnect
+        self._failures = 0
+        while True:
+            try:
+                await self.listen_async()
+            except WssConnectionError:
+                self._failures += 1
+            self.websocket = None
+            if self.closing:
+                return
 
-    async def _listen_async(self, guid: str) -> None:
+            if self._disconnected_at is None:
+                self._disconnected_at = time.monotonic()
+            failures = self._failures
+            if policy.max_attempts is not None and failures >= policy.max_attempts:
+                raise WssConnectionError(f'Giving up on ship {self.ship_guid} after {failures} failed connection attempts')
+
+            delay = policy.delay(max(failures, 1))
+            logger.warning(f'Websocket for ship {self.ship_guid} disconnected, reconnecting in {delay:.2f}s')
+            self.reconnect_attempts += 1
+            await asyncio.sleep(delay)
+
+    def _on_connected(self) -> None:
+        self._failures = 0
+        if self._disconnected_at is not None:
+            time_to_reconnect = time.monotonic() - self._disconnected_at
+            self._disconnected_at = None
+            self.reconnects += 1
+            metrics.inc('xrvoyage_reconnects_total', ship=self.ship_guid)
+            self.downtime_seconds += time_to_reconnect
+            self.last_time_to_reconnect = time_to_reconnect
+            self.max_time_to_reconnect = max(self.max_time_to_reconnect, time_to_reconnect)
+            logger.info(f'Websocket for ship {self.ship_guid} reconnected after {time_to_reconnect:.3f}s')
+        self.connected_event.set()
+
+    async def listen_async(self) -> None:
         settings = get_app_config()
-        token = self._token_strategy.get_token()
-        ws_url = f"{settings.XRVOYAGE_WEBSOCKETS_BASE_URL}/v2/ship/{guid}/?token={token}"
+        guid = self.ship_guid
 
         try:
+            token = await self._handler._token_strategy.get_token_async()
+            ws_url = f"{settings.XRVOYAGE_WEBSOCKETS_BASE_URL}/v2/ship/{guid}/?token={token}"
             async with websockets.connect(ws_url) as websocket:
-                self._websocket = websocket
-                self._connected_event.set()  # Set the event after connection is established
+                self.websocket = websocket
+                self._on_connected()  # Set the event after connection is established
                 logger.info(f'Listening for websocket updates for ship: {guid}')
+                process_frame = self._handler._process_frame
+                recorder = self._handler.recorder
                 while True:
-                    result = await websocket.recv()
-                    logger.info(f'Received event: {result}')
-                    event_dict = json.loads(result)
-                    self._handle_event(event_dict)
+                    frame = await websocket.recv()
+                    if recorder is not None:
+                        recorder.record(frame, guid)
+                    await process_frame(frame, guid)
         except websockets.exceptions.ConnectionClosedOK:
-            logger.info('Websocket connection closed normally.')
+            logger.info(f'Websocket connection for ship {guid} closed normally.')
         except Exception as e:
-            logger.error(f'Error in websocket connection: {e}')
+            logger.error(f'Error in websocket connection for ship {guid}: {e}')
             raise WssConnectionError(str(e))
 
-    def _handle_event(self, event_dict: dict) -> None:
+    def stats(self) -> dict:
+        downtime = self.downtime_seconds
+        if self._disconnected_at is not None:
+            downtime += time.monotonic() - self._disconnected_at
+        return {
+            'connected': self.websocket is not None,
+            'reconnects': self.reconnects,
+            'reconnect_attempts': self.reconnect_attempts,
+            'downtime_seconds': downtime,
+            'last_time_to_reconnect': self.last_time_to_reconnect,
+            'max_time_to_reconnect': self.max_time_to_reconnect,
+        }
+
+    async def close(self) -> None:
+        self.closing = True
+        if self.websocket:
+            await self.websocket.close()
+            logger.info(f'Websocket connection for ship {self.ship_guid} closed.')
+        if self.running:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+
+
+class WssHandler:
+    def __init__(
+        self,
+        token_strategy: TokenStrategy,
+        decorators: DecoratorsHandlers,
+        dispatch: DispatchConfig | None = None,
+        reconnect: ReconnectPolicy | None = None,
+        spawn: Callable[..., asyncio.Task] | None = None,
+        recording: RecordingConfig | None = None
+    ) -> None:
+        """
+        Websockets Handler Constructor
+
+        One handler can listen to several ships at once. Every ship gets its own
+        connection and reconnect loop, while the token strategy, the registered
+        handlers and the dispatch stage are shared.
+
+        Args:
+            token_strategy (TokenStrategy): The strategy to get the API token.
+            decorators (DecoratorsHandlers): Instance of DecoratorsHandlers to access event handlers.
+            dispatch (DispatchConfig, optional): Queue and worker settings for running handlers.
+            reconnect (ReconnectPolicy, optional): Backoff used when a connection drops.
+            spawn (Callable, optional): Task factory for listeners and dispatch workers,
+                defaults to asyncio.create_task.
+            recording (RecordingConfig, optional): Record every received frame for replay.
+        """
+        logger.debug('Initializing WssHandler')
+        self._token_strategy = token_strategy
+        self._decorators = decorators
+        self._reconnect = reconnect or ReconnectPolicy()
+        self._connections: Dict[str, _ShipConnection] = {}
+        self._codec = get_codec()
+        self._spawn = spawn or asyncio.create_task
+        self.dispatcher = EventDispatcher(dispatch, self._spawn)
+        self.recorder = FrameRecorder(recording) if recording is not None else None
+        self.frames_received = 0
+        self.frames_skipped = 0
+
+    async def _process_frame(self, frame: str | bytes, ship_guid: str) -> None:
+        """
+        Decode a raw websocket frame and queue its events for their handlers.
+
+        Args:
+            frame (str | bytes): The frame as received from the websocket.
+            ship_guid (str): The guid of the ship the frame was received from.
+        """
+        if payload_logger.should_log(logging.INFO, 'ingress'):
+            logger.info('Received event: %s', payload_logger.payload(frame))
+        self.frames_received += 1
+        metrics.inc('xrvoyage_frames_received_total', ship=ship_guid)
+        if not self._decorators.router.may_match(frame):
+            # No registered route can match anything in this frame, skip parsing it
+            self.frames_skipped += 1
+            metrics.inc('xrvoyage_frames_skipped_total', ship=ship_guid)
+            return
+        if metrics.enabled:
+            started = time.perf_counter()
+            event_dict = self._codec.loads(frame)
+            metrics.observe('xrvoyage_decode_seconds', time.perf_counter() - started)
+        else:
+            event_dict = self._codec.loads(frame)
+        await self._handle_event(event_dict, ship_guid)
+
+    async def _handle_event(self, event_dict: dict, ship_guid: str) -> None:
         """
         Handle the received event, determining if it's a batch or single event.
 
         Args:
             event_dict (dict): The event dictionary received from the websocket.
+            ship_guid (str): The guid of the ship the event was received from.
         """
         for key, value in event_dict.items():
             if key.startswith("xr."):
                 if isinstance(value, list):
                     for event_data in value:
-                        self._trigger_event_handler(event_data)
+                        await self._trigger_event_handler(event_data, ship_guid, key)
                 else:
-                    self._trigger_event_handler(value)
+                    await self._trigger_event_handler(value, ship_guid, key)
 
-    def _trigger_event_handler(self, event_data: dict) -> None:
+    async def _trigger_event_handler(self, event_data: dict, ship_guid: str, channel: str | None = None) -> None:
         """
-        Trigger the registered event handler for the event type.
+        Queue the event for every handler registered for its type or channel.
 
         Args:
             event_data (dict): The event data containing the event type and other details.
+            ship_guid (str): The guid of the ship the event was received from. It is set
+                on the event as ship_guid unless the server already provided one.
+            channel (str, optional): The channel key the event was delivered under.
         """
         event_type = event_data.get("type")
-        if event_type in self._decorators.event_handlers:
-            try:
-                logger.info(f'eventIngress sent to registered handler: {event_type}')
-                handler = self._decorators.event_handlers[event_type]
-                logger.debug(f"Handler for {event_type}: {handler}")
-                if asyncio.iscoroutinefunction(handler):
-                    logger.debug(f"{event_type} handler is a coroutine, scheduling with asyncio.ensure_future")
-                    asyncio.ensure_future(handler(event_data))
-                else:
-                    logger.debug(f"{event_type} handler is not a coroutine, calling directly")
-                    handler(event_data)
-            except Exception as e:
-                logger.error(f"Error handling event {event_type}: {e}")
-        else:
-            logger.debug(f"eventIngress skipping not handled: {event_type}")
+        handlers = self._decorators.router.resolve(event_type, channel)
+        if handlers:
+            if not event_data.get('ship_guid'):
+                event_data['ship_guid'] = ship_guid
+            if logger.isEnabledFor(logging.INFO):
+                logger.info('eventIngress sent to %d registered handler(s): %s', len(handlers), event_type)
+            for handler in handlers:
+                await self.dispatcher.put(event_type, handler, event_data)
+        elif logger.isEnabledFor(logging.DEBUG):
+            logger.debug('eventIngress skipping not handled: %s', event_type)
 
-    async def connect(self, ship_guid: str) -> None:
+    async def connect(self, ship_guid: Union[str, List[str]]) -> None:
         """
         Connects to the Websockets server and listens for ship events.
 
         Args:
-            ship_guid (str): The guid for the ship whose events we want to listen to.
+            ship_guid (str | List[str]): The guid, or guids, of the ships whose events we want
+                to listen to. Ships that are already connected are left as they are.
 
         Returns:
             None: Returns nothing. Events are passed to the callback.
 
         Raises:
             xrvoyage.handlers.exceptions.InvalidCredentialsError: Invalid credentials.
+            xrvoyage.common.exceptions.WssConnectionError: A ship could not be connected.
         """
+        ship_guids = [ship_guid] if isinstance(ship_guid, str) else list(ship_guid)
+        self.dispatcher.start()
+        await asyncio.gather(*[self._connect_ship(guid) for guid in ship_guids])
+
+    async def _connect_ship(self, ship_guid: str) -> None:
         logger.debug(f'Attempting to connect to websocket for ship: {ship_guid}')
-        if self._task is None or self._task.done():
-            self._connected_event.clear()  # Clear the event before starting the task
-            self._task = asyncio.create_task(self._listen_async(ship_guid))
-            await self._connected_event.wait()  # Wait for the connection to be established
+        connection = self._connections.get(ship_guid)
+        if connection is not None and connection.running:
+            return
+
+        connection = _ShipConnection(self, ship_guid)
+        self._connections[ship_guid] = connection
+        connection.task = self._spawn(connection.supervise_async(), name=f'ship-{ship_guid}')
+        connected = asyncio.ensure_future(connection.connected_event.wait())
+        try:
+            # Wait for the connection to be established, or for the supervisor to give up
+            await asyncio.wait({connection.task, connected}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            connected.cancel()
+        if not connection.connected_event.is_set():
+            connection.task.result()
+
+    @property
+    def ship_guids(self) -> List[str]:
+        """
+        The ships this handler has been asked to listen to.
+        """
+        return list(self._connections)
+
+    @property
+    def running(self) -> bool:
+        """
+        Whether any ship listener is still connected or reconnecting.
+        """
+        return any(connection.running for connection in self._connections.values())
+
+    async def wait_closed(self) -> None:
+        """
+        Wait until every ship listener has stopped, either because it was destroyed
+        or because it gave up reconnecting.
+        """
+        tasks = [connection.task for connection in self._connections.values() if connection.task is not None]
+        if tasks:
+            await asyncio.wait(tasks)
 
-    async def destroy(self) -> None:
+    def connection_stats(self) -> Dict[str, dict]:
         """
-        Closes the websocket connection if it exists.
+        Reconnect statistics per ship.
+
+        Returns:
+            Dict[str, dict]: For every ship guid, whether the socket is up, reconnect
+                counts, and downtime and time-to-reconnect in seconds.
+        """
+        return {guid: connection.stats() for guid, connection in self._connections.items()}
+
+    async def destroy(self, ship_guid: str | None = None) -> None:
+        """
+        Closes the websocket connections and stops reconnecting.
+
+        Args:
+            ship_guid (str, optional): Only disconnect this ship. The dispatch stage keeps
+                running while other ships are connected.
         """
         logger.debug('Destroying websocket connection')
-        if self._websocket:
-            await self._websocket.close()
-            logger.info('Websocket connection closed.')
+        if ship_guid is not None:
+            connections = [self._connections[ship_guid]] if ship_guid in self._connections else []
+        else:
+            connections = list(self._connections.values())
+        await asyncio.gather(*[connection.close() for connection in connections])
+        if not self.running:
+            await self.dispatcher.stop()
+            if self.recorder is not None:
+                self.recorder.close()
 
 # Ensure eventIngress is included in the module's export
 __all__ = ['WssHandler', 'DecoratorsHandlers']
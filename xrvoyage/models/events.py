@@ -24,6 +24,16 @@ class XRWebhookEvent(pydantic.BaseModel):
     ship_guid: str | None = None
     project_guid: str | None = None
 
+    @classmethod
+    def from_trusted(cls, data: Dict[str, Any]) -> 'XRWebhookEvent':
+        """
+        Build an event from server data without validating it.
+        """
+        client = data.get('client')
+        if isinstance(client, dict):
+            data = {**data, 'client': ClientInfo.model_construct(**client)}
+        return cls.model_construct(**data)
+
 
 class XRWebhookEventBatch(pydantic.BaseModel):
     xr_rt: List[XRWebhookEvent] = pydantic.Field(
@@ -0,0 +1 @@
+from .standin import StandInConfig, StandInServer
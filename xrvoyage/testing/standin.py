@@ -0,0 +1,346 @@
+import argparse
+import asyncio
+import contextlib
+import json
+import random
+import threading
+import time
+import uuid
+from typing import Any, Coroutine, Dict, Iterator, List, Set
+
+import jwt
+import pydantic
+from aiohttp import WSCloseCode, web
+from logzero import logger
+
+_SIGNING_KEY = 'xrvoyage-stand-in-signing-key-0123456789abcdef'
+
+
+class StandInConfig(pydantic.BaseModel):
+    """
+    Behaviour of the local stand-in for the XR Voyage websocket and HTTP APIs.
+
+    Every ship connection is sent event_rate frames per second (0 sends none),
+    each holding events_per_frame events drawn from event_types, whose args
+    are padded to roughly payload_bytes. HTTP responses are delayed by
+    latency_ms plus up to latency_jitter_ms, and a failure_rate share of the
+    webhook requests is answered with failure_status instead (auth_failures
+    extends that to /oidc). With drop_after_frames set, the TCP connection
+    of each websocket is aborted after that many frames, without a close frame.
+
+    credentials maps access keys to secret keys; None accepts any pair.
+    """
+    event_rate: float = 10.0
+    event_types: List[str] = ['xr.rt.status.ship.geo']
+    events_per_frame: int = 1
+    payload_bytes: int = 64
+    latency_ms: float = 0.0
+    latency_jitter_ms: float = 0.0
+    failure_rate: float = 0.0
+    failure_status: int = 503
+    auth_failures: bool = False
+    drop_after_frames: int | None = None
+    access_token_ttl: int = 3600
+    refresh_token_ttl: int = 86400
+    credentials: Dict[str, str] | None = None
+
+
+class StandInServer:
+    def __init__(self, config: StandInConfig | None = None) -> None:
+        """
+        Stand-In Server Constructor
+
+        Serves /v2/ship/{guid}/ (websocket), /oidc/login, /oidc/refresh,
+        /webhooks/xrweb and /data/webhook/{id} from one local port, so
+        XrApiClient can be load and soak tested offline. Posted events are
+        kept, deduplicated by Idempotency-Key, for assertions.
+
+        Args:
+            config (StandInConfig, optional): Event rates, payload sizes, latency and failure injection.
+        """
+        self.config = config or StandInConfig()
+        self._runner: web.AppRunner | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._host = '127.0.0.1'
+        self._sockets: Dict[str, Set[web.WebSocketResponse]] = {}
+        self._idempotency_keys: Set[str] = set()
+        self.port: int | None = None
+        self.events: List[dict] = []
+        self.data_webhooks: List[tuple] = []
+        self.logins = 0
+        self.refreshes = 0
+        self.requests = 0
+        self.failures_injected = 0
+        self.duplicates = 0
+        self.frames_sent = 0
+        self.connections = 0
+
+    @property
+    def api_url(self) -> str:
+        return f'http://{self._host}:{self.port}'
+
+    @property
+    def ws_url(self) -> str:
+        return f'ws://{self._host}:{self.port}'
+
+    def env(self) -> Dict[str, str]:
+        """
+        Environment variables that point XrApiClient at this server.
+        """
+        return {'XRVOYAGE_API_BASE_URL': self.api_url, 'XRVOYAGE_WEBSOCKETS_BASE_URL': self.ws_url}
+
+    def issue_token(self, kind: str = 'access', ttl: int | None = None) -> str:
+        """
+        A token this server accepts, e.g. to use as XRVOYAGE_SESSION_TOKEN.
+        """
+        if ttl is None:
+            ttl = self.config.access_token_ttl if kind == 'access' else self.config.refresh_token_ttl
+        claims = {'exp': int(time.time()) + ttl, 'typ': kind, 'jti': uuid.uuid4().hex}
+        return jwt.encode(claims, _SIGNING_KEY, algorithm='HS256')
+
+    def _valid_token(self, token: str | None, kind: str = 'access') -> bool:
+        try:
+            return jwt.decode(token or '', _SIGNING_KEY, algorithms=['HS256']).get('typ') == kind
+        except jwt.InvalidTokenError:
+            return False
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> 'StandInServer':
+        app = web.Application(middlewares=[self._inject_faults])
+        app.router.add_get('/v2/ship/{guid}/', self._ship_socket)
+        app.router.add_post('/oidc/login', self._login)
+        app.router.add_post('/oidc/refresh', self._refresh)
+        app.router.add_post('/webhooks/xrweb', self._xrweb)
+        app.router.add_post('/data/webhook/{webhook_id}', self._data_webhook)
+        self._loop = asyncio.get_running_loop()
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        self._host = '127.0.0.1' if host in ('0.0.0.0', '') else host
+        self.port = self._runner.addresses[0][1]
+        logger.info(f'Stand-in serving {self.api_url} and {self.ws_url}')
+        return self
+
+    async def stop(self) -> None:
+        for sockets in self._sockets.values():
+            for ws in list(sockets):
+                await ws.close(code=WSCloseCode.GOING_AWAY)
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    @contextlib.contextmanager
+    def running_in_thread(self, host: str = '127.0.0.1', port: int = 0) -> Iterator['StandInServer']:
+        """
+        Run the server on its own event loop in a daemon thread, so clients that
+        block, like the token strategies or HttpHandler, can be tested against it.
+        Use call() to run coroutines such as send() on that loop.
+        """
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever, name='xrvoyage-standin', daemon=True)
+        thread.start()
+        try:
+            asyncio.run_coroutine_threadsafe(self.start(host, port), loop).result()
+            yield self
+        finally:
+            asyncio.run_coroutine_threadsafe(self.stop(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+
+    def call(self, coro: Coroutine, timeout: float | None = 10.0) -> Any:
+        """
+        Run a coroutine on the server's loop from another thread and return its result.
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(timeout)
+
+    async def __aenter__(self) -> 'StandInServer':
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.stop()
+
+    async def send(self, frame: dict | str, ship_guid: str | None = None) -> int:
+        """
+        Push a frame to the connected websockets, of one ship or all of them.
+
+        Returns:
+            int: Number of sockets the frame was sent to.
+        """
+        data = frame if isinstance(frame, str) else json.dumps(frame)
+        targets = [
+            ws for guid, sockets in self._sockets.items() if ship_guid in (None, guid) for ws in sockets
+        ]
+        for ws in targets:
+            await ws.send_str(data)
+        self.frames_sent += len(targets)
+        return len(targets)
+
+    def make_frame(self, ship_guid: str) -> dict:
+        """
+        A generated frame of events_per_frame events with padded args.
+        """
+        frame: Dict[str, List[dict]] = {}
+        padding = 'x' * max(self.config.payload_bytes - 48, 0)
+        for _ in range(self.config.events_per_frame):
+            event_type = random.choice(self.config.event_types)
+            channel = '.'.join(event_type.split('.')[:2])
+            frame.setdefault(channel, []).append({
+                'type': event_type,
+                'ship_guid': ship_guid,
+                'guid': uuid.uuid4().hex,
+                'args': {'seq': self.frames_sent, 'ts': time.time(), 'padding': padding},
+            })
+        return frame
+
+    @web.middleware
+    async def _inject_faults(self, request: web.Request, handler):
+        if request.method != 'POST':
+            return await handler(request)
+        self.requests += 1
+        config = self.config
+        delay = config.latency_ms + random.uniform(0, config.latency_jitter_ms)
+        if delay:
+            await asyncio.sleep(delay / 1000)
+        injectable = config.auth_failures or not request.path.startswith('/oidc/')
+        if injectable and config.failure_rate and random.random() < config.failure_rate:
+            self.failures_injected += 1
+            return web.json_response(
+                {'message': 'injected failure'}, status=config.failure_status, headers={'Retry-After': '0'}
+            )
+        return await handler(request)
+
+    async def _json_body(self, request: web.Request):
+        # aiohttp has already undone any Content-Encoding the client applied
+        return json.loads(await request.read())
+
+    def _authorized(self, request: web.Request) -> bool:
+        header = request.headers.get('Authorization', '')
+        return header.startswith('Bearer ') and self._valid_token(header[len('Bearer '):])
+
+    def _first_delivery(self, request: web.Request) -> bool:
+        key = request.headers.get('Idempotency-Key')
+        if key is None:
+            return True
+        if key in self._idempotency_keys:
+            self.duplicates += 1
+            return False
+        self._idempotency_keys.add(key)
+        return True
+
+    def _tokens(self) -> web.Response:
+        return web.json_response({'access_token': self.issue_token('access'), 'refresh_token': self.issue_token('refresh')})
+
+    async def _login(self, request: web.Request) -> web.Response:
+        body = await self._json_body(request)
+        credentials = self.config.credentials
+        access_key, secret_key = body.get('access_key'), body.get('secret_key')
+        if not access_key or not secret_key or (credentials is not None and credentials.get(access_key) != secret_key):
+            return web.json_response({'message': 'Invalid credentials'}, status=401)
+        self.logins += 1
+        return self._tokens()
+
+    async def _refresh(self, request: web.Request) -> web.Response:
+        body = await self._json_body(request)
+        if not self._valid_token(body.get('refresh_token'), kind='refresh'):
+            return web.json_response({'message': 'Invalid refresh token'}, status=401)
+        self.refreshes += 1
+        return self._tokens()
+
+    async def _xrweb(self, request: web.Request) -> web.Response:
+        if not self._authorized(request):
+            return web.json_response({'message': 'Unauthorized'}, status=401)
+        batch = await self._json_body(request)
+        if self._first_delivery(request):
+            for channel in ('xr.rt', 'xr.data', 'xr.nrt'):
+                self.events.extend({**event, 'channel': channel} for event in batch.get(channel) or [])
+        return web.json_response({'message': 'success'})
+
+    async def _data_webhook(self, request: web.Request) -> web.Response:
+        if not self._authorized(request):
+            return web.json_response({'message': 'Unauthorized'}, status=401)
+        event = await self._json_body(request)
+        if self._first_delivery(request):
+            self.data_webhooks.append((request.match_info['webhook_id'], event))
+        return web.json_response({'message': 'success'})
+
+    async def _ship_socket(self, request: web.Request) -> web.StreamResponse:
+        if not self._valid_token(request.query.get('token')):
+            return web.json_response({'message': 'Unauthorized'}, status=401)
+        guid = request.match_info['guid']
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.connections += 1
+        self._sockets.setdefault(guid, set()).add(ws)
+        producer = asyncio.create_task(self._produce(ws, guid, request.transport)) if self.config.event_rate > 0 else None
+        try:
+            async for _ in ws:
+                pass  # Clients do not send anything on this socket
+        finally:
+            if producer is not None:
+                producer.cancel()
+            self._sockets[guid].discard(ws)
+        return ws
+
+    async def _produce(self, ws: web.WebSocketResponse, guid: str, transport: asyncio.Transport) -> None:
+        interval = 1 / self.config.event_rate
+        next_at = time.monotonic()
+        sent = 0
+        try:
+            while not ws.closed:
+                await ws.send_str(json.dumps(self.make_frame(guid)))
+                self.frames_sent += 1
+                sent += 1
+                if self.config.drop_after_frames is not None and sent >= self.config.drop_after_frames:
+                    # An unclean disconnect, as a network failure would leave it
+                    transport.abort()
+                    return
+                next_at += interval
+                await asyncio.sleep(max(next_at - time.monotonic(), 0))
+        except ConnectionResetError:
+            pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Local stand-in for the XR Voyage websocket and HTTP APIs')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--rate', type=float, default=10.0, help='frames per second per ship connection')
+    parser.add_argument('--events-per-frame', type=int, default=1)
+    parser.add_argument('--event-type', action='append', dest='event_types')
+    parser.add_argument('--payload-bytes', type=int, default=64)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--latency-jitter-ms', type=float, default=0.0)
+    parser.add_argument('--failure-rate', type=float, default=0.0)
+    parser.add_argument('--failure-status', type=int, default=503)
+    parser.add_argument('--drop-after-frames', type=int)
+    args = parser.parse_args()
+
+    config = StandInConfig(
+        event_rate=args.rate,
+        events_per_frame=args.events_per_frame,
+        payload_bytes=args.payload_bytes,
+        latency_ms=args.latency_ms,
+        latency_jitter_ms=args.latency_jitter_ms,
+        failure_rate=args.failure_rate,
+        failure_status=args.failure_status,
+        drop_after_frames=args.drop_after_frames,
+        **({'event_types': args.event_types} if args.event_types else {}),
+    )
+
+    async def serve() -> None:
+        server = await StandInServer(config).start(args.host, args.port)
+        for name, value in server.env().items():
+            print(f'{name}={value}')
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await server.stop()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -2,41 +2,251 @@
 import asyncio
 import signal
 import sys
+import time
+from typing import List, Union
 from xrvoyage.entities.data_webhook import DataWebhookHandler
 from xrvoyage.entities.job import JobHandler
 from xrvoyage.entities.webhooks_xrweb import Webhooks_XRWebHandler
-from xrvoyage.handlers.wss import WssHandler
+from xrvoyage.handlers.wss import ReconnectPolicy, WssHandler
 from xrvoyage.handlers.decorators import DecoratorsHandlers
-from xrvoyage.handlers.auth import get_token_strategy
+from xrvoyage.handlers.batcher import EgressBatchConfig, EgressBatcher
+from xrvoyage.handlers.dispatch import DispatchConfig
+from xrvoyage.handlers.limits import EgressLimiter, EgressLimitsConfig
+from xrvoyage.handlers.outbox import OutboxConfig
+from xrvoyage.handlers.profiling import HandlerProfiler, ProfilingConfig
+from xrvoyage.handlers.recording import RecordingConfig, replay_recording
+from xrvoyage.handlers.retry import RetryPolicy
+from xrvoyage.handlers.http import AsyncHttpHandler, CompressionConfig, HttpHandler, HttpPoolConfig
+from xrvoyage.handlers.auth import TokenRefreshConfig, TokenRefresher, get_token_strategy
 from xrvoyage.common.static import get_version
+from xrvoyage.common.log import LogConfig, configure_payload_logging
+from xrvoyage.common.metrics import MetricsConfig, MetricsServer, configure_metrics, metrics as metrics_registry
+from xrvoyage.common.tasks import TaskScope
+from logzero import logger
 
 class XrApiClient:
-    def __init__(self, ship_guid: str):
+    def __init__(
+        self,
+        ship_guid: Union[str, List[str]],
+        http_pool: HttpPoolConfig | None = None,
+        egress_batching: EgressBatchConfig | None = None,
+        dispatch: DispatchConfig | None = None,
+        reconnect: ReconnectPolicy | None = None,
+        log: LogConfig | None = None,
+        token_refresh: TokenRefreshConfig | None = None,
+        drain_timeout: float = 10.0,
+        outbox: OutboxConfig | None = None,
+        retry: RetryPolicy | None = None,
+        limits: EgressLimitsConfig | None = None,
+        compression: CompressionConfig | None = None,
+        metrics: MetricsConfig | None = None,
+        profiling: ProfilingConfig | None = None,
+        recording: RecordingConfig | None = None
+    ):
         self.version = get_version()
-        self.ship_guid = ship_guid
+        if log is not None:
+            configure_payload_logging(log)
+        if metrics is not None:
+            configure_metrics(metrics)
+        self.metrics = metrics_registry
+        self._metrics_config = metrics
+        self._metrics_server: MetricsServer | None = None
+        self.ship_guids = [ship_guid] if isinstance(ship_guid, str) else list(ship_guid)
+        self.ship_guid = self.ship_guids[0]
+        self._tasks = TaskScope()
         token_strategy = get_token_strategy()
-        self.data_webhook = DataWebhookHandler(token_strategy)
+        self.token_refresher = TokenRefresher(token_strategy, token_refresh, self._tasks.spawn) if token_refresh is not None else None
+        self.http = HttpHandler(token_strategy, pool=http_pool, retry=retry, compression=compression)
+        self.async_http = AsyncHttpHandler(token_strategy, pool=http_pool, retry=retry, compression=compression)
+        self.egress_limiter = EgressLimiter(limits)
+        self.data_webhook = DataWebhookHandler(
+            token_strategy, self.http, self.async_http, outbox, self._tasks.spawn, limiter=self.egress_limiter
+        )
         # self.job = JobHandler(token_strategy)
-        self.webhooks_xrweb = Webhooks_XRWebHandler(token_strategy)
+        self.webhooks_xrweb = Webhooks_XRWebHandler(
+            token_strategy, self.http, self.async_http, outbox, self._tasks.spawn, limiter=self.egress_limiter
+        )
+        for name, outbox in (('xrweb', self.webhooks_xrweb.outbox), ('data_webhook', self.data_webhook.outbox)):
+            if outbox is not None:
+                self.metrics.gauge_callback('xrvoyage_outbox_queued', outbox.__len__, outbox=name)
         self.project_guid = "A895570833F0429A98940C079555AE51"
-        self.decorators = DecoratorsHandlers(self.webhooks_xrweb, self.project_guid)
-        self.wss = WssHandler(token_strategy, self.decorators)
+        self.egress_batcher = EgressBatcher(self.webhooks_xrweb, egress_batching, self._tasks.spawn) if egress_batching is not None else None
+        self.profiler = HandlerProfiler(profiling) if profiling is not None else None
+        self.decorators = DecoratorsHandlers(self.webhooks_xrweb, self.project_guid, self.egress_batcher, self.profiler)
+        self.wss = WssHandler(token_strategy, self.decorators, dispatch, reconnect, self._tasks.spawn, recording)
         self._shutdown = False
+        self._shutdown_event: asyncio.Event | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._drain_timeout = drain_timeout
+        self.last_drain_seconds: float | None = None
+        self.startup_seconds: float | None = None
+        self.teardown_seconds: float | None = None
 
-    async def connect(self):
-        loop = asyncio.get_event_loop()
+    async def __aenter__(self) -> "XrApiClient":
+        """
+        Start the client: begin refreshing the token and connect to every ship.
+        Every background task is owned by the client and is cancelled, at the
+        latest, when the async with block exits. If shutdown() is called before
+        every ship is connected, it stops waiting and returns the client unconnected.
+
+        Returns:
+            XrApiClient: The connected client.
+        """
+        started = time.monotonic()
+        self._loop = asyncio.get_running_loop()
+        self._shutdown_event = asyncio.Event()
+        if self._shutdown:
+            self._shutdown_event.set()
+        try:
+            self._start_metrics_server()
+            if self.token_refresher is not None:
+                self.token_refresher.start()
+            for outbox in self._outboxes():
+                # Replays whatever a previous run left in the spill file
+                outbox.start()
+            await self._connect_unless_shutdown()
+        except BaseException:
+            await self.__aexit__(None, None, None)
+            raise
+        self.startup_seconds = time.monotonic() - started
+        logger.info(f'XrApiClient started in {self.startup_seconds:.3f}s')
+        return self
+
+    async def _connect_unless_shutdown(self) -> None:
+        # Until the first connection succeeds the listeners may retry forever, so a
+        # shutdown requested meanwhile abandons connecting instead of waiting for it
+        connecting = asyncio.ensure_future(self.wss.connect(self.ship_guids))
+        shutdown_requested = asyncio.ensure_future(self._shutdown_event.wait())
+        try:
+            await asyncio.wait({connecting, shutdown_requested}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            shutdown_requested.cancel()
+            if not connecting.done():
+                connecting.cancel()
+                await asyncio.gather(connecting, return_exceptions=True)
+        if connecting.cancelled():
+            logger.info('Shutdown requested while connecting, not waiting for the ships')
+            return
+        connecting.result()
+
+    async def __aexit__(self, exc_type, exc, tb) -> bool:
+        """
+        Drain within drain_timeout seconds, then cancel and await any task still running.
+        """
+        started = time.monotonic()
+        try:
+            await self._drain()
+        finally:
+            await self._tasks.close()
+            if self._metrics_server is not None:
+                self._metrics_server.stop()
+                self._metrics_server = None
+            self.teardown_seconds = time.monotonic() - started
+        return False
+
+    async def wait_for_shutdown(self) -> None:
+        """
+        Wait until shutdown() is called or every listener has stopped.
+        """
+        shutdown_requested = asyncio.ensure_future(self._shutdown_event.wait())
+        listeners_closed = asyncio.ensure_future(self.wss.wait_closed())
+        try:
+            await asyncio.wait({shutdown_requested, listeners_closed}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            shutdown_requested.cancel()
+            listeners_closed.cancel()
 
+    async def connect(self):
+        """
+        Connect to the ships and run until shutdown() is called, a SIGINT/SIGTERM is
+        received, or every listener has stopped. Then drain gracefully: stop reading
+        frames, let queued and in-flight handlers finish, flush pending egress, and
+        close the HTTP sessions, all within drain_timeout seconds.
+        """
+        loop = asyncio.get_running_loop()
+        signals = []
         if sys.platform != "win32":
             for sig in (signal.SIGINT, signal.SIGTERM):
                 loop.add_signal_handler(sig, self.shutdown)
+                signals.append(sig)
+
+        try:
+            async with self:
+                await self.wait_for_shutdown()
+        finally:
+            for sig in signals:
+                loop.remove_signal_handler(sig)
+
+    async def replay(self, path: str, speed: float | None = 1.0, ship_guid: str | None = None) -> dict:
+        """
+        Run the registered ingress handlers against a recording made with the
+        recording option, instead of connecting to the ships. Egress from the
+        handlers goes out as usual. Drains like connect() when the recording ends.
 
-        await self.wss.connect(self.ship_guid)
+        Args:
+            path (str): The recording file.
+            speed (float, optional): 1.0 keeps the recorded timing, 10.0 plays ten
+                times faster, None plays as fast as the handlers keep up.
+            ship_guid (str, optional): Replay every frame as if received from this ship.
 
+        Returns:
+            dict: Replay statistics, see xrvoyage.handlers.recording.replay_recording.
+        """
         try:
-            while not self._shutdown:
-                await asyncio.sleep(1)
+            return await replay_recording(self.wss, path, speed, ship_guid)
         finally:
-            await self.wss.destroy()
+            await self._drain()
+            await self._tasks.close()
+
+    async def _drain(self) -> None:
+        started = time.monotonic()
+        try:
+            async with asyncio.timeout(self._drain_timeout):
+                # Closes the sockets first, then waits for queued and in-flight handlers
+                await self.wss.destroy()
+                if self.egress_batcher is not None:
+                    await self.egress_batcher.flush()
+                for outbox in self._outboxes():
+                    await outbox.flush()
+        except TimeoutError:
+            logger.warning(f'Drain did not finish within {self._drain_timeout}s, dropping remaining work')
+            await self.wss.dispatcher.stop(drain=False)
+        finally:
+            for outbox in self._outboxes():
+                await outbox.close()
+            if self.wss.recorder is not None:
+                # destroy() closes it too, unless the deadline cut it short
+                self.wss.recorder.close()
+            await self.async_http.close()
+            self.http.close()
+            if self.token_refresher is not None:
+                await self.token_refresher.stop()
+            self.last_drain_seconds = time.monotonic() - started
+            logger.info(f'XrApiClient drained in {self.last_drain_seconds:.3f}s')
+
+    def _start_metrics_server(self) -> None:
+        config = self._metrics_config
+        if config is None or not config.enabled or config.prometheus_port is None or self._metrics_server is not None:
+            return
+        self._metrics_server = MetricsServer(self.metrics, config.prometheus_host, config.prometheus_port)
+        self._metrics_server.start()
+
+    def _outboxes(self):
+        return [outbox for outbox in (self.webhooks_xrweb.outbox, self.data_webhook.outbox) if outbox is not None]
 
     def shutdown(self):
+        """
+        Ask a running connect() to drain and return. Safe to call from signal
+        handlers and from other threads.
+        """
         self._shutdown = True
+        if self._shutdown_event is None:
+            return
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is self._loop:
+            self._shutdown_event.set()
+        else:
+            self._loop.call_soon_threadsafe(self._shutdown_event.set)